@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+Applies a processing recipe to many datasets from the command line, without the GUI.
+
+The recipe is the metadata file saved next to a processed stack, e.g. image.json, its operation
+history is replayed on every dataset. Each dataset is a directory containing the sample images,
+the flat and dark images are optionally in subdirectories of it.
+"""
+import argparse
+import logging
+import os
+import sys
+
+from mantidimaging import helper as h
+from mantidimaging.core.io.utility import DEFAULT_IO_FILE_FORMAT
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description="Mantid Imaging batch processing")
+
+    parser.add_argument("recipe", help="Metadata file saved with a processed stack, containing its operation history")
+    parser.add_argument("datasets", nargs="+", help="Directories of the datasets to process")
+    parser.add_argument("-o", "--output", required=True, help="Directory the processed datasets are saved in")
+
+    parser.add_argument("--sample", default="", help="Subdirectory of each dataset containing the sample images")
+    parser.add_argument("--flat", help="Subdirectory of each dataset containing the flat images")
+    parser.add_argument("--dark", help="Subdirectory of each dataset containing the dark images")
+    parser.add_argument("--in-format", default=DEFAULT_IO_FILE_FORMAT, help="Format of the images loaded")
+    parser.add_argument("--in-prefix", default="", help="Prefix of the images loaded")
+    parser.add_argument("--out-format", default=DEFAULT_IO_FILE_FORMAT, help="Format of the images saved")
+    parser.add_argument("--overwrite", action="store_true", help="Overwrite existing images in the output")
+
+    parser.add_argument("--reconstruct",
+                        action="store_true",
+                        help="Reconstruct the processed datasets and save the volumes. "
+                        "The algorithm and filter are taken from the recipe unless they are given.")
+    parser.add_argument("--algorithm", help="Reconstruction algorithm, e.g. FBP_CUDA or gridrec")
+    parser.add_argument("--recon-filter", help="Reconstruction filter, e.g. ram-lak")
+    parser.add_argument("--num-iter", type=int, default=1, help="Iterations of the iterative algorithms")
+    parser.add_argument("--cor",
+                        type=float,
+                        help="Centre of rotation in pixels. By default the one found in the GUI for the dataset, "
+                        "or the middle of the images.")
+    parser.add_argument("--tilt", type=float, help="Tilt of the rotation axis in degrees")
+
+    parser.add_argument("--no-prefetch",
+                        action="store_true",
+                        help="Load each dataset after the previous one is saved, instead of while it is processed")
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        default="INFO",
+        help="Log verbosity level. "
+        "Available options are: TRACE, DEBUG, INFO, WARN, CRITICAL",
+    )
+
+    parsed = parser.parse_args(args)
+    if parsed.algorithm is not None and parsed.recon_filter is None:
+        parser.error("--recon-filter is required with --algorithm")
+    return parsed
+
+
+def create_jobs(args):
+    from mantidimaging.core.batch import DatasetJob
+
+    jobs = []
+    for dataset in args.datasets:
+        name = os.path.basename(os.path.normpath(dataset))
+        jobs.append(
+            DatasetJob(os.path.join(dataset, args.sample), os.path.join(args.output, name),
+                       os.path.join(dataset, args.flat) if args.flat else None,
+                       os.path.join(dataset, args.dark) if args.dark else None))
+    return jobs
+
+
+def main(args=None) -> int:
+    args = parse_args(args)
+    h.initialise_logging(logging.getLevelName(args.log_level))
+
+    # imported here so that --help does not have to import the filters
+    from mantidimaging.core.batch import BatchPipeline, LoadOptions, SaveOptions, load_recipe
+    from mantidimaging.core.utility.data_containers import ReconstructionParameters
+
+    recipe = load_recipe(args.recipe)
+    if args.algorithm is not None:
+        recipe.recon_params = ReconstructionParameters(args.algorithm, args.recon_filter, args.num_iter)
+    elif args.recon_filter is not None and recipe.recon_params is not None:
+        recipe.recon_params.filter_name = args.recon_filter
+
+    pipeline = BatchPipeline(recipe,
+                             LoadOptions(args.in_format, args.in_prefix),
+                             SaveOptions(args.out_format, overwrite_all=args.overwrite),
+                             reconstruct=args.reconstruct or args.algorithm is not None,
+                             cor=args.cor,
+                             tilt=args.tilt,
+                             prefetch=not args.no_prefetch)
+    results = pipeline.run(create_jobs(args))
+
+    log = logging.getLogger(__name__)
+    for result in results:
+        if result.succeeded:
+            log.info(f"{result.job.sample_path}: saved in {result.saved}")
+        else:
+            log.error(f"{result.job.sample_path}: {result.error}")
+    return 0 if all(result.succeeded for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2 @@
+from .pipeline import (  # noqa: F401
+    BatchPipeline, DatasetJob, JobResult, LoadOptions, Recipe, SaveOptions, load_recipe)
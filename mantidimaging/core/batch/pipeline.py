@@ -0,0 +1,462 @@
+"""
+Replays a recipe, the operation history saved with a processed stack, on many datasets
+without the GUI.
+
+Each dataset is loaded, processed with the filters of the recipe, optionally reconstructed and
+saved. The datasets are independent, so the next one is loaded in a background process while the
+current one is processed, the disk reads then overlap the processing instead of adding to it.
+"""
+import inspect
+import json
+import multiprocessing
+import os
+import signal
+import time
+from dataclasses import dataclass, field, replace
+from logging import getLogger
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+import numpy as np
+
+from mantidimaging.core.data import Images
+from mantidimaging.core.data.dataset import Dataset
+from mantidimaging.core.data.utility import apply_in_slabs
+from mantidimaging.core.io import loader, saver
+from mantidimaging.core.io.utility import DEFAULT_IO_FILE_FORMAT
+from mantidimaging.core.operation_history import const
+from mantidimaging.core.operation_history.operations import MODULE_NOT_FOUND, ImageOperation, deserialize_metadata
+from mantidimaging.core.operations.base_filter import BaseFilter
+from mantidimaging.core.operations.crop_coords import CropCoordinatesFilter
+from mantidimaging.core.operations.loader import load_filter_packages
+from mantidimaging.core.parallel import utility as pu
+from mantidimaging.core.rotation import CorTiltDataModel
+from mantidimaging.core.utility.data_containers import Degrees, ReconstructionParameters, ScalarCoR
+from mantidimaging.core.utility.memory_planner import plan_memory
+
+LOG = getLogger(__name__)
+
+# The reconstructions recorded in the history of a volume, they provide the default reconstruction parameters
+RECONSTRUCTION_OPERATIONS = ('AstraRecon.full', 'TomopyRecon.full')
+# Recorded operations that do not change the data
+SKIPPED_OPERATIONS = (const.OPERATION_NAME_COR_TILT_FINDING, )
+# The parameters of the filters that are stacks of the dataset, which are not recorded in the history
+DATASET_PARAMETERS = ('flat', 'dark')
+
+
+@dataclass
+class RecipeStep:
+    name: str
+    display_name: str
+    kwargs: Dict[str, Any]
+    # None for swapping the axes of the stack
+    filter_class: Optional[Type[BaseFilter]] = None
+
+
+@dataclass
+class Recipe:
+    steps: List[RecipeStep]
+    recon_params: Optional[ReconstructionParameters] = None
+    # The steps recorded after the reconstruction, they are applied to the reconstructed volume
+    volume_steps: List[RecipeStep] = field(default_factory=list)
+
+    @property
+    def filter_steps(self):
+        return [(step.filter_class, step.kwargs) for step in self.steps if step.filter_class is not None]
+
+
+@dataclass
+class DatasetJob:
+    """
+    Where a dataset is loaded from and saved to.
+    """
+    sample_path: str
+    output_path: str
+    flat_path: Optional[str] = None
+    dark_path: Optional[str] = None
+
+
+@dataclass
+class LoadOptions:
+    in_format: str = DEFAULT_IO_FILE_FORMAT
+    in_prefix: str = ''
+    dtype: Any = np.float32
+
+
+@dataclass
+class SaveOptions:
+    out_format: str = DEFAULT_IO_FILE_FORMAT
+    name_prefix: str = saver.DEFAULT_NAME_PREFIX
+    overwrite_all: bool = False
+
+
+@dataclass
+class JobResult:
+    job: DatasetJob
+    saved: Optional[str] = None
+    error: Optional[str] = None
+    load_seconds: float = 0.0
+    process_seconds: float = 0.0
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+def recipe_from_operations(operations: Iterable[ImageOperation],
+                           filters: Optional[Iterable[Type[BaseFilter]]] = None) -> Recipe:
+    """
+    :param operations: The operations, deserialized from the history
+    :param filters: The filters the operations are looked up in, all the filters by default
+    :raises KeyError: If an operation is not a known filter
+    """
+    filter_classes = {f.__name__: f for f in (filters if filters is not None else load_filter_packages())}
+    recipe = Recipe([])
+    steps = recipe.steps
+    for operation in operations:
+        if operation.filter_name in SKIPPED_OPERATIONS:
+            continue
+        if operation.filter_name in RECONSTRUCTION_OPERATIONS:
+            kwargs = operation.filter_kwargs
+            recipe.recon_params = ReconstructionParameters(kwargs['algorithm'], kwargs['filter_name'],
+                                                           int(kwargs.get('num_iter', 1)))
+            steps = recipe.volume_steps
+            continue
+        if operation.filter_name == const.OPERATION_NAME_AXES_SWAP:
+            steps.append(RecipeStep(operation.filter_name, operation.display_name, {}))
+            continue
+        try:
+            filter_class = filter_classes[operation.filter_name]
+        except KeyError:
+            raise KeyError(MODULE_NOT_FOUND.format(operation.filter_name))
+        steps.append(RecipeStep(operation.filter_name, operation.display_name, operation.filter_kwargs, filter_class))
+    return recipe
+
+
+def load_recipe(path: str, filters: Optional[Iterable[Type[BaseFilter]]] = None) -> Recipe:
+    """
+    :param path: A metadata file saved with a processed stack, which contains its operation history
+    :param filters: The filters the operations are looked up in, all the filters by default
+    """
+    with open(path) as f:
+        metadata = json.load(f)
+    if const.OPERATION_HISTORY not in metadata:
+        raise ValueError(f"{path} does not contain an {const.OPERATION_HISTORY}")
+    return recipe_from_operations(deserialize_metadata(metadata), filters)
+
+
+def load_dataset(job: DatasetJob, options: LoadOptions) -> Dataset:
+    return loader.load(job.sample_path,
+                       job.flat_path,
+                       job.dark_path,
+                       in_prefix=options.in_prefix,
+                       in_format=options.in_format,
+                       dtype=options.dtype)
+
+
+def free_dataset(dataset: Dataset):
+    for images in (dataset.sample, dataset.flat, dataset.dark):
+        if images is not None:
+            images.free_memory()
+
+
+def _share_images(images: Optional[Images]) -> Optional[Tuple[str, Any, Any, Dict[str, Any], bool]]:
+    """
+    Describes images loaded in a child process, so that the parent can attach to their shared memory,
+    which is kept after the child exits.
+    """
+    if images is None:
+        return None
+    name = images.memory_filename
+    if name is None:
+        # the memory of a copy is always named
+        name = images.copy().memory_filename
+    assert name is not None
+    return name, images.filenames, images.indices, images.metadata, images.is_sinograms
+
+
+def _attach_images(shared: Optional[Tuple[str, Any, Any, Dict[str, Any], bool]]) -> Optional[Images]:
+    if shared is None:
+        return None
+    name, filenames, indices, metadata, sinograms = shared
+    return Images(pu.attach_shared_array(name), filenames, indices, metadata, sinograms, memory_filename=name)
+
+
+def _delete_shared(names: Iterable[Optional[str]]):
+    for name in names:
+        if name is not None:
+            pu.delete_shared_array(name, silent_failure=True)
+
+
+def _exit_on_terminate(*_):
+    raise SystemExit(1)
+
+
+def _load_in_process(job: DatasetJob, options: LoadOptions, connection):
+    # BackgroundLoad.cancel terminates the child, which then deletes the shared memory it created
+    signal.signal(signal.SIGTERM, _exit_on_terminate)
+    created: List[str] = []
+    try:
+        with pu.track_shared_arrays(created):
+            start = time.perf_counter()
+            dataset = load_dataset(job, options)
+            shared = [_share_images(images) for images in (dataset.sample, dataset.flat, dataset.dark)]
+        connection.send((shared, time.perf_counter() - start, None))
+    except Exception as e:
+        # e.g. the flat images are missing, the sample images loaded before are never attached to
+        _delete_shared(created)
+        connection.send((None, 0.0, str(e)))
+    except BaseException:
+        # terminated before the dataset was sent
+        _delete_shared(created)
+        raise
+    finally:
+        connection.close()
+
+
+class BackgroundLoad:
+    """
+    Loads a dataset in a child process, while this process carries on.
+
+    The dataset is not loaded in a thread, as the filters fork their pools of worker processes while
+    it would run. A lock held by the thread at that moment, e.g. by logging or an image library,
+    stays locked forever in the forked workers, which then deadlock. The child process is started
+    between datasets, while no other thread is running, and loads the images into shared memory.
+    """
+    def __init__(self, job: DatasetJob, options: LoadOptions):
+        self._connection, child_connection = multiprocessing.Pipe(duplex=False)
+        self._process = multiprocessing.Process(target=_load_in_process,
+                                                args=(job, options, child_connection),
+                                                name='batch-load')
+        self._process.start()
+        child_connection.close()
+
+    def result(self) -> Tuple[Dataset, float]:
+        """
+        Waits for the dataset to be loaded.
+
+        :return: The dataset, and the seconds it took to load
+        :raises RuntimeError: If the dataset could not be loaded
+        """
+        try:
+            shared, load_seconds, error = self._connection.recv()
+        except EOFError:
+            self._process.join()
+            raise RuntimeError(f"The loading process exited with code {self._process.exitcode}")
+        finally:
+            self._connection.close()
+        self._process.join()
+        if error is not None:
+            raise RuntimeError(error)
+        sample, flat, dark = (_attach_images(images) for images in shared)
+        assert sample is not None
+        return Dataset(sample, flat, dark), load_seconds
+
+    def cancel(self):
+        """
+        Stops loading the dataset, and deletes its shared memory if it was already sent.
+        """
+        self._process.terminate()
+        self._process.join()
+        try:
+            if self._connection.poll():
+                shared, _, _ = self._connection.recv()
+                _delete_shared(images[0] if images is not None else None for images in shared or [])
+        except Exception:
+            # the child was terminated while sending the dataset, and has deleted its shared memory
+            LOG.debug("Could not receive the cancelled dataset", exc_info=True)
+        finally:
+            self._connection.close()
+
+
+def apply_step(step: RecipeStep, dataset: Dataset):
+    """
+    Applies a step of the recipe to the sample of the dataset, in slabs if the filter does not
+    fit in memory at once, and records it in the history of the sample.
+    """
+    images = dataset.sample
+    if step.filter_class is None:
+        swapped = images.copy(flip_axes=True)
+        swapped.record_operation(const.OPERATION_NAME_AXES_SWAP, display_name=step.display_name)
+        images.free_memory()
+        dataset.sample = swapped
+        return
+
+    kwargs = dict(step.kwargs)
+    parameters = inspect.signature(step.filter_class.filter_func).parameters
+    for name in DATASET_PARAMETERS:
+        if name in parameters and kwargs.get(name) is None:
+            kwargs[name] = getattr(dataset, name)
+            if kwargs[name] is None:
+                raise ValueError(f"{step.display_name} needs the {name} images of the dataset")
+
+    # the filters expect contiguous stacks, only cropping again keeps a deferred crop
+    if step.filter_class is not CropCoordinatesFilter:
+        images.compact()
+    slab_size = step.filter_class.check_memory(images.data.shape, images.dtype, **kwargs)
+    if slab_size is None:
+        step.filter_class.filter_func(images, **kwargs)
+    else:
+        apply_in_slabs(step.filter_class.filter_func, images, slab_size, **kwargs)
+    images.record_operation(step.name, step.display_name, **kwargs)
+
+
+def find_cors(images: Images, cor: Optional[float] = None, tilt: Optional[float] = None) -> List[ScalarCoR]:
+    """
+    The centre of rotation of every slice. Unless it is given it is taken from the COR/tilt
+    found for the dataset in the GUI, if any was recorded, and the middle of the images otherwise.
+
+    :param cor: The centre of rotation at the top of the images, in pixels
+    :param tilt: The tilt of the axis of rotation, in degrees
+    """
+    if cor is None or tilt is None:
+        found = next((op for op in reversed(images.metadata.get(const.OPERATION_HISTORY, []))
+                      if op[const.OPERATION_NAME] == const.OPERATION_NAME_COR_TILT_FINDING), None)
+        found_kwargs = found[const.OPERATION_KEYWORD_ARGS] if found is not None else {}
+        if cor is None:
+            cor = found_kwargs.get(const.COR_TILT_ROTATION_CENTRE, images.h_middle)
+        if tilt is None:
+            tilt = found_kwargs.get(const.COR_TILT_TILT_ANGLE_DEG, 0.0)
+
+    model = CorTiltDataModel()
+    model.set_precalculated(ScalarCoR(float(cor)), Degrees(float(tilt)))
+    return model.get_all_cors_from_regression(images.height)
+
+
+def reconstruct(images: Images,
+                recon_params: ReconstructionParameters,
+                cor: Optional[float] = None,
+                tilt: Optional[float] = None) -> Images:
+    # imported here as the reconstructors import astra and tomopy
+    from mantidimaging.core.reconstruct import get_reconstructor_for
+
+    cors = find_cors(images, cor, tilt)
+    # the parameters of the recipe are shared by all the datasets
+    recon_params = replace(recon_params, cor=cors[0], tilt=Degrees(float(tilt)) if tilt is not None else None)
+    return get_reconstructor_for(recon_params.algorithm).full(images, cors, recon_params)
+
+
+class BatchPipeline:
+    """
+    Processes a list of datasets with the same recipe, loading the next dataset while the
+    current one is processed.
+    """
+    def __init__(self,
+                 recipe: Recipe,
+                 load_options: Optional[LoadOptions] = None,
+                 save_options: Optional[SaveOptions] = None,
+                 reconstruct: bool = False,
+                 cor: Optional[float] = None,
+                 tilt: Optional[float] = None,
+                 prefetch: bool = True):
+        """
+        :param recipe: The steps applied to every dataset
+        :param reconstruct: Reconstruct the processed datasets with the parameters of the recipe,
+                            and save the volumes instead of the processed projections. The steps of
+                            the recipe recorded after the reconstruction are only applied to the volumes.
+        :param cor: The centre of rotation used for every dataset, see find_cors
+        :param tilt: The tilt used for every dataset, see find_cors
+        :param prefetch: Load the next dataset while processing the current one, when both fit in memory
+        """
+        if reconstruct and recipe.recon_params is None:
+            raise ValueError("The recipe does not contain reconstruction parameters")
+        self.recipe = recipe
+        self.load_options = load_options if load_options is not None else LoadOptions()
+        self.save_options = save_options if save_options is not None else SaveOptions()
+        self.reconstruct = reconstruct
+        self.cor = cor
+        self.tilt = tilt
+        self.prefetch = prefetch
+
+    def run(self, jobs: Sequence[DatasetJob]) -> List[JobResult]:
+        """
+        Processes every dataset, the failure of one dataset does not stop the others.
+        """
+        results = [JobResult(job) for job in jobs]
+        next_load: Optional[BackgroundLoad] = None
+        try:
+            for idx, result in enumerate(results):
+                load, next_load = next_load, None
+                try:
+                    if load is not None:
+                        dataset, result.load_seconds = load.result()
+                    else:
+                        start = time.perf_counter()
+                        dataset = load_dataset(result.job, self.load_options)
+                        result.load_seconds = time.perf_counter() - start
+                except Exception as e:
+                    LOG.exception(f"Could not load {result.job.sample_path}")
+                    result.error = f"Loading failed: {e}"
+                    continue
+
+                try:
+                    if idx + 1 < len(results) and self._can_prefetch(dataset):
+                        next_load = BackgroundLoad(results[idx + 1].job, self.load_options)
+                    start = time.perf_counter()
+                    result.saved = self.process(dataset, result.job.output_path)
+                    result.process_seconds = time.perf_counter() - start
+                    LOG.info(f"Processed {result.job.sample_path} in {result.process_seconds:.1f} s, "
+                             f"loading took {result.load_seconds:.1f} s")
+                except Exception as e:
+                    LOG.exception(f"Could not process {result.job.sample_path}")
+                    result.error = f"Processing failed: {e}"
+                finally:
+                    free_dataset(dataset)
+        finally:
+            if next_load is not None:
+                next_load.cancel()
+        return results
+
+    def _can_prefetch(self, dataset: Dataset) -> bool:
+        """
+        Assumes the next dataset is the same size as the current one, the datasets of a batch
+        usually are.
+        """
+        if not self.prefetch:
+            return False
+        loaded_bytes = sum(images.data.nbytes for images in (dataset.sample, dataset.flat, dataset.dark)
+                           if images is not None)
+        plan = plan_memory(dataset.sample.data.shape,
+                           dataset.sample.dtype,
+                           self.recipe.filter_steps,
+                           recon_params=self.recipe.recon_params if self.reconstruct else None,
+                           other_bytes=2 * loaded_bytes - dataset.sample.data.nbytes,
+                           loaded_bytes=loaded_bytes)
+        if not plan.fits:
+            LOG.info(f"Not loading the next dataset in the background, there is not enough memory. {plan.summary()}")
+        return plan.fits
+
+    def process(self, dataset: Dataset, output_path: str) -> str:
+        """
+        Applies the recipe to the dataset and saves the result.
+
+        :return: The directory the result was saved in
+        """
+        for step in self.recipe.steps:
+            LOG.info(f"Applying {step.display_name} to {dataset.sample.data.shape}")
+            apply_step(step, dataset)
+
+        output = dataset.sample
+        if self.reconstruct:
+            assert self.recipe.recon_params is not None
+            volume = Dataset(reconstruct(dataset.sample, self.recipe.recon_params, self.cor, self.tilt))
+            try:
+                for step in self.recipe.volume_steps:
+                    LOG.info(f"Applying {step.display_name} to the reconstructed volume")
+                    apply_step(step, volume)
+            except Exception:
+                volume.sample.free_memory()
+                raise
+            output = volume.sample
+        elif self.recipe.volume_steps:
+            LOG.info(f"Not applying the {len(self.recipe.volume_steps)} steps recorded after the reconstruction, "
+                     "the datasets are not reconstructed")
+        try:
+            saver.save(output,
+                       output_path,
+                       name_prefix=self.save_options.name_prefix,
+                       out_format=self.save_options.out_format,
+                       overwrite_all=self.save_options.overwrite_all)
+        finally:
+            if output is not dataset.sample:
+                output.free_memory()
+        return os.path.abspath(output_path)
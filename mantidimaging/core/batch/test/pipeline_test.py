@@ -0,0 +1,240 @@
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+import numpy as np
+import numpy.testing as npt
+
+import mantidimaging.test_helpers.unit_test_helper as th
+from mantidimaging.core.batch import pipeline
+from mantidimaging.core.batch.pipeline import (BackgroundLoad, BatchPipeline, DatasetJob, Recipe, RecipeStep, find_cors,
+                                               load_recipe, recipe_from_operations)
+from mantidimaging.core.data.dataset import Dataset
+from mantidimaging.core.io import loader, saver
+from mantidimaging.core.operation_history import const
+from mantidimaging.core.operation_history.operations import ImageOperation
+from mantidimaging.core.operations.crop_coords import CropCoordinatesFilter
+from mantidimaging.core.operations.minus_log import MinusLogFilter
+from mantidimaging.core.parallel import utility as pu
+from mantidimaging.core.utility.data_containers import ReconstructionParameters
+from mantidimaging.test_helpers import FileOutputtingTestCase
+
+FILTERS = [CropCoordinatesFilter, MinusLogFilter]
+ROI = [1, 2, 11, 10]
+
+
+def history(*operations):
+    return {const.OPERATION_HISTORY: [ImageOperation(*operation).serialize() for operation in operations]}
+
+
+class BatchPipelineTest(FileOutputtingTestCase):
+    def write_recipe(self, metadata):
+        path = os.path.join(self.output_directory, 'recipe.json')
+        with open(path, 'w') as f:
+            json.dump(metadata, f)
+        return path
+
+    def write_dataset(self, name, num_images=6):
+        images = th.generate_images((num_images, 12, 14))
+        images.data[:] = np.abs(images.data) + 0.1
+        path = os.path.join(self.output_directory, name)
+        saver.save(images, path)
+        return path, images.data.copy()
+
+    def test_recipe_from_operations(self):
+        operations = [
+            ImageOperation(CropCoordinatesFilter.__name__, [], {'region_of_interest': ROI}, "Crop"),
+            ImageOperation(const.OPERATION_NAME_COR_TILT_FINDING, [], {}, "Calculated COR/Tilt"),
+            ImageOperation(const.OPERATION_NAME_AXES_SWAP, [], {}, "Axes Swapped"),
+            ImageOperation('AstraRecon.full', [], {
+                'algorithm': 'FBP_CUDA',
+                'filter_name': 'ram-lak',
+                'num_iter': 1,
+                'cor': '10.0',
+                'tilt': 'None'
+            }, "Reconstruction"),
+            ImageOperation(MinusLogFilter.__name__, [], {'minus_log': True}, "Minus Log"),
+        ]
+        recipe = recipe_from_operations(operations, FILTERS)
+
+        crop, swap = recipe.steps
+        self.assertIs(crop.filter_class, CropCoordinatesFilter)
+        self.assertEqual(crop.kwargs, {'region_of_interest': ROI})
+        self.assertIsNone(swap.filter_class)
+        self.assertEqual(recipe.filter_steps, [(CropCoordinatesFilter, {'region_of_interest': ROI})])
+        self.assertEqual((recipe.recon_params.algorithm, recipe.recon_params.filter_name), ('FBP_CUDA', 'ram-lak'))
+        # the steps after the reconstruction are applied to the volume
+        self.assertEqual([step.filter_class for step in recipe.volume_steps], [MinusLogFilter])
+
+        self.assertRaises(KeyError, recipe_from_operations, [ImageOperation("Unknown", [], {}, "")], FILTERS)
+
+    def test_load_recipe_without_history(self):
+        self.assertRaises(ValueError, load_recipe, self.write_recipe({}), FILTERS)
+
+    def test_run(self):
+        crop = (CropCoordinatesFilter.__name__, [], {'region_of_interest': ROI}, "Crop")
+        minus_log = (MinusLogFilter.__name__, [], {'minus_log': True}, "Minus Log")
+        recipe = load_recipe(self.write_recipe(history(crop, minus_log)), FILTERS)
+        names = ('first', 'second')
+        inputs = [self.write_dataset(name) for name in names]
+        outputs = [os.path.join(self.output_directory, 'out', name) for name in names]
+        jobs = [DatasetJob(path, output) for (path, _), output in zip(inputs, outputs)]
+
+        results = BatchPipeline(recipe).run(jobs)
+
+        for result, (_, data) in zip(results, inputs):
+            self.assertTrue(result.succeeded, result.error)
+            dataset = loader.load(result.saved)
+            expected = -np.log(data[:, 2:10, 1:11])
+            npt.assert_allclose(dataset.sample.data, expected, rtol=1e-6)
+            names = [op[const.OPERATION_NAME] for op in dataset.sample.metadata[const.OPERATION_HISTORY]]
+            self.assertEqual(names, [CropCoordinatesFilter.__name__, MinusLogFilter.__name__])
+            dataset.sample.free_memory()
+
+    def test_run_on_several_cores(self):
+        recipe = Recipe([RecipeStep(MinusLogFilter.__name__, "Minus Log", {'minus_log': True}, MinusLogFilter)])
+        inputs = [self.write_dataset(str(idx), num_images=24) for idx in range(3)]
+        outputs = [os.path.join(self.output_directory, 'out', str(idx)) for idx in range(len(inputs))]
+        jobs = [DatasetJob(path, output) for (path, _), output in zip(inputs, outputs)]
+
+        # the filters fork their pools of workers while the next dataset is loaded
+        with mock.patch.object(pu, 'get_cores', return_value=4):
+            results = BatchPipeline(recipe).run(jobs)
+
+        for result, (_, data) in zip(results, inputs):
+            self.assertTrue(result.succeeded, result.error)
+            dataset = loader.load(result.saved)
+            npt.assert_allclose(dataset.sample.data, -np.log(data), rtol=1e-6)
+            dataset.sample.free_memory()
+
+    def test_next_dataset_is_loaded_while_processing(self):
+        jobs = [DatasetJob(str(idx), str(idx)) for idx in range(3)]
+        # the datasets after the first are loaded by child processes
+        loading = [multiprocessing.Event() for _ in jobs]
+
+        def load(job, _):
+            loading[int(job.sample_path)].set()
+            return Dataset(th.generate_images((2, 3, 4), automatic_free=False))
+
+        def process(dataset, output_path):
+            idx = int(output_path)
+            if idx + 1 < len(jobs):
+                self.assertTrue(loading[idx + 1].wait(10), "The next dataset was not loaded in the background")
+            return output_path
+
+        batch = BatchPipeline(Recipe([]))
+        with mock.patch.object(pipeline, 'load_dataset', side_effect=load), \
+                mock.patch.object(batch, 'process', side_effect=process):
+            results = batch.run(jobs)
+
+        self.assertTrue(all(result.succeeded for result in results), [result.error for result in results])
+
+    def test_failed_dataset_does_not_stop_the_others(self):
+        jobs = [DatasetJob(str(idx), str(idx)) for idx in range(3)]
+
+        def load(job, _):
+            if job.sample_path == '1':
+                raise RuntimeError("Missing files")
+            return Dataset(th.generate_images((2, 3, 4), automatic_free=False))
+
+        for prefetch in (False, True):
+            batch = BatchPipeline(Recipe([]), prefetch=prefetch)
+            with mock.patch.object(pipeline, 'load_dataset', side_effect=load), \
+                    mock.patch.object(batch, 'process', side_effect=lambda _, output_path: output_path):
+                results = batch.run(jobs)
+
+            self.assertEqual([result.succeeded for result in results], [True, False, True])
+            self.assertIn("Missing files", results[1].error)
+
+    def test_failed_load_deletes_shared_memory(self):
+        created = []
+
+        def load(*_):
+            # the sample is loaded, but the flat images are missing
+            created.append(th.generate_images((2, 3, 4), automatic_free=False).memory_filename)
+            raise RuntimeError("Missing flat images")
+
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        with mock.patch.object(pipeline, 'load_dataset', side_effect=load):
+            pipeline._load_in_process(DatasetJob('sample', 'output'), pipeline.LoadOptions(), sender)
+
+        shared, _, error = receiver.recv()
+        self.assertIsNone(shared)
+        self.assertIn("Missing flat images", error)
+        self.assertRaises(FileNotFoundError, pu.attach_shared_array, created[0])
+
+    def test_cancel_deletes_sent_shared_memory(self):
+        loaded = multiprocessing.Event()
+
+        def load(*_):
+            loaded.set()
+            return Dataset(th.generate_images((2, 3, 4), automatic_free=False))
+
+        with mock.patch.object(pipeline, 'load_dataset', side_effect=load):
+            background_load = BackgroundLoad(DatasetJob('sample', 'output'), pipeline.LoadOptions())
+        self.assertTrue(loaded.wait(10))
+        # the dataset is sent before the child exits
+        background_load._process.join(10)
+        self.assertTrue(background_load._connection.poll())
+        with mock.patch.object(pu, 'delete_shared_array', wraps=pu.delete_shared_array) as delete_shared_array:
+            background_load.cancel()
+
+        name = delete_shared_array.call_args[0][0]
+        self.assertRaises(FileNotFoundError, pu.attach_shared_array, name)
+
+    def test_volume_steps_are_applied_after_reconstructing(self):
+        recipe = Recipe([], ReconstructionParameters('FBP_CUDA', 'ram-lak'),
+                        [RecipeStep(MinusLogFilter.__name__, "Minus Log", {'minus_log': True}, MinusLogFilter)])
+        path, data = self.write_dataset('dataset')
+        volume = th.generate_images((4, 6, 6), automatic_free=False)
+        volume.data[:] = np.abs(volume.data) + 0.1
+        expected_volume = -np.log(volume.data)
+
+        for reconstruct, expected in ((True, expected_volume), (False, data)):
+            output_path = os.path.join(self.output_directory, str(reconstruct))
+            dataset = loader.load(path)
+            with mock.patch.object(pipeline, 'reconstruct', return_value=volume) as mock_reconstruct:
+                BatchPipeline(recipe, reconstruct=reconstruct).process(dataset, output_path)
+            dataset.sample.free_memory()
+
+            self.assertEqual(mock_reconstruct.called, reconstruct)
+            saved = loader.load(output_path)
+            npt.assert_allclose(saved.sample.data, expected, rtol=1e-6)
+            saved.sample.free_memory()
+
+    def test_reconstruct_needs_parameters(self):
+        self.assertRaises(ValueError, BatchPipeline, Recipe([]), reconstruct=True)
+
+    def test_find_cors(self):
+        images = th.generate_images((4, 10, 8))
+        self.assertEqual([cor.value for cor in find_cors(images)], [4.0] * 10)
+
+        images.record_operation(const.OPERATION_NAME_COR_TILT_FINDING, "Calculated COR/Tilt", **{
+            const.COR_TILT_ROTATION_CENTRE: 3.0,
+            const.COR_TILT_TILT_ANGLE_DEG: 0.0
+        })
+        self.assertEqual([cor.value for cor in find_cors(images)], [3.0] * 10)
+        self.assertEqual([cor.value for cor in find_cors(images, cor=5.0)], [5.0] * 10)
+
+    def test_does_not_import_qt(self):
+        code = ("import sys\n"
+                "from mantidimaging import batch\n"
+                "from mantidimaging.core.batch import pipeline\n"
+                "import importlib\n"
+                "from mantidimaging.core.utility.registrator import get_package_children\n"
+                "for package in get_package_children('mantidimaging.core.operations', packages=True):\n"
+                "    try:\n"
+                "        importlib.import_module(package.name)\n"
+                "    except ImportError:\n"
+                "        pass  # an optional dependency of the filter is not installed\n"
+                "print([name for name in sys.modules if name.startswith(('PyQt5', 'mantidimaging.gui'))])\n")
+        output = subprocess.run([sys.executable, '-c', code], check=True, stdout=subprocess.PIPE, text=True).stdout
+        self.assertEqual(output.strip(), "[]")
+
+
+if __name__ == '__main__':
+    unittest.main()
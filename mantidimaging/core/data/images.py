@@ -41,6 +41,8 @@ class Images:
         self._is_sinograms = sinograms
 
         self.memory_filename = memory_filename
+        # region of the memory that the data is a view of, after a deferred crop
+        self._deferred_crop: Optional[SensibleROI] = None
         self._proj180deg: Optional[Images] = None
         self._log_file: Optional[IMATLogFile] = None
 
@@ -157,6 +159,42 @@ class Images:
         mark_cropped(images, roi)
         return images
 
+    def crop_view(self, roi: SensibleROI):
+        """
+        Crops the images to a view of the same memory, without copying the data. The memory
+        of the uncropped images is kept until the crop is compacted, see compact.
+
+        :param roi: The region of the current images that is kept
+        """
+        self._data = self._data[:, roi.top:roi.bottom, roi.left:roi.right]
+        left, top = (self._deferred_crop.left, self._deferred_crop.top) if self._deferred_crop else (0, 0)
+        self._deferred_crop = SensibleROI(left + roi.left, top + roi.top, left + roi.right, top + roi.bottom)
+
+    @property
+    def deferred_crop(self) -> Optional[SensibleROI]:
+        """
+        :return: The region of the uncropped memory that the data is a view of,
+                 or None if the data is not a cropped view
+        """
+        return self._deferred_crop
+
+    def compact(self):
+        """
+        Copies the data of a deferred crop into its own contiguous memory, under the same
+        memory file name, and releases the memory of the uncropped images.
+        Does nothing if there is no deferred crop.
+        """
+        if self._deferred_crop is None:
+            return
+
+        view = self._data
+        if self.memory_filename is not None:
+            # the view keeps the old memory mapped until the copy is done
+            pu.delete_shared_array(self.memory_filename)
+        compacted = pu.create_array(view.shape, view.dtype, self.memory_filename)
+        compacted[:] = view
+        self.data = compacted
+
     def index_as_images(self, index) -> 'Images':
         return Images(np.asarray([self.data[index]]), metadata=deepcopy(self.metadata), sinograms=self.is_sinograms)
 
@@ -246,6 +284,7 @@ class Images:
     @data.setter
     def data(self, other: np.ndarray):
         self._data = other
+        self._deferred_crop = None
 
     @property
     def dtype(self):
@@ -118,6 +118,27 @@ class ImagesTest(unittest.TestCase):
         self.assertNotEqual(images.memory_filename, cropped_copy.memory_filename)
         self.assertNotEqual(images, cropped_copy)
 
+    def test_crop_view_and_compact(self):
+        images = generate_images(automatic_free=False)
+        original = np.copy(images.data)
+        memory_filename = images.memory_filename
+
+        images.crop_view(SensibleROI(1, 2, 7, 6))
+        images.crop_view(SensibleROI(1, 1, 4, 3))
+
+        self.assertEqual(images.deferred_crop, SensibleROI(2, 3, 5, 5))
+        # the view shares the memory of the uncropped images
+        self.assertFalse(images.data.flags.c_contiguous)
+        np.testing.assert_equal(images.data, original[:, 3:5, 2:5])
+
+        images.compact()
+
+        self.assertIsNone(images.deferred_crop)
+        self.assertTrue(images.data.flags.c_contiguous)
+        self.assertEqual(images.memory_filename, memory_filename)
+        np.testing.assert_equal(images.data, original[:, 3:5, 2:5])
+        images.free_memory()
+
     def test_filenames_set(self):
         images = generate_images()
         with self.assertRaises(AssertionError):
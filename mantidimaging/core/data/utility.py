@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
 
 from mantidimaging.core.utility.sensible_roi import SensibleROI
 
@@ -11,3 +11,23 @@ def mark_cropped(images: 'Images', roi: SensibleROI):
     from mantidimaging.core.operations.crop_coords import CropCoordinatesFilter
     # not ideal.. but it will allow to replicate the result accurately
     images.record_operation(CropCoordinatesFilter.__name__, CropCoordinatesFilter.filter_name, region_of_interest=roi)
+
+
+def apply_in_slabs(func: Callable, images: 'Images', slab_size: int, **kwargs):
+    """
+    Applies a filter to slabs of images of the stack one after the other, so that the copies
+    the filter makes are only ever the size of a slab.
+
+    :param func: The filter, called with each slab as Images and the kwargs
+    :param images: The stack, which is modified in place
+    :param slab_size: The number of images in each slab
+    """
+    # avoids circular import error
+    from mantidimaging.core.data import Images
+
+    for start in range(0, images.num_images, slab_size):
+        slab_data = images.data[start:start + slab_size]
+        slab = Images(slab_data, sinograms=images.is_sinograms)
+        func(slab, **kwargs)
+        if slab.data is not slab_data:
+            slab_data[:] = slab.data
@@ -0,0 +1,347 @@
+"""
+Chunked directory store for stacks, laid out as a Zarr (version 2) array.
+
+The stack is split into chunks of (projections x rows x full width), each stored in its
+own file inside the store directory, next to a `.zarray` JSON file describing the
+shape, dtype, chunking and compression. Reading a range of projections, or a slab of
+sinograms (a range of rows across all projections), only reads and decodes the chunks
+that overlap it.
+
+Chunks are read and written by a pool of threads. The store can be written
+incrementally, a slab of projections at a time, so it can also be used as an on-disk
+cache of a stack that is being processed.
+
+Because the layout follows the Zarr format, the stores can also be opened with the
+zarr package, although it is not needed here.
+"""
+import json
+import os
+import shutil
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from mantidimaging.core.data import Images
+from mantidimaging.core.io.throughput import ThroughputStats
+from mantidimaging.core.parallel import utility as pu
+from mantidimaging.core.utility.progress_reporting import Progress
+
+LOG = getLogger(__name__)
+
+CHUNKED_STORE_FORMAT = 'zarr'
+CHUNKED_STORE_EXTENSION = 'zarr'
+ARRAY_METADATA_FILE = '.zarray'
+
+COMPRESSION_ZLIB = 'zlib'
+SUPPORTED_COMPRESSION = (None, COMPRESSION_ZLIB)
+DEFAULT_COMPRESSION_LEVEL = 4
+
+DEFAULT_CHUNK_IMAGES = 8
+DEFAULT_CHUNK_ROWS = 64
+DEFAULT_IO_WORKERS = 4
+
+
+def _chunk_ranges(length: int, chunk_size: int, start: int = 0, stop: Optional[int] = None) -> Iterator[int]:
+    """
+    :return: The indices of the chunks that overlap [start, stop)
+    """
+    stop = length if stop is None else stop
+    if stop <= start:
+        return iter(())
+    return iter(range(start // chunk_size, (stop - 1) // chunk_size + 1))
+
+
+class ChunkedStore(object):
+    """
+    A stack stored as a directory of (projections x rows x full width) chunks.
+
+    Use `ChunkedStore.create` for a new store, or the constructor to open an existing one.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, ARRAY_METADATA_FILE)) as f:
+            meta = json.load(f)
+
+        if meta.get('zarr_format') != 2 or meta.get('order', 'C') != 'C' or meta.get('filters'):
+            raise ValueError(f"{path} is not a chunked store that can be read, only C ordered Zarr version 2 "
+                             f"arrays without filters are supported")
+        if len(meta['shape']) != 3 or meta['chunks'][2] != meta['shape'][2]:
+            raise ValueError(f"{path} does not contain a stack chunked across whole image rows")
+
+        self.shape: Tuple[int, int, int] = tuple(meta['shape'])  # type: ignore
+        self.chunks: Tuple[int, int, int] = tuple(meta['chunks'])  # type: ignore
+        self.dtype = np.dtype(meta['dtype'])
+        self.fill_value = meta.get('fill_value') or 0
+
+        compressor = meta.get('compressor')
+        if compressor is None:
+            self.compression: Optional[str] = None
+            self.compression_level = DEFAULT_COMPRESSION_LEVEL
+        elif compressor.get('id') == COMPRESSION_ZLIB:
+            self.compression = COMPRESSION_ZLIB
+            self.compression_level = compressor.get('level', DEFAULT_COMPRESSION_LEVEL)
+        else:
+            raise ValueError(f"Unsupported compressor {compressor} of chunked store {path}")
+
+    @staticmethod
+    def create(path: str,
+               shape: Tuple[int, int, int],
+               dtype,
+               chunk_images: int = DEFAULT_CHUNK_IMAGES,
+               chunk_rows: int = DEFAULT_CHUNK_ROWS,
+               compression: Optional[str] = None,
+               compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+               overwrite: bool = False) -> 'ChunkedStore':
+        """
+        Creates a new, empty store. Chunks that are never written read back as zeros.
+
+        :param path: Directory of the store
+        :param shape: Shape of the stack (projections, rows, columns)
+        :param dtype: Data type of the stack
+        :param chunk_images: Number of projections in each chunk
+        :param chunk_rows: Number of rows in each chunk
+        :param compression: None or 'zlib'
+        :param compression_level: The zlib compression level
+        :param overwrite: Replace an existing store at the path
+        """
+        if compression not in SUPPORTED_COMPRESSION:
+            raise ValueError(f"Unsupported compression '{compression}', expected one of {SUPPORTED_COMPRESSION}")
+
+        if os.path.exists(path):
+            if not overwrite:
+                raise RuntimeError(
+                    "The chunked store {0} already exists. Please specify overwrite to replace it.".format(path))
+            shutil.rmtree(path)
+        os.makedirs(path)
+
+        chunks = [max(1, min(chunk_images, shape[0])), max(1, min(chunk_rows, shape[1])), shape[2]]
+        meta: Dict[str, Any] = {
+            'zarr_format': 2,
+            'shape': list(shape),
+            'chunks': chunks,
+            'dtype': np.dtype(dtype).str,
+            'compressor': {
+                'id': compression,
+                'level': compression_level
+            } if compression else None,
+            'fill_value': 0,
+            'order': 'C',
+            'filters': None,
+        }
+        with open(os.path.join(path, ARRAY_METADATA_FILE), 'w') as f:
+            json.dump(meta, f, indent=4)
+
+        return ChunkedStore(path)
+
+    @property
+    def num_chunks(self) -> Tuple[int, int]:
+        """
+        :return: Number of chunks along the projections and along the rows
+        """
+        return -(-self.shape[0] // self.chunks[0]), -(-self.shape[1] // self.chunks[1])
+
+    def _chunk_filename(self, image_chunk: int, row_chunk: int) -> str:
+        return os.path.join(self.path, f"{image_chunk}.{row_chunk}.0")
+
+    def _read_chunk(self, image_chunk: int, row_chunk: int, stats: Optional[ThroughputStats]) -> np.ndarray:
+        filename = self._chunk_filename(image_chunk, row_chunk)
+        time_start = time.perf_counter()
+        try:
+            with open(filename, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return np.full(self.chunks, self.fill_value, dtype=self.dtype)
+
+        if self.compression == COMPRESSION_ZLIB:
+            raw = zlib.decompress(raw)
+        chunk = np.frombuffer(raw, dtype=self.dtype).reshape(self.chunks)
+        if stats is not None:
+            stats.add_file(filename, os.path.getsize(filename), time.perf_counter() - time_start)
+        return chunk
+
+    def _write_chunk(self, image_chunk: int, row_chunk: int, chunk: np.ndarray, stats: Optional[ThroughputStats]):
+        filename = self._chunk_filename(image_chunk, row_chunk)
+        time_start = time.perf_counter()
+        if chunk.shape != self.chunks:
+            # edge chunks are always stored with the full chunk shape, the padding is never read back
+            padded = np.full(self.chunks, self.fill_value, dtype=self.dtype)
+            padded[:chunk.shape[0], :chunk.shape[1]] = chunk
+            chunk = padded
+        raw = np.ascontiguousarray(chunk, dtype=self.dtype).tobytes()
+        if self.compression == COMPRESSION_ZLIB:
+            raw = zlib.compress(raw, self.compression_level)
+        with open(filename, 'wb') as f:
+            f.write(raw)
+        if stats is not None:
+            stats.add_file(filename, len(raw), time.perf_counter() - time_start)
+
+    def write(self,
+              data: np.ndarray,
+              image_start: int = 0,
+              num_workers: int = DEFAULT_IO_WORKERS,
+              progress: Optional[Progress] = None,
+              stats: Optional[ThroughputStats] = None):
+        """
+        Writes a slab of whole projections into the store.
+
+        :param data: The projections that will be written
+        :param image_start: Index of the first projection of the slab in the stack. It must be
+                            at the start of a chunk, and unless the slab reaches the end of the
+                            stack, the slab must end at the end of a chunk.
+        :param num_workers: Number of threads encoding and writing chunks concurrently
+        :param progress: Progress instance, updated once per written row of chunks
+        :param stats: Optional throughput statistics, updated with every written chunk
+        """
+        image_stop = image_start + data.shape[0]
+        chunk_images, chunk_rows, _ = self.chunks
+        if data.shape[1:] != self.shape[1:] or image_stop > self.shape[0]:
+            raise ValueError(f"Projections {image_start} to {image_stop} with the shape {data.shape[1:]} "
+                             f"do not fit in the stack of shape {self.shape}")
+        if image_start % chunk_images != 0 or (image_stop % chunk_images != 0 and image_stop != self.shape[0]):
+            raise ValueError(f"Projections {image_start} to {image_stop} are not aligned "
+                             f"to the chunks of {chunk_images} projections")
+
+        def write_row_of_chunks(image_chunk):
+            offset = image_chunk * chunk_images - image_start
+            for row_chunk in range(self.num_chunks[1]):
+                row_start = row_chunk * chunk_rows
+                chunk = data[offset:offset + chunk_images, row_start:row_start + chunk_rows]
+                self._write_chunk(image_chunk, row_chunk, chunk, stats)
+
+        image_chunks = list(_chunk_ranges(self.shape[0], chunk_images, image_start, image_stop))
+        with ThreadPoolExecutor(max_workers=max(1, num_workers)) as pool:
+            for _ in pool.map(write_row_of_chunks, image_chunks):
+                if progress:
+                    progress.update(msg='Chunk')
+
+    def read(self,
+             images: slice = slice(None),
+             rows: slice = slice(None),
+             out: Optional[np.ndarray] = None,
+             sinograms: bool = False,
+             num_workers: int = DEFAULT_IO_WORKERS,
+             progress: Optional[Progress] = None,
+             stats: Optional[ThroughputStats] = None) -> np.ndarray:
+        """
+        Reads a region of the stack, touching only the chunks that overlap it.
+
+        :param images: The projections that are read, a step is allowed
+        :param rows: The rows that are read, a step is not allowed
+        :param out: Optional array the region is written into
+        :param sinograms: Return the region as sinograms, with the axes (rows, projections, columns)
+        :param num_workers: Number of threads reading and decoding chunks concurrently
+        :param progress: Progress instance, updated once per read chunk
+        :param stats: Optional throughput statistics, updated with every read chunk
+        :return: The region of the stack
+        """
+        image_indices = np.arange(self.shape[0])[images]
+        row_start, row_stop, row_step = rows.indices(self.shape[1])
+        if row_step != 1:
+            raise ValueError("Reading rows with a step is not supported")
+        row_stop = max(row_start, row_stop)
+
+        region_shape = (len(image_indices), row_stop - row_start, self.shape[2])
+        expected_shape = (region_shape[1], region_shape[0], region_shape[2]) if sinograms else region_shape
+        if out is None:
+            out = np.empty(expected_shape, dtype=self.dtype)
+        elif out.shape != expected_shape:
+            raise ValueError(f"The output array has the shape {out.shape}, expected {expected_shape}")
+        # every chunk is copied into the region with the axes of the stack
+        region = np.swapaxes(out, 0, 1) if sinograms else out
+
+        chunk_images, chunk_rows, _ = self.chunks
+        # group the selected projections by the chunk that contains them
+        selected_by_chunk: Dict[int, List[int]] = {}
+        for out_idx, image_idx in enumerate(image_indices):
+            selected_by_chunk.setdefault(int(image_idx) // chunk_images, []).append(out_idx)
+
+        tasks = [(image_chunk, row_chunk) for image_chunk in selected_by_chunk
+                 for row_chunk in _chunk_ranges(self.shape[1], chunk_rows, row_start, row_stop)]
+
+        def read_one(task):
+            image_chunk, row_chunk = task
+            chunk = self._read_chunk(image_chunk, row_chunk, stats)
+            out_indices = selected_by_chunk[image_chunk]
+            in_chunk_indices = image_indices[out_indices] - image_chunk * chunk_images
+
+            chunk_row_start = row_chunk * chunk_rows
+            first_row = max(row_start, chunk_row_start)
+            last_row = min(row_stop, chunk_row_start + chunk_rows)
+            region[out_indices[0]:out_indices[-1] + 1, first_row - row_start:last_row - row_start] = \
+                chunk[in_chunk_indices, first_row - chunk_row_start:last_row - chunk_row_start]
+
+        with ThreadPoolExecutor(max_workers=max(1, num_workers)) as pool:
+            for _ in pool.map(read_one, tasks):
+                if progress:
+                    progress.update(msg='Chunk')
+
+        return out
+
+
+def write_chunked_store(data: np.ndarray,
+                        path: str,
+                        chunk_images: int = DEFAULT_CHUNK_IMAGES,
+                        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                        compression: Optional[str] = None,
+                        compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+                        overwrite: bool = False,
+                        num_workers: int = DEFAULT_IO_WORKERS,
+                        progress: Optional[Progress] = None,
+                        stats: Optional[ThroughputStats] = None) -> ChunkedStore:
+    """
+    Writes the whole stack into a new chunked store, see ChunkedStore.create for the parameters.
+    """
+    num_images, height, width = data.shape
+    store = ChunkedStore.create(path, (num_images, height, width), data.dtype, chunk_images, chunk_rows, compression,
+                                compression_level, overwrite)
+    progress = Progress.ensure_instance(progress, num_steps=store.num_chunks[0], task_name='Save chunked store')
+    with progress:
+        store.write(data, num_workers=num_workers, progress=progress, stats=stats)
+    return store
+
+
+def load_chunked_store(path: str,
+                       dtype=np.float32,
+                       indices=None,
+                       rows: Optional[Tuple[int, int]] = None,
+                       sinograms: bool = False,
+                       num_workers: int = DEFAULT_IO_WORKERS,
+                       progress: Optional[Progress] = None,
+                       stats: Optional[ThroughputStats] = None) -> Images:
+    """
+    Loads a region of a chunked store into a shared memory stack.
+
+    :param path: Directory of the store
+    :param dtype: Data type of the loaded stack
+    :param indices: Optional [start, stop, step] of the projections that are loaded
+    :param rows: Optional (start, stop) of the rows that are loaded
+    :param sinograms: Load the region as sinograms
+    :param num_workers: Number of threads reading chunks concurrently
+    :param progress: Progress instance, updated once per read chunk
+    :param stats: Optional throughput statistics, updated with every read chunk
+    :return: The loaded stack
+    """
+    store = ChunkedStore(path)
+    images = slice(*indices) if indices else slice(None)
+    row_slice = slice(*rows) if rows else slice(None)
+
+    num_images = len(range(*images.indices(store.shape[0])))
+    row_start, row_stop, _ = row_slice.indices(store.shape[1])
+    num_rows = max(0, row_stop - row_start)
+    shape = (num_rows, num_images, store.shape[2]) if sinograms else (num_images, num_rows, store.shape[2])
+
+    memory_file_name = pu.create_shared_name(os.path.basename(os.path.normpath(path)))
+    data = pu.create_array(shape, dtype, memory_file_name)
+
+    progress = Progress.ensure_instance(progress, task_name='Load chunked store')
+    with progress:
+        if data.dtype == store.dtype:
+            store.read(images, row_slice, data, sinograms, num_workers, progress, stats)
+        else:
+            data[:] = store.read(images, row_slice, None, sinograms, num_workers, progress, stats)
+
+    return Images(data, [path], indices, sinograms=sinograms, memory_filename=memory_file_name)
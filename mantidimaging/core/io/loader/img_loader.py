@@ -2,11 +2,13 @@
 This module handles the loading of FIT, FITS, TIF, TIFF
 """
 import os
+import time
 from typing import Tuple, Optional, List
 
 import numpy as np
 
 from mantidimaging.core.data import Images
+from mantidimaging.core.io.throughput import ThroughputStats
 from mantidimaging.core.io.utility import get_file_names, get_prefix
 from mantidimaging.core.parallel import utility as pu
 from mantidimaging.core.utility.progress_reporting import Progress
@@ -14,7 +16,15 @@ from . import stack_loader
 from ...data.dataset import Dataset
 
 
-def execute(load_func, sample_path, flat_path, dark_path, img_format, dtype, indices, progress=None) -> Dataset:
+def execute(load_func,
+            sample_path,
+            flat_path,
+            dark_path,
+            img_format,
+            dtype,
+            indices,
+            progress=None,
+            stats: Optional[ThroughputStats] = None) -> Dataset:
     """
     Reads a stack of images into memory, assuming dark and flat images
     are in separate directories.
@@ -30,6 +40,8 @@ def execute(load_func, sample_path, flat_path, dark_path, img_format, dtype, ind
         '>f2' - float16
         '>f4' - float32
 
+    :param stats: Optional throughput statistics, updated with the timings of every loaded file
+
     :returns: Images object
     """
 
@@ -47,7 +59,7 @@ def execute(load_func, sample_path, flat_path, dark_path, img_format, dtype, ind
     img_shape = first_sample_img.shape
 
     # forward all arguments to internal class for easy re-usage
-    il = ImageLoader(load_func, img_format, img_shape, dtype, indices, progress)
+    il = ImageLoader(load_func, img_format, img_shape, dtype, indices, progress, stats)
 
     # we load the flat and dark first, because if they fail we don't want to
     # fail after we've loaded a big stack into memory
@@ -61,13 +73,14 @@ def execute(load_func, sample_path, flat_path, dark_path, img_format, dtype, ind
 
 
 class ImageLoader(object):
-    def __init__(self, load_func, img_format, img_shape, data_dtype, indices, progress=None):
+    def __init__(self, load_func, img_format, img_shape, data_dtype, indices, progress=None, stats=None):
         self.load_func = load_func
         self.img_format = img_format
         self.img_shape = img_shape
         self.data_dtype = data_dtype
         self.indices = indices
         self.progress = progress
+        self.stats = stats if stats is not None else ThroughputStats('Load')
 
     def load_sample_data(self, input_file_names):
         # determine what the loaded data was
@@ -101,7 +114,12 @@ class ImageLoader(object):
         with progress:
             for idx, in_file in enumerate(files):
                 try:
-                    data[idx, :] = self.load_func(in_file)
+                    time_start = time.perf_counter()
+                    img = self.load_func(in_file)
+                    time_decoded = time.perf_counter()
+                    data[idx, :] = img
+                    self.stats.add_file(in_file, os.path.getsize(in_file), time_decoded - time_start,
+                                        time.perf_counter() - time_decoded)
                     progress.update(msg='Image')
                 except ValueError as exc:
                     raise ValueError("An image has different width and/or height "
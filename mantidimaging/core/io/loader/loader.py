@@ -1,3 +1,4 @@
+import os
 from logging import getLogger
 from typing import Tuple
 
@@ -5,7 +6,9 @@ import numpy as np
 
 from mantidimaging.core.data import Images
 from mantidimaging.core.data.dataset import Dataset
+from mantidimaging.core.io import chunked_store, tiff_stack
 from mantidimaging.core.io.loader import img_loader
+from mantidimaging.core.io.throughput import ThroughputStats
 from mantidimaging.core.io.utility import (DEFAULT_IO_FILE_FORMAT, get_file_names)
 from mantidimaging.core.utility.data_containers import ImageParameters
 from mantidimaging.core.utility.imat_log_file_parser import IMATLogFile
@@ -63,10 +66,18 @@ def supported_formats():
     except ImportError:
         fits_available = False
 
+    try:
+        import tifffile  # noqa: F401
+        tifffile_available = True
+    except ImportError:
+        tifffile_available = False
+
     avail_list = \
         (['nxs'] if h5nxs_available else []) + \
         (['fits', 'fit'] if fits_available else []) + \
-        (['tif', 'tiff', 'png', 'jpg'] if skio_available else [])
+        (['tif', 'tiff', 'png', 'jpg'] if skio_available else []) + \
+        ([tiff_stack.TIFF_STACK_FORMAT] if tifffile_available else []) + \
+        [chunked_store.CHUNKED_STORE_FORMAT]
 
     return avail_list
 
@@ -75,7 +86,13 @@ def read_in_shape(input_path,
                   in_prefix='',
                   in_format=DEFAULT_IO_FILE_FORMAT,
                   data_dtype=np.float32) -> Tuple[Tuple[int, int, int], bool]:
-    input_file_names = get_file_names(input_path, in_format, in_prefix)
+    input_file_names = _find_input_files(input_path, in_format, in_prefix)
+    if _is_tiff_stack(input_file_names, in_format):
+        with tiff_stack.TiffStackReader(input_file_names[0]) as reader:
+            return reader.shape, False
+    if in_format == chunked_store.CHUNKED_STORE_FORMAT:
+        return chunked_store.ChunkedStore(input_file_names[0]).shape, False
+
     dataset = load(input_path,
                    in_prefix=in_prefix,
                    in_format=in_format,
@@ -99,6 +116,24 @@ def load_log(log_file) -> IMATLogFile:
     return IMATLogFile(data)
 
 
+def _find_input_files(input_path, in_format: str, in_prefix: str):
+    if in_format == chunked_store.CHUNKED_STORE_FORMAT and str(input_path).endswith(
+            chunked_store.CHUNKED_STORE_EXTENSION):
+        # the path of the store itself was given
+        return [input_path]
+    extension = tiff_stack.TIFF_STACK_EXTENSION if in_format == tiff_stack.TIFF_STACK_FORMAT else in_format
+    return get_file_names(input_path, extension, in_prefix)
+
+
+def _is_tiff_stack(file_names, in_format: str) -> bool:
+    """
+    A single multi-page TIFF file is loaded as a whole stack, even if it was not requested explicitly
+    """
+    if in_format == tiff_stack.TIFF_STACK_FORMAT:
+        return True
+    return in_format in ['tif', 'tiff'] and len(file_names) == 1 and tiff_stack.is_tiff_stack(file_names[0])
+
+
 def load_p(parameters: ImageParameters, dtype, progress) -> Images:
     return load(input_path=parameters.input_path,
                 in_prefix=parameters.prefix,
@@ -125,7 +160,11 @@ def load(input_path=None,
     :param input_path_flat: Optional: Path for the input Flat images folder
     :param input_path_dark: Optional: Path for the input Dark images folder
     :param in_prefix: Optional: Prefix for loaded files
-    :param in_format: Default:'tiff', format for the input images
+    :param in_format: Default:'tiff', format for the input images. A single multi-page
+                      TIFF file, or the 'tiffstack' format, is loaded as a whole stack,
+                      in that case the flat and dark paths are expected to be multi-page files too.
+                      For the 'zarr' chunked store format the input path is either the store,
+                      or the directory containing it, and the flat and dark paths are stores too.
     :param dtype: Default:np.float32, data type for the input images
     :param file_names: Use provided file names for loading
     :param indices: Specify which indices are loaded from the found files.
@@ -143,7 +182,7 @@ def load(input_path=None,
         raise ValueError("Indices at this point MUST have 3 elements: [start, stop, step]!")
 
     if not file_names:
-        input_file_names = get_file_names(input_path, in_format, in_prefix)
+        input_file_names = _find_input_files(input_path, in_format, in_prefix)
     else:
         input_file_names = file_names
 
@@ -152,16 +191,31 @@ def load(input_path=None,
         # pass only the first filename as we only expect a stack
         # input_file = input_file_names[0]
         # images = stack_loader.execute(_nxsread, input_file, dtype, "NXS Load", indices, progress)
+    elif in_format == chunked_store.CHUNKED_STORE_FORMAT:
+        stats = ThroughputStats('Load')
+        with stats:
+            dataset = _load_chunked_stores(input_file_names[0], input_path_flat, input_path_dark, dtype, indices,
+                                           progress, stats)
+    elif _is_tiff_stack(input_file_names, in_format):
+        stats = ThroughputStats('Load')
+        with stats:
+            dataset = _load_tiff_stacks(input_file_names[0], input_path_flat, input_path_dark, dtype, indices, progress,
+                                        stats)
     else:
         if in_format in ['fits', 'fit']:
             load_func = _fitsread
         else:
             load_func = _imread
 
-        dataset = img_loader.execute(load_func, input_file_names, input_path_flat, input_path_dark, in_format, dtype,
-                                     indices, progress)
+        stats = ThroughputStats('Load')
+        with stats:
+            dataset = img_loader.execute(load_func, input_file_names, input_path_flat, input_path_dark, in_format,
+                                         dtype, indices, progress, stats)
 
     # Search for and load metadata file
+    if in_format == chunked_store.CHUNKED_STORE_FORMAT and input_file_names[0] == input_path:
+        # the metadata is saved next to the store
+        input_path = os.path.dirname(os.path.normpath(input_path))
     metadata_found_filenames = get_file_names(input_path, 'json', in_prefix, essential=False)
     metadata_filename = metadata_found_filenames[0] if metadata_found_filenames else None
     if metadata_filename:
@@ -171,4 +225,22 @@ def load(input_path=None,
     else:
         LOG.debug('No metadata file found')
 
+    stats.record_in(dataset.sample.metadata, 'load')
+    stats.log()
+
     return dataset
+
+
+def _load_tiff_stacks(sample_file, flat_file, dark_file, dtype, indices, progress, stats) -> Dataset:
+    # the flat and dark are loaded first, so that a failure happens before the big sample stack is loaded
+    flat = tiff_stack.load_tiff_stack(flat_file, dtype, progress=progress, stats=stats) if flat_file else None
+    dark = tiff_stack.load_tiff_stack(dark_file, dtype, progress=progress, stats=stats) if dark_file else None
+    sample = tiff_stack.load_tiff_stack(sample_file, dtype, indices, progress=progress, stats=stats)
+    return Dataset(sample, flat, dark)
+
+
+def _load_chunked_stores(sample_store, flat_store, dark_store, dtype, indices, progress, stats) -> Dataset:
+    flat = chunked_store.load_chunked_store(flat_store, dtype, progress=progress, stats=stats) if flat_store else None
+    dark = chunked_store.load_chunked_store(dark_store, dtype, progress=progress, stats=stats) if dark_store else None
+    sample = chunked_store.load_chunked_store(sample_store, dtype, indices, progress=progress, stats=stats)
+    return Dataset(sample, flat, dark)
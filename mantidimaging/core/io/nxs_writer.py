@@ -0,0 +1,168 @@
+"""
+Writes stacks and reconstructions into chunked, optionally compressed HDF5/NeXus files.
+
+The datasets are chunked along the image axis, with every chunk spanning whole images,
+so that reading back a single image or a slab of images only decompresses the chunks
+that contain it.
+
+Without compression or with gzip, the chunks are shuffled and compressed by a pool of
+threads (zlib releases the GIL), and written with direct chunk writes, bypassing the
+single threaded HDF5 filter pipeline. LZ4 is provided by the optional hdf5plugin
+package and is applied by HDF5 itself, so LZ4 chunks are compressed one after another.
+"""
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from mantidimaging.core.utility.progress_reporting import Progress
+
+LOG = getLogger(__name__)
+
+SAMPLE_DATA_PATH = "tomography/sample_data"
+FLAT_DATA_PATH = "tomography/flat_data"
+DARK_DATA_PATH = "tomography/dark_data"
+ROTATION_ANGLE_PATH = "tomography/rotation_angle"
+
+COMPRESSION_GZIP = 'gzip'
+COMPRESSION_LZ4 = 'lz4'
+SUPPORTED_COMPRESSION = (None, COMPRESSION_GZIP, COMPRESSION_LZ4)
+
+DEFAULT_GZIP_LEVEL = 4
+DEFAULT_WRITE_WORKERS = 4
+
+
+def _import_hdf5plugin():
+    try:
+        import hdf5plugin
+    except ImportError as exc:
+        raise ImportError("LZ4 compression of NeXus files requires the package hdf5plugin. "
+                          "Error details: {0}".format(exc))
+    return hdf5plugin
+
+
+def _shuffle(chunk: np.ndarray) -> bytes:
+    """
+    Byte shuffle as done by the HDF5 shuffle filter: the first bytes of all elements,
+    followed by all the second bytes, and so on.
+    """
+    itemsize = chunk.dtype.itemsize
+    return np.ascontiguousarray(chunk).view(np.uint8).reshape(-1, itemsize).T.tobytes()
+
+
+def _encode_chunk(chunk: np.ndarray, shuffle: bool, level: Optional[int]) -> bytes:
+    """
+    :param level: The gzip compression level, or None to leave the chunk uncompressed
+    """
+    raw = _shuffle(chunk) if shuffle else np.ascontiguousarray(chunk).tobytes()
+    return zlib.compress(raw, level) if level is not None else raw
+
+
+def write_stack(nxs,
+                path: str,
+                data: np.ndarray,
+                chunk_images: int = 1,
+                compression: Optional[str] = None,
+                compression_level: int = DEFAULT_GZIP_LEVEL,
+                shuffle: bool = False,
+                num_workers: int = DEFAULT_WRITE_WORKERS,
+                progress: Optional[Progress] = None):
+    """
+    Writes a 3D stack into a new chunked dataset.
+
+    :param nxs: The open h5py File
+    :param path: Path of the dataset inside the file
+    :param data: The stack that will be written
+    :param chunk_images: Number of images in each chunk, 1 for per-image chunks
+                         or more for per-slab chunks.
+    :param compression: None, 'gzip' or 'lz4'
+    :param compression_level: The gzip compression level
+    :param shuffle: Apply the byte shuffle filter before compressing
+    :param num_workers: Number of threads encoding the chunks in parallel, unused with LZ4
+    :param progress: Progress instance, updated once per written chunk
+    """
+    if compression not in SUPPORTED_COMPRESSION:
+        raise ValueError(f"Unsupported compression '{compression}', expected one of {SUPPORTED_COMPRESSION}")
+
+    num_images = data.shape[0]
+    chunk_images = max(1, min(chunk_images, num_images))
+    chunks = (chunk_images, ) + data.shape[1:]
+
+    filter_kwargs = {}
+    if compression == COMPRESSION_GZIP:
+        filter_kwargs = {'compression': 'gzip', 'compression_opts': compression_level, 'shuffle': shuffle}
+    elif compression == COMPRESSION_LZ4:
+        filter_kwargs = dict(_import_hdf5plugin().LZ4(), shuffle=shuffle)
+    elif shuffle:
+        filter_kwargs = {'shuffle': True}
+
+    dset = nxs.create_dataset(path, shape=data.shape, dtype=data.dtype, chunks=chunks, **filter_kwargs)
+
+    starts = range(0, num_images, chunk_images)
+
+    def padded_chunk(start):
+        chunk = data[start:start + chunk_images]
+        if chunk.shape[0] < chunk_images:
+            # direct chunk writes always store full chunks, the padding is never read back
+            chunk = np.concatenate([chunk, np.zeros((chunk_images - chunk.shape[0], ) + chunk.shape[1:], chunk.dtype)])
+        return chunk
+
+    if compression != COMPRESSION_LZ4:
+        level = compression_level if compression == COMPRESSION_GZIP else None
+        num_workers = max(1, num_workers)
+        # encode a bounded window of chunks at a time, so the encoded chunks waiting to be written stay few
+        window = 2 * num_workers
+        with ThreadPoolExecutor(max_workers=num_workers) as pool:
+            for window_start in range(0, len(starts), window):
+                window_starts = starts[window_start:window_start + window]
+                encoded_chunks = pool.map(lambda start: _encode_chunk(padded_chunk(start), shuffle, level),
+                                          window_starts)
+                for start, encoded in zip(window_starts, encoded_chunks):
+                    dset.id.write_direct_chunk((start, 0, 0), encoded)
+                    if progress:
+                        progress.update(msg='Chunk')
+    else:
+        for start in starts:
+            dset[start:start + chunk_images] = data[start:start + chunk_images]
+            if progress:
+                progress.update(msg='Chunk')
+
+    return dset
+
+
+def write_nxs(data: np.ndarray,
+              filename: str,
+              projection_angles: Optional[np.ndarray] = None,
+              overwrite: bool = False,
+              flat: Optional[np.ndarray] = None,
+              dark: Optional[np.ndarray] = None,
+              chunk_images: int = 1,
+              compression: Optional[str] = None,
+              compression_level: int = DEFAULT_GZIP_LEVEL,
+              shuffle: bool = False,
+              num_workers: int = DEFAULT_WRITE_WORKERS,
+              progress: Optional[Progress] = None):
+    """
+    Writes the sample stack, and optionally the flat and dark stacks and the
+    rotation angles, into a NeXus file. The file is always closed on return.
+
+    See write_stack for the chunking and compression parameters.
+    """
+    import h5py
+
+    stacks: List[Tuple[str, np.ndarray]] = []
+    for path, stack in ((SAMPLE_DATA_PATH, data), (FLAT_DATA_PATH, flat), (DARK_DATA_PATH, dark)):
+        if stack is not None:
+            stacks.append((path, stack))
+
+    progress = Progress.ensure_instance(progress, task_name='Save NeXus')
+    progress.set_estimated_steps(sum(-(-stack.shape[0] // max(1, chunk_images)) for _, stack in stacks))
+
+    with progress, h5py.File(filename, 'w' if overwrite else 'w-') as nxs:
+        for path, stack in stacks:
+            write_stack(nxs, path, stack, chunk_images, compression, compression_level, shuffle, num_workers, progress)
+
+        if projection_angles is not None:
+            nxs.create_dataset(ROTATION_ANGLE_PATH, data=np.asarray(projection_angles))
@@ -0,0 +1,158 @@
+"""
+Conversion of floating point stacks to 8 or 16 bit integers while they are being saved.
+
+The value range mapped onto the integer range is either provided by the user, or
+estimated from a strided sample of the stack, so the full stack is only read once,
+when it is written out.
+"""
+from logging import getLogger
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+LOG = getLogger(__name__)
+
+QUANTISED_DTYPES = {'uint8': np.uint8, 'uint16': np.uint16}
+
+RANGE_MINMAX = 'minmax'
+RANGE_PERCENTILE = 'percentile'
+RANGE_METHODS = (RANGE_MINMAX, RANGE_PERCENTILE)
+
+DEFAULT_PERCENTILES = (0.1, 99.9)
+# The sample used for the range estimation has about this many pixels
+DEFAULT_SAMPLE_PIXELS = 4 * 1024 * 1024
+DEFAULT_HISTOGRAM_BINS = 4096
+# The sample always contains at least this many images spread over the stack, or all of them,
+# as the range of values can change a lot between projections
+MIN_SAMPLE_IMAGES = 32
+
+
+def _sample_steps(shape: Tuple[int, ...], sample_pixels: int) -> Tuple[int, int]:
+    """
+    :return: The step across images and the step across the rows and columns of each image,
+             so that the strided sample has roughly the requested number of pixels.
+    """
+    total = shape[0] * shape[1] * shape[2]
+    if total <= sample_pixels:
+        return 1, 1
+    ratio = total / sample_pixels
+    # prefer skipping whole images, which are contiguous in memory, before skipping pixels,
+    # but only as long as enough images are left in the sample
+    image_step = int(min(np.ceil(ratio), max(1, shape[0] // MIN_SAMPLE_IMAGES)))
+    pixel_step = int(max(1, np.ceil(np.sqrt(ratio / image_step))))
+    return image_step, pixel_step
+
+
+def estimate_range(data: np.ndarray,
+                   method: str = RANGE_PERCENTILE,
+                   percentiles: Tuple[float, float] = DEFAULT_PERCENTILES,
+                   sample_pixels: int = DEFAULT_SAMPLE_PIXELS,
+                   num_bins: int = DEFAULT_HISTOGRAM_BINS) -> Tuple[float, float]:
+    """
+    Estimate the range of values of a stack from a strided sample of it.
+
+    The sampled images are streamed one at a time, so the estimation does not need
+    any memory proportional to the stack.
+
+    :param data: The 3D stack
+    :param method: 'minmax' for the minimum and maximum of the sample, or 'percentile'
+                   for the percentiles of a histogram of the sample, which ignores outliers
+    :param percentiles: The low and high percentiles used by the 'percentile' method
+    :param sample_pixels: Approximate number of pixels in the sample
+    :param num_bins: Number of bins of the histogram used by the 'percentile' method
+    :return: The low and high value of the range
+    """
+    if method not in RANGE_METHODS:
+        raise ValueError(f"Unknown range estimation method '{method}', expected one of {RANGE_METHODS}")
+
+    image_step, pixel_step = _sample_steps(data.shape, sample_pixels)
+    indices = range(0, data.shape[0], image_step)
+
+    def sampled(idx):
+        image = data[idx, ::pixel_step, ::pixel_step]
+        return image[np.isfinite(image)]
+
+    low, high = np.inf, -np.inf
+    for idx in indices:
+        image = sampled(idx)
+        if image.size > 0:
+            low = min(low, float(image.min()))
+            high = max(high, float(image.max()))
+
+    if not np.isfinite(low) or not np.isfinite(high):
+        raise ValueError("Could not estimate the range of values, the stack has no finite values")
+
+    if method == RANGE_MINMAX or low == high:
+        return low, high
+
+    histogram = np.zeros(num_bins, dtype=np.int64)
+    for idx in indices:
+        histogram += np.histogram(sampled(idx), bins=num_bins, range=(low, high))[0]
+
+    cumulative = np.cumsum(histogram) / histogram.sum()
+    edges = np.linspace(low, high, num_bins + 1)
+    low_bin = int(np.searchsorted(cumulative, percentiles[0] / 100))
+    high_bin = int(np.searchsorted(cumulative, percentiles[1] / 100))
+    return float(edges[low_bin]), float(edges[min(high_bin + 1, num_bins)])
+
+
+def quantise(image: np.ndarray, low: float, high: float, dtype) -> np.ndarray:
+    """
+    Linearly map the values between low and high onto the full range of the integer
+    dtype. Values outside the range are clipped.
+    """
+    max_value = np.iinfo(dtype).max
+    scale = max_value / (high - low) if high > low else 0.0
+    scaled = np.subtract(image, low, dtype=np.float32)
+    np.multiply(scaled, scale, out=scaled)
+    np.clip(scaled, 0, max_value, out=scaled)
+    np.rint(scaled, out=scaled)
+    return scaled.astype(dtype)
+
+
+class Quantiser(object):
+    """
+    Converts images into the integer dtype, with a range fixed for the whole stack.
+    """
+    def __init__(self, out_dtype: str, low: float, high: float, method: str):
+        if out_dtype not in QUANTISED_DTYPES:
+            raise ValueError(f"Unsupported output dtype '{out_dtype}', expected one of {list(QUANTISED_DTYPES)}")
+        self.out_dtype = out_dtype
+        self.low = low
+        self.high = high
+        self.method = method
+
+    @staticmethod
+    def for_stack(data: np.ndarray,
+                  out_dtype: str,
+                  value_range: Optional[Tuple[float, float]] = None,
+                  range_method: str = RANGE_PERCENTILE) -> 'Quantiser':
+        """
+        :param data: The stack that will be quantised
+        :param out_dtype: 'uint8' or 'uint16'
+        :param value_range: The range mapped onto the integer range. Estimated from the data if not provided
+        :param range_method: The range estimation method, see estimate_range
+        """
+        if value_range is not None:
+            low, high = value_range
+            method = 'user'
+        else:
+            low, high = estimate_range(data, range_method)
+            method = range_method
+        LOG.info(f"Quantising to {out_dtype} with the range [{low}, {high}] ({method})")
+        return Quantiser(out_dtype, low, high, method)
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        return quantise(image, self.low, self.high, QUANTISED_DTYPES[self.out_dtype])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        :return: Everything needed to map the saved integers back to the original values:
+                 value = min + stored * (max - min) / dtype maximum
+        """
+        return {
+            'dtype': self.out_dtype,
+            'min': self.low,
+            'max': self.high,
+            'range_method': self.method,
+        }
@@ -1,11 +1,20 @@
+import json
 import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from copy import deepcopy
 from logging import getLogger
-from typing import List, Union
+from typing import Callable, List, Optional, Tuple, Union
 
 import numpy as np
 
-from .utility import DEFAULT_IO_FILE_FORMAT
+from . import chunked_store, nxs_writer, tiff_stack
+from .quantisation import Quantiser, RANGE_PERCENTILE
+from .throughput import ThroughputStats
+from .utility import DEFAULT_IO_FILE_FORMAT, get_filesystem_type
 from ..data.images import Images
+from ..operation_history import const
 from ..utility.progress_reporting import Progress
 
 LOG = getLogger(__name__)
@@ -14,6 +23,30 @@ DEFAULT_ZFILL_LENGTH = 6
 DEFAULT_NAME_PREFIX = 'image'
 DEFAULT_NAME_POSTFIX = ''
 
+# Number of concurrent writer threads depending on the type of the target file system.
+# Network and parallel file systems hide their latency behind many requests in flight,
+# while local disks are saturated by a few writers.
+SAVE_WORKERS_BY_FILESYSTEM = {
+    'nfs': 8,
+    'nfs4': 8,
+    'cifs': 8,
+    'smb3': 8,
+    'lustre': 16,
+    'gpfs': 16,
+    'beegfs': 16,
+    'ext4': 4,
+    'xfs': 4,
+    'btrfs': 4,
+    'tmpfs': 4,
+}
+DEFAULT_SAVE_WORKERS = 2
+
+# Upper bound of the memory used to gather the slices when saving with swapped axes
+DEFAULT_SWAP_TILE_BYTES = 256 * 1024 * 1024
+
+# Number of images held in each slab of a snapshot used for background saving
+DEFAULT_SNAPSHOT_SLAB_SIZE = 16
+
 
 def write_fits(data, filename, overwrite=False):
     import astropy.io.fits as fits
@@ -28,23 +61,12 @@ def write_img(data, filename, overwrite=False):
     skio.imsave(filename, data)
 
 
-def write_nxs(data, filename, projection_angles=None, overwrite=False):
-    import h5py
-    nxs = h5py.File(filename, 'w')
-
-    # appending flat and dark images is disabled for now
-    # new shape to account for appending flat and dark images
-    # correct_shape = (data.shape[0] + 2, data.shape[1], data.shape[2])
-
-    dset = nxs.create_dataset("tomography/sample_data", data.shape)
-    dset[:data.shape[0]] = data[:]
-    # left here if we decide to start appending the flat and dark images again
-    # dset[-2] = flat[:]
-    # dset[-1] = dark[:]
-
-    if projection_angles is not None:
-        rangle = nxs.create_dataset("tomography/rotation_angle", data=projection_angles)
-        rangle[...] = projection_angles
+def write_nxs(data, filename, projection_angles=None, overwrite=False, **kwargs):
+    """
+    Write the data into a chunked NeXus file, see nxs_writer.write_nxs for the
+    flat, dark, chunking and compression keyword arguments.
+    """
+    nxs_writer.write_nxs(data, filename, projection_angles=projection_angles, overwrite=overwrite, **kwargs)
 
 
 def save(images: Images,
@@ -57,7 +79,17 @@ def save(images: Images,
          zfill_len=DEFAULT_ZFILL_LENGTH,
          name_postfix=DEFAULT_NAME_POSTFIX,
          indices=None,
-         progress=None) -> Union[str, List[str]]:
+         progress=None,
+         num_workers: Optional[int] = None,
+         flat: Optional[Images] = None,
+         dark: Optional[Images] = None,
+         chunk_images: Optional[int] = None,
+         chunk_rows: int = chunked_store.DEFAULT_CHUNK_ROWS,
+         compression: Optional[str] = None,
+         shuffle: bool = False,
+         out_dtype: Optional[str] = None,
+         value_range: Optional[Tuple[float, float]] = None,
+         range_method: str = RANGE_PERCENTILE) -> Union[str, List[str]]:
     """
     Save image volume (3d) into a series of slices along the Z axis.
     The Z axis in the script is the ndarray.shape[0].
@@ -83,6 +115,21 @@ def save(images: Images,
     :param indices: Only works if custom_idx is not specified.
                     Specify the start and end range of the indices
                     which will be used for the file names.
+    :param num_workers: Number of threads writing files concurrently. If not specified
+                        it is chosen from the type of the file system of the output directory.
+    :param flat: NeXus only. Flat images to be written alongside the sample
+    :param dark: NeXus only. Dark images to be written alongside the sample
+    :param chunk_images: NeXus and chunked store only. Number of images in each chunk,
+                         by default 1 for NeXus and chunked_store.DEFAULT_CHUNK_IMAGES for chunked stores
+    :param chunk_rows: Chunked store only. Number of rows in each chunk
+    :param compression: NeXus: None, 'gzip' or 'lz4'. TIFF stack: None, 'zlib' or 'lzma'.
+                        Chunked store: None or 'zlib'.
+                        Not used by the other formats.
+    :param shuffle: NeXus only. Apply the byte shuffle filter before compressing
+    :param out_dtype: Not for NeXus or chunked stores. Convert the images to 'uint8' or 'uint16' while writing them
+    :param value_range: The range of values mapped onto the range of out_dtype.
+                        If not provided it is estimated from a sample of the data.
+    :param range_method: How the range is estimated, 'percentile' or 'minmax'
     :return The filename/filenames of the saved data.
     """
     progress = Progress.ensure_instance(progress, task_name='Save')
@@ -91,27 +138,75 @@ def save(images: Images,
     output_dir = os.path.abspath(os.path.expanduser(output_dir))
     make_dirs_if_needed(output_dir, overwrite_all)
 
-    # Save metadata
-    metadata_filename = os.path.join(output_dir, name_prefix + '.json')
-    LOG.debug('Metadata filename: {}'.format(metadata_filename))
-    with open(metadata_filename, 'w+') as f:
-        images.save_metadata(f)
-
+    # a deferred crop is copied out of the uncropped memory before saving
+    images.compact()
     data = images.data
 
     if swap_axes:
+        # this is a view, the swapped slices are gathered from the original data while writing
         data = np.swapaxes(data, 0, 1)
 
+    stats = ThroughputStats('Save')
+    quantiser = None
+
+    if out_dtype is not None and out_format in ['nxs', chunked_store.CHUNKED_STORE_FORMAT]:
+        raise ValueError("Converting the data type while saving is not supported for NeXus files and chunked stores")
+
     if out_format in ['nxs']:
         filename = os.path.join(output_dir, name_prefix + name_postfix)
-        write_nxs(data, filename + '.nxs', overwrite=overwrite_all)
-        return filename
+        # the angles only describe the stack when it is saved in its original orientation
+        projection_angles = images.projection_angles().value \
+            if images.log_file is not None and not swap_axes else None
+        with stats:
+            time_start = time.perf_counter()
+            write_nxs(data,
+                      filename + '.nxs',
+                      projection_angles=projection_angles,
+                      overwrite=overwrite_all,
+                      flat=flat.data if flat is not None else None,
+                      dark=dark.data if dark is not None else None,
+                      chunk_images=chunk_images if chunk_images is not None else 1,
+                      compression=compression,
+                      shuffle=shuffle,
+                      num_workers=num_workers if num_workers is not None else default_save_workers(output_dir),
+                      progress=progress)
+            stats.add_file(filename + '.nxs', os.path.getsize(filename + '.nxs'), time.perf_counter() - time_start)
+        result: Union[str, List[str]] = filename
+    elif out_format == chunked_store.CHUNKED_STORE_FORMAT:
+        filename = os.path.join(output_dir, name_prefix + name_postfix + '.' + chunked_store.CHUNKED_STORE_EXTENSION)
+        with stats:
+            chunked_store.write_chunked_store(
+                data,
+                filename,
+                chunk_images=chunk_images if chunk_images is not None else chunked_store.DEFAULT_CHUNK_IMAGES,
+                chunk_rows=chunk_rows,
+                compression=compression,
+                overwrite=overwrite_all,
+                num_workers=num_workers if num_workers is not None else default_save_workers(output_dir),
+                progress=progress,
+                stats=stats)
+        result = filename
+    elif out_format == tiff_stack.TIFF_STACK_FORMAT:
+        filename = os.path.join(output_dir, name_prefix + name_postfix + '.' + tiff_stack.TIFF_STACK_EXTENSION)
+        if out_dtype is not None:
+            quantiser = Quantiser.for_stack(data, out_dtype, value_range, range_method)
+        progress.set_estimated_steps(data.shape[0])
+        with progress, stats:
+            tiff_stack.write_tiff_stack(
+                data,
+                filename,
+                overwrite=overwrite_all,
+                compression=compression,
+                num_workers=num_workers if num_workers is not None else default_save_workers(output_dir),
+                convert=quantiser,
+                progress=progress,
+                stats=stats)
+        result = filename
     else:
-        if out_format in ['fit', 'fits']:
-            write_func = write_fits
-        else:
-            # pass all other formats to skimage
-            write_func = write_img
+        write_func = _select_write_func(out_format)
+        if out_dtype is not None:
+            quantiser = Quantiser.for_stack(data, out_dtype, value_range, range_method)
+            write_func = _quantised_writer(write_func, quantiser)
 
         num_images = data.shape[0]
         progress.set_estimated_steps(num_images)
@@ -121,13 +216,254 @@ def save(images: Images,
         for i in range(len(names)):
             names[i] = os.path.join(output_dir, names[i])
 
-        with progress:
-            for idx in range(num_images):
-                write_func(data[idx, :, :], names[idx], overwrite_all)
+        if num_workers is None:
+            num_workers = default_save_workers(output_dir)
+
+        with progress, stats:
+            if swap_axes:
+                _write_swapped_images(write_func, images.data, names, overwrite_all, num_workers, progress, stats)
+            else:
+                _write_images(write_func, data, names, overwrite_all, num_workers, progress, stats)
+
+        result = names
+
+    stats.log()
+
+    # Save metadata, after the images so that it contains the save throughput
+    stats.record_in(images.metadata, 'save')
+    if quantiser is not None:
+        images.metadata[const.QUANTISATION] = quantiser.to_dict()
+    metadata_filename = os.path.join(output_dir, name_prefix + '.json')
+    LOG.debug('Metadata filename: {}'.format(metadata_filename))
+    with open(metadata_filename, 'w+') as f:
+        images.save_metadata(f)
+    # the quantisation only describes the saved files, not the data in memory
+    images.metadata.pop(const.QUANTISATION, None)
+
+    return result
+
+
+class StackSnapshot(object):
+    """
+    A stack saved in the background, which is copied slab by slab while it is written.
+
+    Taking the snapshot does not copy the images, so it does not block the GUI, and the save only
+    holds the slab being written on top of the stack. The snapshot keeps the array of the stack,
+    so the saved images are not changed by an operation that replaces the data of the stack, but
+    an operation modifying it in place while it is saved changes the slabs not written yet.
+    """
+    def __init__(self, images: Images, slab_size: int = DEFAULT_SNAPSHOT_SLAB_SIZE):
+        self.metadata = deepcopy(images.metadata)
+        self.is_sinograms = images.is_sinograms
+        self.num_images = images.data.shape[0]
+        self.slab_size = max(1, slab_size)
+        self.data: Optional[np.ndarray] = images.data
+
+    @property
+    def num_slabs(self) -> int:
+        return -(-self.num_images // self.slab_size)
+
+    def slab_start(self, slab_idx: int) -> int:
+        return slab_idx * self.slab_size
+
+    def copy_slab(self, slab_idx: int) -> np.ndarray:
+        assert self.data is not None, "The snapshot was released before being saved"
+        start = self.slab_start(slab_idx)
+        return np.array(self.data[start:start + self.slab_size], copy=True)
+
+    def release(self):
+        """
+        Drops the reference to the array of the stack, which frees it if the stack no longer uses it.
+        """
+        self.data = None
+
+    def save_metadata(self, f):
+        self.metadata[const.SINOGRAMS] = self.is_sinograms
+        json.dump(self.metadata, f, indent=4)
+
+
+def save_snapshot(snapshot: StackSnapshot,
+                  output_dir,
+                  name_prefix=DEFAULT_NAME_PREFIX,
+                  out_format=DEFAULT_IO_FILE_FORMAT,
+                  overwrite_all=False,
+                  progress=None,
+                  num_workers: Optional[int] = None) -> List[str]:
+    """
+    Save a snapshot of a stack into a series of images, copying one slab of the stack at a time.
+
+    Only the formats with one file per image are supported.
+
+    :param snapshot: The snapshot that will be saved
+    :param output_dir: Output directory for the files
+    :param name_prefix: Prefix for the names of the images
+    :param out_format: File format of the saved out images
+    :param overwrite_all: Overwrite existing images with conflicting names
+    :param progress: The progress reporting instance
+    :param num_workers: Number of threads writing files concurrently
+    :return: The filenames of the saved data.
+    """
+    if out_format in ['nxs', tiff_stack.TIFF_STACK_FORMAT, chunked_store.CHUNKED_STORE_FORMAT]:
+        raise ValueError("Saving in the background is only supported for formats with one file per image")
+
+    progress = Progress.ensure_instance(progress, task_name='Background Save')
+
+    output_dir = os.path.abspath(os.path.expanduser(output_dir))
+    make_dirs_if_needed(output_dir, overwrite_all)
+
+    write_func = _select_write_func(out_format)
+    names = [
+        os.path.join(output_dir, name)
+        for name in generate_names(name_prefix, None, snapshot.num_images, out_format=out_format)
+    ]
+
+    if num_workers is None:
+        num_workers = default_save_workers(output_dir)
+
+    progress.set_estimated_steps(snapshot.num_images)
+    stats = ThroughputStats('Background Save')
+    with progress, stats:
+        for slab_idx in range(snapshot.num_slabs):
+            slab = snapshot.copy_slab(slab_idx)
+            start = snapshot.slab_start(slab_idx)
+            _write_images(write_func, slab, names[start:start + slab.shape[0]], overwrite_all, num_workers, progress,
+                          stats)
+            del slab
+    snapshot.release()
+
+    stats.log()
+
+    stats.record_in(snapshot.metadata, 'save')
+    with open(os.path.join(output_dir, name_prefix + '.json'), 'w+') as f:
+        snapshot.save_metadata(f)
+
+    return names
+
+
+def _quantised_writer(write_func: Callable, quantiser: Quantiser) -> Callable:
+    """
+    Wraps the write function so that each image is converted by the writer thread that saves it.
+    """
+    def write(data, filename, overwrite=False):
+        write_func(quantiser(data), filename, overwrite)
+
+    return write
+
+
+def _select_write_func(out_format: str) -> Callable:
+    if out_format in ['fit', 'fits']:
+        return write_fits
+    else:
+        # pass all other formats to skimage
+        return write_img
+
+
+def default_save_workers(output_dir: str) -> int:
+    """
+    :param output_dir: The directory in which the images will be saved
+    :return: The number of writer threads to use for the file system of the directory
+    """
+    fs_type = get_filesystem_type(output_dir)
+    num_workers = SAVE_WORKERS_BY_FILESYSTEM.get(fs_type, DEFAULT_SAVE_WORKERS) if fs_type else DEFAULT_SAVE_WORKERS
+    LOG.debug(f"Output file system: {fs_type}, using {num_workers} writer threads")
+    return num_workers
+
+
+def _write_images(write_func: Callable, data: np.ndarray, names: List[str], overwrite_all: bool, num_workers: int,
+                  progress: Progress, stats: ThroughputStats):
+    """
+    Writes each image of the stack into its own file, using a bounded pool of threads.
+
+    The file name of each image is decided before writing, so the output is the same
+    regardless of the number of threads. Progress is reported in file order, and
+    the first error raised by any writer cancels all writes that have not started yet.
+    """
+    def write_one(idx):
+        time_start = time.perf_counter()
+        write_func(data[idx, :, :], names[idx], overwrite_all)
+        stats.add_file(names[idx], os.path.getsize(names[idx]), time.perf_counter() - time_start)
+
+    if num_workers <= 1:
+        for idx in range(len(names)):
+            write_one(idx)
+            progress.update(msg='Image')
+        return
+
+    # bound the number of queued writes, so that an error or a cancellation stops the save quickly
+    max_in_flight = 2 * num_workers
+    pending: deque = deque()
+    next_idx = 0
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        try:
+            while next_idx < len(names) or pending:
+                in_flight = [future for future in pending if not future.done()]
+                # a new write is queued as soon as any write finishes, not once the whole window has
+                while next_idx < len(names) and len(in_flight) < max_in_flight:
+                    future = pool.submit(write_one, next_idx)
+                    pending.append(future)
+                    in_flight.append(future)
+                    next_idx += 1
+
+                wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in pending:
+                    error = future.exception() if future.done() else None
+                    if error is not None:
+                        raise error
+
+                # complete in order, so the progress always refers to a contiguous run of written files
+                while pending and pending[0].done():
+                    pending.popleft()
+                    progress.update(msg='Image')
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+
+def _write_swapped_images(write_func: Callable,
+                          data: np.ndarray,
+                          names: List[str],
+                          overwrite_all: bool,
+                          num_workers: int,
+                          progress: Progress,
+                          stats: ThroughputStats,
+                          tile_bytes: Optional[int] = None):
+    """
+    Writes the slices along axis 1 of the data, i.e. the stack with axes 0 and 1
+    swapped, without ever materialising the swapped copy of the whole stack.
+
+    The slices are gathered from the strided source a tile of rows at a time, into
+    a contiguous buffer that is reused for every tile, so the extra memory is bounded
+    by a single tile. The gather is split between threads by source image, and the
+    slices of each tile are then written with the threaded writer.
+    """
+    if tile_bytes is None:
+        tile_bytes = DEFAULT_SWAP_TILE_BYTES
+
+    num_images, num_slices = data.shape[0], data.shape[1]
+    slice_bytes = num_images * data.shape[2] * data.dtype.itemsize
+    tile_rows = int(max(1, min(num_slices, tile_bytes // slice_bytes)))
+    tile = np.empty((tile_rows, num_images, data.shape[2]), dtype=data.dtype)
+
+    num_workers = max(1, num_workers)
+    image_step = -(-num_images // num_workers)
+    image_starts = range(0, num_images, image_step)
+
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        for start in range(0, num_slices, tile_rows):
+            stop = min(start + tile_rows, num_slices)
+            current = tile[:stop - start]
+
+            def gather(image_start):
+                image_stop = image_start + image_step
+                # numpy releases the GIL while copying, so the threads gather in parallel
+                slices = np.swapaxes(data[image_start:image_stop, start:stop], 0, 1)
+                np.copyto(current[:, image_start:image_stop], slices)
 
-                progress.update(msg='Image')
+            # consume the iterator so that errors in the threads are raised here
+            list(pool.map(gather, image_starts))
 
-        return names
+            _write_images(write_func, current, names[start:stop], overwrite_all, num_workers, progress, stats)
 
 
 def generate_names(name_prefix,
@@ -318,8 +654,8 @@ class Saver(object):
         This will save out the data in a subdirectory /reconstructed/.
         If --save-horiz-slices is specified, the axis will be flipped and
         the result will be saved out in /reconstructed/horiz.
-        ^ This means that the data usage will double as
-        numpy.swapaxes WILL COPY AND DOUBLE the data!
+        The flipped slices are gathered a tile at a time while saving,
+        so the data is not copied.
 
         :param data: Reconstructed data volume that will be saved out.
         """
@@ -0,0 +1,89 @@
+import json
+import os
+import unittest
+from unittest import mock
+
+import numpy as np
+import numpy.testing as npt
+
+from mantidimaging.core.io import chunked_store
+from mantidimaging.core.io.chunked_store import ChunkedStore
+from mantidimaging.test_helpers import FileOutputtingTestCase
+
+
+class ChunkedStoreTest(FileOutputtingTestCase):
+    def setUp(self):
+        super(ChunkedStoreTest, self).setUp()
+        self.path = os.path.join(self.output_directory, "stack.zarr")
+        # neither axis divides evenly into the chunks, so the edge chunks are partially filled
+        self.data = np.random.rand(10, 13, 7).astype(np.float32)
+
+    def test_write_layout(self):
+        chunked_store.write_chunked_store(self.data, self.path, chunk_images=4, chunk_rows=5, compression='zlib')
+
+        with open(os.path.join(self.path, chunked_store.ARRAY_METADATA_FILE)) as f:
+            meta = json.load(f)
+        self.assertEqual(meta['shape'], [10, 13, 7])
+        self.assertEqual(meta['chunks'], [4, 5, 7])
+        self.assertEqual(meta['compressor'], {'id': 'zlib', 'level': chunked_store.DEFAULT_COMPRESSION_LEVEL})
+        self.assertEqual(len([f for f in os.listdir(self.path) if not f.startswith('.')]), 3 * 3)
+
+        npt.assert_equal(ChunkedStore(self.path).read(), self.data)
+
+    def test_read_projections(self):
+        chunked_store.write_chunked_store(self.data, self.path, chunk_images=4, chunk_rows=5)
+        store = ChunkedStore(self.path)
+
+        with mock.patch.object(store, '_read_chunk', wraps=store._read_chunk) as read_chunk:
+            npt.assert_equal(store.read(slice(1, 3)), self.data[1:3])
+        # only the first row of chunks along the projections is read
+        self.assertEqual(read_chunk.call_count, 3)
+
+        npt.assert_equal(store.read(slice(1, 10, 3), num_workers=1), self.data[1:10:3])
+        npt.assert_equal(store.read(slice(8, 2, -2)), self.data[8:2:-2])
+
+    def test_read_sinograms(self):
+        chunked_store.write_chunked_store(self.data, self.path, chunk_images=4, chunk_rows=5, compression='zlib')
+        store = ChunkedStore(self.path)
+
+        with mock.patch.object(store, '_read_chunk', wraps=store._read_chunk) as read_chunk:
+            sinograms = store.read(rows=slice(6, 9), sinograms=True)
+        npt.assert_equal(sinograms, np.swapaxes(self.data[:, 6:9], 0, 1))
+        # only the middle chunk along the rows is read for every row of chunks along the projections
+        self.assertEqual(read_chunk.call_count, 3)
+
+    def test_incremental_write(self):
+        store = ChunkedStore.create(self.path, self.data.shape, self.data.dtype, chunk_images=4, chunk_rows=5)
+        store.write(self.data[4:8], image_start=4)
+
+        npt.assert_equal(store.read(slice(4, 8)), self.data[4:8])
+        # chunks that were not written yet read back as the fill value
+        npt.assert_equal(store.read(slice(0, 4)), 0)
+
+        self.assertRaises(ValueError, store.write, self.data[2:6], 2)
+        store.write(self.data[8:], image_start=8)
+        npt.assert_equal(store.read(slice(8, None)), self.data[8:])
+
+    def test_does_not_overwrite_by_default(self):
+        chunked_store.write_chunked_store(self.data, self.path)
+        self.assertRaises(RuntimeError, chunked_store.write_chunked_store, self.data, self.path)
+        chunked_store.write_chunked_store(self.data[:2], self.path, overwrite=True)
+        self.assertEqual(ChunkedStore(self.path).shape, (2, 13, 7))
+
+    def test_load_chunked_store_sinograms(self):
+        chunked_store.write_chunked_store(self.data, self.path, chunk_images=4, chunk_rows=5)
+
+        images = chunked_store.load_chunked_store(self.path,
+                                                  np.float64,
+                                                  indices=[0, 10, 2],
+                                                  rows=(3, 11),
+                                                  sinograms=True)
+
+        self.assertTrue(images.is_sinograms)
+        self.assertEqual(images.data.dtype, np.float64)
+        npt.assert_equal(images.data, np.swapaxes(self.data[0:10:2, 3:11], 0, 1))
+        images.free_memory()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,16 @@
 import os
+import threading
 import unittest
+from unittest import mock
 
+import numpy as np
 import numpy.testing as npt
 
 import mantidimaging.test_helpers.unit_test_helper as th
 from mantidimaging.core.data import Images
 from mantidimaging.core.io import loader
 from mantidimaging.core.io import saver
+from mantidimaging.core.operation_history import const
 from mantidimaging.helper import initialise_logging
 from mantidimaging.test_helpers import FileOutputtingTestCase
 
@@ -217,7 +221,8 @@ class IOTest(FileOutputtingTestCase):
         dataset = loader.load(self.output_directory)
         loaded_images = dataset.sample
 
-        # Ensure properties have been preserved
+        # Ensure properties have been preserved, the load throughput is only known after loading
+        self.assertEqual(loaded_images.metadata[const.IO_THROUGHPUT].pop('load')['files'], 10)
         self.assertEqual(loaded_images.metadata, images.metadata)
 
         loaded_images.free_memory()
@@ -226,6 +231,189 @@ class IOTest(FileOutputtingTestCase):
         if dataset.flat:
             dataset.flat.free_memory()
 
+    def test_save_records_throughput(self):
+        images = th.generate_images()
+
+        saver.save(images, self.output_directory)
+
+        save_stats = images.metadata[const.IO_THROUGHPUT]['save']
+        self.assertEqual(save_stats['files'], images.data.shape[0])
+        self.assertGreater(save_stats['bytes'], images.data.nbytes)
+        self.assertGreater(save_stats['wall_time'], 0)
+        self.assertGreater(save_stats['decode_time'], 0)
+
+    def test_save_parallel_writes_all_names(self):
+        images = th.generate_images()
+
+        names = saver.save(images, self.output_directory, num_workers=4)
+
+        self.assertEqual(names, [
+            os.path.join(self.output_directory, name)
+            for name in saver.generate_names(saver.DEFAULT_NAME_PREFIX, None, images.data.shape[0])
+        ])
+        dataset = loader.load(self.output_directory)
+        npt.assert_equal(dataset.sample.data, images.data)
+        dataset.sample.free_memory()
+
+    def test_save_parallel_fails_fast(self):
+        images = th.generate_images((50, 8, 10))
+        write_img = saver.write_img
+        written = []
+
+        def fail_on_third(data, filename, overwrite=False):
+            written.append(filename)
+            if filename.endswith('000003.tif'):
+                raise IOError("disk full")
+            write_img(data, filename, overwrite)
+
+        with mock.patch('mantidimaging.core.io.saver.write_img', side_effect=fail_on_third):
+            self.assertRaises(IOError, saver.save, images, self.output_directory, num_workers=2)
+
+        # the writes queued after the failure are cancelled
+        self.assertLess(len(written), images.data.shape[0])
+
+    def test_save_parallel_does_not_wait_for_a_slow_write(self):
+        images = th.generate_images((12, 8, 10))
+        write_img = saver.write_img
+        later_write_started = threading.Event()
+
+        def slow_first(data, filename, overwrite=False):
+            if filename.endswith('000000.tif'):
+                # only finishes once writes past the first window of 2 * workers have been queued
+                self.assertTrue(later_write_started.wait(10), "The writes were not queued while the first one ran")
+            elif filename.endswith('000006.tif'):
+                later_write_started.set()
+            write_img(data, filename, overwrite)
+
+        with mock.patch('mantidimaging.core.io.saver.write_img', side_effect=slow_first):
+            saver.save(images, self.output_directory, num_workers=2)
+
+        dataset = loader.load(self.output_directory)
+        npt.assert_equal(dataset.sample.data, images.data)
+        dataset.sample.free_memory()
+
+    @mock.patch('mantidimaging.core.io.saver.get_filesystem_type')
+    def test_default_save_workers(self, get_filesystem_type):
+        get_filesystem_type.return_value = 'nfs4'
+        self.assertEqual(saver.default_save_workers(self.output_directory), saver.SAVE_WORKERS_BY_FILESYSTEM['nfs4'])
+        get_filesystem_type.return_value = None
+        self.assertEqual(saver.default_save_workers(self.output_directory), saver.DEFAULT_SAVE_WORKERS)
+
+    def test_save_snapshot_keeps_replaced_data(self):
+        images = th.generate_images()
+        expected = images.data.copy()
+        snapshot = saver.StackSnapshot(images, slab_size=3)
+
+        # an operation replacing the data of the stack does not change the snapshot
+        images.data = np.zeros_like(expected)
+
+        names = saver.save_snapshot(snapshot, self.output_directory, num_workers=2)
+
+        self.assertEqual(len(names), expected.shape[0])
+        dataset = loader.load(self.output_directory)
+        npt.assert_equal(dataset.sample.data, expected)
+        dataset.sample.free_memory()
+
+    def test_save_snapshot_copies_slab_by_slab(self):
+        images = th.generate_images()
+        snapshot = saver.StackSnapshot(images, slab_size=3)
+        self.assertEqual(snapshot.num_slabs, 4)
+        # taking the snapshot does not copy the images
+        self.assertIs(snapshot.data, images.data)
+
+        with mock.patch.object(snapshot, 'copy_slab', wraps=snapshot.copy_slab) as copy_slab:
+            saver.save_snapshot(snapshot, self.output_directory, num_workers=1)
+
+        self.assertEqual([call[0][0] for call in copy_slab.call_args_list], [0, 1, 2, 3])
+        self.assertIsNone(snapshot.data)
+        self.assertIn('save', snapshot.metadata[const.IO_THROUGHPUT])
+
+    def test_save_nxs_with_flat_and_dark(self):
+        import h5py
+        from mantidimaging.core.io import nxs_writer
+        images = th.generate_images()
+        flat = th.generate_images()
+        dark = th.generate_images()
+
+        filename = saver.save(images,
+                              self.output_directory,
+                              out_format='nxs',
+                              flat=flat,
+                              dark=dark,
+                              chunk_images=4,
+                              compression='gzip',
+                              shuffle=True)
+
+        with h5py.File(filename + '.nxs', 'r') as nxs:
+            npt.assert_equal(nxs[nxs_writer.SAMPLE_DATA_PATH][()], images.data)
+            npt.assert_equal(nxs[nxs_writer.FLAT_DATA_PATH][()], flat.data)
+            npt.assert_equal(nxs[nxs_writer.DARK_DATA_PATH][()], dark.data)
+        self.assertEqual(images.metadata[const.IO_THROUGHPUT]['save']['files'], 1)
+
+    def test_save_swapped_axes_in_tiles(self):
+        images = th.generate_images()
+
+        # force several tiles of 3 slices
+        slice_bytes = images.data.shape[0] * images.data.shape[2] * images.data.dtype.itemsize
+        with mock.patch('mantidimaging.core.io.saver.DEFAULT_SWAP_TILE_BYTES', 3 * slice_bytes):
+            names = saver.save(images, self.output_directory, swap_axes=True, num_workers=3)
+
+        self.assertEqual(len(names), images.data.shape[1])
+        dataset = loader.load(self.output_directory)
+        npt.assert_equal(dataset.sample.data, np.swapaxes(images.data, 0, 1))
+        dataset.sample.free_memory()
+
+    def test_save_tiff_stack(self):
+        from mantidimaging.core.io import tiff_stack
+        images = th.generate_images()
+
+        filename = saver.save(images,
+                              self.output_directory,
+                              out_format=tiff_stack.TIFF_STACK_FORMAT,
+                              compression='zlib')
+
+        self.assertEqual(filename, os.path.join(self.output_directory, saver.DEFAULT_NAME_PREFIX + '.tif'))
+        self.assertEqual(loader.read_in_shape(self.output_directory, in_format='tif')[0], images.data.shape)
+        # a single multi-page file is recognised as a stack when loading plain TIFF files
+        for in_format in ['tif', tiff_stack.TIFF_STACK_FORMAT]:
+            dataset = loader.load(self.output_directory, in_format=in_format, indices=[0, 10, 2])
+            npt.assert_equal(dataset.sample.data, images.data[0:10:2])
+            self.assertIn('save', dataset.sample.metadata[const.IO_THROUGHPUT])
+            dataset.sample.free_memory()
+
+    def test_save_chunked_store(self):
+        from mantidimaging.core.io import chunked_store
+        images = th.generate_images()
+
+        store_path = saver.save(images,
+                                self.output_directory,
+                                out_format=chunked_store.CHUNKED_STORE_FORMAT,
+                                chunk_images=3,
+                                chunk_rows=4,
+                                compression='zlib')
+
+        self.assertEqual(loader.read_in_shape(store_path, in_format='zarr')[0], images.data.shape)
+        for input_path in [self.output_directory, store_path]:
+            dataset = loader.load(input_path, in_format=chunked_store.CHUNKED_STORE_FORMAT, indices=[2, 9, 1])
+            npt.assert_equal(dataset.sample.data, images.data[2:9])
+            self.assertIn('save', dataset.sample.metadata[const.IO_THROUGHPUT])
+            dataset.sample.free_memory()
+
+    def test_save_quantised(self):
+        import json
+        from mantidimaging.core.io.quantisation import quantise
+        images = th.generate_images()
+
+        saver.save(images, self.output_directory, out_dtype='uint16', value_range=(0.0, 1.0), num_workers=2)
+
+        dataset = loader.load(self.output_directory, dtype=np.uint16)
+        npt.assert_equal(dataset.sample.data, quantise(images.data, 0.0, 1.0, np.uint16))
+        dataset.sample.free_memory()
+
+        with open(os.path.join(self.output_directory, saver.DEFAULT_NAME_PREFIX + '.json')) as f:
+            self.assertEqual(json.load(f)[const.QUANTISATION]['dtype'], 'uint16')
+        self.assertNotIn(const.QUANTISATION, images.metadata)
+
 
 if __name__ == '__main__':
     unittest.main()
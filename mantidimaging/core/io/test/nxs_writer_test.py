@@ -0,0 +1,77 @@
+import os
+import unittest
+
+import h5py
+import numpy as np
+import numpy.testing as npt
+
+from mantidimaging.core.io import nxs_writer
+from mantidimaging.test_helpers import FileOutputtingTestCase
+
+
+class NexusWriterTest(FileOutputtingTestCase):
+    def setUp(self):
+        super(NexusWriterTest, self).setUp()
+        self.filename = os.path.join(self.output_directory, "stack.nxs")
+        self.data = np.random.rand(10, 8, 12).astype(np.float32)
+
+    def _read(self, path=nxs_writer.SAMPLE_DATA_PATH):
+        with h5py.File(self.filename, 'r') as nxs:
+            dset = nxs[path]
+            return dset[()], dset.chunks, dset.compression, dset.shuffle
+
+    def test_uncompressed_per_image_chunks(self):
+        nxs_writer.write_nxs(self.data, self.filename)
+
+        data, chunks, compression, _ = self._read()
+        npt.assert_equal(data, self.data)
+        self.assertEqual(chunks, (1, 8, 12))
+        self.assertIsNone(compression)
+
+    def test_gzip_shuffle_per_slab_chunks(self):
+        # 10 images do not divide into slabs of 3, the last chunk is partially filled
+        nxs_writer.write_nxs(self.data, self.filename, chunk_images=3, compression='gzip', shuffle=True, num_workers=3)
+
+        data, chunks, compression, shuffle = self._read()
+        npt.assert_equal(data, self.data)
+        self.assertEqual(chunks, (3, 8, 12))
+        self.assertEqual(compression, 'gzip')
+        self.assertTrue(shuffle)
+
+    def test_uncompressed_shuffle_per_slab_chunks(self):
+        nxs_writer.write_nxs(self.data, self.filename, chunk_images=4, shuffle=True, num_workers=2)
+
+        data, chunks, compression, shuffle = self._read()
+        npt.assert_equal(data, self.data)
+        self.assertEqual(chunks, (4, 8, 12))
+        self.assertIsNone(compression)
+        self.assertTrue(shuffle)
+
+    def test_gzip_reads_single_image(self):
+        nxs_writer.write_nxs(self.data, self.filename, compression='gzip')
+
+        with h5py.File(self.filename, 'r') as nxs:
+            npt.assert_equal(nxs[nxs_writer.SAMPLE_DATA_PATH][7], self.data[7])
+
+    def test_flat_dark_and_angles(self):
+        flat = np.random.rand(3, 8, 12).astype(np.float32)
+        dark = np.random.rand(2, 8, 12).astype(np.float32)
+        angles = np.linspace(0, np.pi, 10)
+
+        nxs_writer.write_nxs(self.data, self.filename, projection_angles=angles, flat=flat, dark=dark, chunk_images=2)
+
+        npt.assert_equal(self._read(nxs_writer.FLAT_DATA_PATH)[0], flat)
+        npt.assert_equal(self._read(nxs_writer.DARK_DATA_PATH)[0], dark)
+        npt.assert_equal(self._read(nxs_writer.ROTATION_ANGLE_PATH)[0], angles)
+
+    def test_does_not_overwrite_by_default(self):
+        nxs_writer.write_nxs(self.data, self.filename)
+        self.assertRaises(FileExistsError, nxs_writer.write_nxs, self.data, self.filename)
+        nxs_writer.write_nxs(self.data, self.filename, overwrite=True)
+
+    def test_unsupported_compression(self):
+        self.assertRaises(ValueError, nxs_writer.write_nxs, self.data, self.filename, compression='bzip2')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+import numpy as np
+import numpy.testing as npt
+
+from mantidimaging.core.io import quantisation
+
+
+class QuantisationTest(unittest.TestCase):
+    def test_estimate_range_minmax(self):
+        data = np.random.rand(5, 8, 10).astype(np.float32)
+        low, high = quantisation.estimate_range(data, quantisation.RANGE_MINMAX)
+        self.assertEqual(low, data.min())
+        self.assertEqual(high, data.max())
+
+    def test_estimate_range_percentile_ignores_outliers(self):
+        data = np.random.rand(10, 32, 32).astype(np.float32)
+        data[3, 4, 5] = 1000
+        data[7, 1, 1] = -1000
+
+        low, high = quantisation.estimate_range(data, quantisation.RANGE_PERCENTILE, percentiles=(1, 99))
+
+        self.assertGreater(low, -1)
+        self.assertLess(high, 2)
+
+    def test_estimate_range_ignores_non_finite(self):
+        data = np.random.rand(5, 8, 10).astype(np.float32)
+        data[0, 0, 0] = np.nan
+        data[1, 0, 0] = np.inf
+        low, high = quantisation.estimate_range(data, quantisation.RANGE_MINMAX)
+        self.assertTrue(np.isfinite(low) and np.isfinite(high))
+
+    def test_estimate_range_is_sampled(self):
+        self.assertEqual(quantisation._sample_steps((10, 10, 10), 1000), (1, 1))
+        image_step, pixel_step = quantisation._sample_steps((100, 100, 100), 10000)
+        self.assertEqual(image_step, 3)
+        self.assertEqual(pixel_step, 6)
+        image_step, pixel_step = quantisation._sample_steps((4, 1000, 1000), 10000)
+        self.assertEqual(image_step, 1)
+        self.assertEqual(pixel_step, 20)
+        for shape in ((100, 2048, 2048), (2048, 2048, 2048), (4000, 2048, 2048)):
+            image_step, _ = quantisation._sample_steps(shape, quantisation.DEFAULT_SAMPLE_PIXELS)
+            self.assertGreaterEqual(len(range(0, shape[0], image_step)), quantisation.MIN_SAMPLE_IMAGES)
+
+    def test_estimate_range_samples_images_across_the_stack(self):
+        data = np.random.rand(200, 64, 64).astype(np.float32)
+        # the values of the later projections are much higher than the values of the first
+        data *= np.linspace(1, 100, data.shape[0], dtype=np.float32)[:, np.newaxis, np.newaxis]
+
+        low, high = quantisation.estimate_range(data, quantisation.RANGE_MINMAX, sample_pixels=10000)
+
+        self.assertLess(low, 1)
+        self.assertGreater(high, 90)
+
+    def test_quantise(self):
+        image = np.array([[-1, 0, 0.5, 1, 2]], dtype=np.float32)
+
+        npt.assert_equal(quantisation.quantise(image, 0, 1, np.uint8), [[0, 0, 128, 255, 255]])
+        result = quantisation.quantise(image, 0, 1, np.uint16)
+        self.assertEqual(result.dtype, np.uint16)
+        npt.assert_equal(result, [[0, 0, 32768, 65535, 65535]])
+
+    def test_quantiser_user_range(self):
+        data = np.random.rand(5, 8, 10).astype(np.float32)
+        quantiser = quantisation.Quantiser.for_stack(data, 'uint8', value_range=(0, 2))
+
+        self.assertEqual(quantiser.to_dict(), {'dtype': 'uint8', 'min': 0, 'max': 2, 'range_method': 'user'})
+        self.assertLessEqual(quantiser(data[0]).max(), 128)
+
+    def test_quantiser_unsupported_dtype(self):
+        self.assertRaises(ValueError, quantisation.Quantiser, 'int32', 0, 1, 'user')
+
+
+if __name__ == '__main__':
+    unittest.main()
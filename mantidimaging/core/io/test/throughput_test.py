@@ -0,0 +1,43 @@
+import unittest
+
+from mantidimaging.core.io.throughput import ThroughputStats
+from mantidimaging.core.operation_history import const
+
+
+class ThroughputStatsTest(unittest.TestCase):
+    def test_empty(self):
+        stats = ThroughputStats()
+        self.assertEqual(stats.num_files, 0)
+        self.assertEqual(stats.wall_time, 0.0)
+        self.assertEqual(stats.mb_per_second, 0.0)
+        self.assertEqual(stats.files_per_second, 0.0)
+
+    def test_add_file(self):
+        stats = ThroughputStats()
+        with stats:
+            stats.add_file("a.tif", 1024 * 1024, decode_time=0.5, copy_time=0.25)
+            stats.add_file("b.tif", 1024 * 1024, decode_time=0.5, copy_time=0.25)
+
+        self.assertEqual(stats.num_files, 2)
+        self.assertEqual(stats.total_bytes, 2 * 1024 * 1024)
+        self.assertEqual(stats.decode_time, 1.0)
+        self.assertEqual(stats.copy_time, 0.5)
+        self.assertGreater(stats.wall_time, 0)
+        self.assertAlmostEqual(stats.mb_per_second, 2 / stats.wall_time)
+        self.assertAlmostEqual(stats.files_per_second, 2 / stats.wall_time)
+
+    def test_record_in(self):
+        stats = ThroughputStats()
+        with stats:
+            stats.add_file("a.tif", 100)
+
+        metadata = {}
+        stats.record_in(metadata, 'load')
+        stats.record_in(metadata, 'save')
+
+        self.assertEqual(metadata[const.IO_THROUGHPUT]['load'], stats.to_dict())
+        self.assertEqual(metadata[const.IO_THROUGHPUT]['save']['bytes'], 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
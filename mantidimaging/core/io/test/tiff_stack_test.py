@@ -0,0 +1,61 @@
+import os
+import unittest
+
+import numpy as np
+import numpy.testing as npt
+
+from mantidimaging.core.io import tiff_stack
+from mantidimaging.test_helpers import FileOutputtingTestCase
+
+
+class TiffStackTest(FileOutputtingTestCase):
+    def setUp(self):
+        super(TiffStackTest, self).setUp()
+        self.filename = os.path.join(self.output_directory, "stack.tif")
+        self.data = np.random.rand(10, 70, 12).astype(np.float32)
+
+    def test_write_and_read(self):
+        tiff_stack.write_tiff_stack(self.data, self.filename)
+
+        with tiff_stack.TiffStackReader(self.filename) as reader:
+            self.assertEqual(reader.shape, self.data.shape)
+            self.assertEqual(reader.dtype, np.float32)
+            self.assertEqual(len(reader.page_offsets), 10)
+            npt.assert_equal(reader.read(), self.data)
+
+    def test_compressed_random_access(self):
+        tiff_stack.write_tiff_stack(self.data, self.filename, compression='zlib', num_workers=2)
+
+        with tiff_stack.TiffStackReader(self.filename) as reader:
+            self.assertNotEqual(reader.compression, 1)
+            npt.assert_equal(reader.read_page(7), self.data[7])
+            npt.assert_equal(reader.read([9, 2, 4], num_workers=3), self.data[[9, 2, 4]])
+
+    def test_convert(self):
+        tiff_stack.write_tiff_stack(self.data, self.filename, convert=lambda image: (image * 100).astype(np.uint8))
+
+        with tiff_stack.TiffStackReader(self.filename) as reader:
+            npt.assert_equal(reader.read(), (self.data * 100).astype(np.uint8))
+
+    def test_does_not_overwrite_by_default(self):
+        tiff_stack.write_tiff_stack(self.data, self.filename)
+        self.assertRaises(RuntimeError, tiff_stack.write_tiff_stack, self.data, self.filename)
+        tiff_stack.write_tiff_stack(self.data[:2], self.filename, overwrite=True)
+        self.assertFalse(tiff_stack.is_tiff_stack(os.path.join(self.output_directory, "missing.tif")))
+
+    def test_unsupported_compression(self):
+        self.assertRaises(ValueError, tiff_stack.write_tiff_stack, self.data, self.filename, compression='jpeg')
+
+    def test_load_tiff_stack(self):
+        tiff_stack.write_tiff_stack(self.data, self.filename, compression='lzma')
+        self.assertTrue(tiff_stack.is_tiff_stack(self.filename))
+
+        images = tiff_stack.load_tiff_stack(self.filename, np.float64, indices=[1, 8, 3])
+
+        self.assertEqual(images.data.dtype, np.float64)
+        npt.assert_equal(images.data, self.data[1:8:3])
+        images.free_memory()
+
+
+if __name__ == '__main__':
+    unittest.main()
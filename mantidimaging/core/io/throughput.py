@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import namedtuple
+from logging import getLogger
+from typing import Any, Dict, List
+
+from mantidimaging.core.operation_history import const
+
+FileTiming = namedtuple('FileTiming', ['filename', 'num_bytes', 'decode_time', 'copy_time'])
+
+BYTES_IN_MB = 1024 * 1024
+
+
+class ThroughputStats(object):
+    """
+    Accumulates wall time, bytes and per-stage timings for every file touched
+    by a load or save, so that storage back-ends can be compared objectively.
+
+    The wall time is measured with a monotonic clock between entering and
+    leaving the context, the decode and copy times are summed across files.
+    For saving the "decode" stage is the encoding and writing of the file.
+    When files are processed concurrently the summed stage times can exceed the wall time.
+
+    Usage:
+        stats = ThroughputStats('Load')
+        with stats:
+            for f in files:
+                ...
+                stats.add_file(f, num_bytes, decode_time, copy_time)
+        stats.log()
+    """
+    def __init__(self, task_name='IO'):
+        self.task_name = task_name
+
+        self.files: List[FileTiming] = []
+        self.total_bytes = 0
+        self.decode_time = 0.0
+        self.copy_time = 0.0
+
+        self.time_start = None
+        self.time_end = None
+
+        # files can be added from several worker threads
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        self.time_start = time.perf_counter()
+        self.time_end = None
+        return self
+
+    def __exit__(self, *args):
+        self.time_end = time.perf_counter()
+
+    def __str__(self):
+        return f"{self.task_name}: {self.num_files} files, {self.total_bytes / BYTES_IN_MB:.2f} MB " \
+               f"in {self.wall_time:.3f}s ({self.mb_per_second:.2f} MB/s, {self.files_per_second:.2f} files/s), " \
+               f"decode: {self.decode_time:.3f}s, copy: {self.copy_time:.3f}s"
+
+    def add_file(self, filename: str, num_bytes: int, decode_time: float = 0.0, copy_time: float = 0.0):
+        """
+        Record the timings of a single file.
+
+        :param filename: The file that was read or written
+        :param num_bytes: Number of bytes read from or written to the storage
+        :param decode_time: Time spent reading and decoding (or encoding and writing) the file
+        :param copy_time: Time spent copying the decoded image into (or out of) the stack
+        """
+        with self.lock:
+            self.files.append(FileTiming(filename, num_bytes, decode_time, copy_time))
+            self.total_bytes += num_bytes
+            self.decode_time += decode_time
+            self.copy_time += copy_time
+
+    @property
+    def num_files(self) -> int:
+        return len(self.files)
+
+    @property
+    def wall_time(self) -> float:
+        """
+        Wall time between entering and leaving the context. If the context is
+        still active the time so far is returned.
+        """
+        if self.time_start is None:
+            return 0.0
+        end = self.time_end if self.time_end is not None else time.perf_counter()
+        return end - self.time_start
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.total_bytes / BYTES_IN_MB / self.wall_time if self.wall_time > 0 else 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        return self.num_files / self.wall_time if self.wall_time > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        :return: The aggregate throughput, suitable for storing in the stack metadata
+        """
+        return {
+            'files': self.num_files,
+            'bytes': self.total_bytes,
+            'wall_time': round(self.wall_time, 6),
+            'decode_time': round(self.decode_time, 6),
+            'copy_time': round(self.copy_time, 6),
+            'mb_per_second': round(self.mb_per_second, 3),
+            'files_per_second': round(self.files_per_second, 3),
+        }
+
+    def record_in(self, metadata: Dict[str, Any], stage: str):
+        """
+        Writes the aggregate throughput into the metadata under the IO throughput key.
+
+        :param metadata: The metadata dictionary of the stack
+        :param stage: Name of the stage, e.g. 'load' or 'save'
+        """
+        metadata.setdefault(const.IO_THROUGHPUT, {})[stage] = self.to_dict()
+
+    def log(self):
+        log = getLogger(__name__)
+        log.info(str(self))
+        for f in self.files:
+            log.debug(f"{f.filename}: {f.num_bytes} bytes, decode: {f.decode_time:.4f}s, copy: {f.copy_time:.4f}s")
@@ -0,0 +1,274 @@
+"""
+Single file, multi-page (BigTIFF) stacks.
+
+A whole stack is stored as the pages of one BigTIFF file, so that saving and
+reloading thousands of projections creates, lists and opens a single file,
+instead of putting pressure on the metadata servers of the file system.
+
+When reading, the directory of every page is parsed once when the file is opened,
+which gives an index of the page offsets. Any page can then be read directly, and
+pages are decoded in parallel by a pool of threads (the zlib and lzma decoders
+release the GIL).
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from mantidimaging.core.data import Images
+from mantidimaging.core.io.throughput import ThroughputStats
+from mantidimaging.core.parallel import utility as pu
+from mantidimaging.core.utility.progress_reporting import Progress
+
+LOG = getLogger(__name__)
+
+TIFF_STACK_FORMAT = 'tiffstack'
+TIFF_STACK_EXTENSION = 'tif'
+
+# Compression that tifffile supports without the optional imagecodecs package
+SUPPORTED_COMPRESSION = (None, 'zlib', 'lzma')
+DEFAULT_COMPRESSION_LEVEL = 4
+
+# Pages are split into strips of this many rows, each strip is compressed by a separate thread
+DEFAULT_ROWS_PER_STRIP = 64
+DEFAULT_READ_WORKERS = 4
+
+
+def _import_tifffile():
+    try:
+        import tifffile
+    except ImportError as exc:
+        raise ImportError("Single file TIFF stacks require the package tifffile. Error details: {0}".format(exc))
+    return tifffile
+
+
+def write_tiff_stack(data: np.ndarray,
+                     filename: str,
+                     overwrite: bool = False,
+                     compression: Optional[str] = None,
+                     compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+                     num_workers: int = 1,
+                     convert: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+                     progress: Optional[Progress] = None,
+                     stats: Optional[ThroughputStats] = None):
+    """
+    Writes the 3D stack as the pages of a single BigTIFF file.
+
+    :param data: The stack that will be written, one page per image
+    :param filename: Name of the output file
+    :param overwrite: Overwrite the file if it already exists
+    :param compression: None, 'zlib' or 'lzma', applied to every page
+    :param compression_level: The compression level
+    :param num_workers: Number of threads compressing the strips of each page
+    :param convert: Optional function applied to every image before it is written,
+                    e.g. to quantise it
+    :param progress: Progress instance, updated once per written page
+    :param stats: Optional throughput statistics, updated once the file is written
+    """
+    if compression not in SUPPORTED_COMPRESSION:
+        raise ValueError(f"Unsupported compression '{compression}', expected one of {SUPPORTED_COMPRESSION}")
+    if not overwrite and os.path.exists(filename):
+        raise RuntimeError(
+            "The output file {0} already exists. Please specify overwrite to replace it.".format(filename))
+
+    tifffile = _import_tifffile()
+    compression_kwargs = {}
+    if compression is not None:
+        compression_kwargs = {
+            'compression': compression,
+            'compressionargs': {
+                'level': compression_level
+            },
+            'rowsperstrip': DEFAULT_ROWS_PER_STRIP,
+            'maxworkers': max(1, num_workers)
+        }
+
+    time_start = time.perf_counter()
+    encode_time = 0.0
+    with tifffile.TiffWriter(filename, bigtiff=True) as tiff:
+        for idx in range(data.shape[0]):
+            image = data[idx]
+            if convert is not None:
+                image = convert(image)
+            encode_start = time.perf_counter()
+            tiff.write(image, photometric='minisblack', metadata=None, **compression_kwargs)
+            encode_time += time.perf_counter() - encode_start
+            if progress:
+                progress.update(msg='Page')
+
+    if stats is not None:
+        stats.add_file(filename, os.path.getsize(filename), encode_time, time.perf_counter() - time_start - encode_time)
+
+
+def is_tiff_stack(filename: str) -> bool:
+    """
+    :return: Whether the file is a TIFF file with more than one page.
+             False if tifffile is not available.
+    """
+    try:
+        tifffile = _import_tifffile()
+    except ImportError:
+        return False
+
+    try:
+        with tifffile.TiffFile(filename) as tiff:
+            return len(tiff.pages) > 1
+    except (OSError, ValueError, tifffile.TiffFileError):
+        return False
+
+
+class TiffStackReader(object):
+    """
+    Random access to the pages of a multi-page TIFF file.
+
+    Usage:
+        with TiffStackReader(filename) as reader:
+            image = reader.read_page(10)
+            stack = reader.read(range(0, len(reader), 2))
+    """
+    def __init__(self, filename: str):
+        tifffile = _import_tifffile()
+        self.filename = filename
+        self._tiff = tifffile.TiffFile(filename)
+
+        try:
+            pages = self._tiff.pages
+            pages.cache = True
+            # parse every page directory up front, pages can then be accessed in any order, from any thread
+            self._pages = [pages[idx] for idx in range(len(pages))]
+        except Exception:
+            self._tiff.close()
+            raise
+
+        if not self._pages:
+            self._tiff.close()
+            raise ValueError(f"The TIFF file {filename} contains no pages")
+
+        first = self._pages[0]
+        self.image_shape = first.shape
+        self.dtype = first.dtype
+        for idx, page in enumerate(self._pages):
+            if page.shape != self.image_shape:
+                self._tiff.close()
+                raise ValueError(f"Page {idx} of {filename} has the shape {page.shape}, "
+                                 f"all pages must have the shape of the first page {self.image_shape}")
+
+        # readers of different pages share the file handle
+        self._tiff.filehandle.set_lock(True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self._pages)
+
+    def close(self):
+        self._tiff.close()
+
+    @property
+    def shape(self):
+        return (len(self._pages), ) + tuple(self.image_shape)
+
+    @property
+    def page_offsets(self) -> List[int]:
+        """
+        :return: The offset of the directory of every page in the file
+        """
+        return [page.offset for page in self._pages]
+
+    @property
+    def compression(self) -> int:
+        return int(self._pages[0].compression)
+
+    def read_page(self, idx: int) -> np.ndarray:
+        return self._pages[idx].asarray()
+
+    def read(self,
+             indices: Optional[Sequence[int]] = None,
+             out: Optional[np.ndarray] = None,
+             num_workers: int = DEFAULT_READ_WORKERS,
+             progress: Optional[Progress] = None) -> np.ndarray:
+        """
+        Reads the pages into a 3D array, decoding them in parallel.
+
+        :param indices: The pages that will be read, all of them if not provided
+        :param out: Optional array the pages are written into, with an image per page
+        :param num_workers: Number of threads decoding pages concurrently
+        :param progress: Progress instance, updated once per read page
+        :return: The array with the pages
+        """
+        if indices is None:
+            indices = range(len(self._pages))
+        if out is None:
+            out = np.empty((len(indices), ) + tuple(self.image_shape), dtype=self.dtype)
+        elif out.shape[0] != len(indices) or out.shape[1:] != tuple(self.image_shape):
+            raise ValueError(f"The output array has the shape {out.shape}, "
+                             f"expected {(len(indices), ) + tuple(self.image_shape)}")
+
+        def read_one(out_idx):
+            out[out_idx] = self._pages[indices[out_idx]].asarray()
+
+        if num_workers > 1:
+            with ThreadPoolExecutor(max_workers=num_workers) as pool:
+                # map returns in order, so the progress follows the order of the pages
+                for _ in pool.map(read_one, range(len(indices))):
+                    if progress:
+                        progress.update(msg='Page')
+        else:
+            for out_idx in range(len(indices)):
+                read_one(out_idx)
+                if progress:
+                    progress.update(msg='Page')
+
+        return out
+
+
+def load_tiff_stack(filename: str,
+                    dtype=np.float32,
+                    indices=None,
+                    num_workers: int = DEFAULT_READ_WORKERS,
+                    progress: Optional[Progress] = None,
+                    stats: Optional[ThroughputStats] = None) -> Images:
+    """
+    Loads the pages of a multi-page TIFF file into a shared memory stack.
+
+    :param filename: The TIFF file
+    :param dtype: Data type of the loaded stack
+    :param indices: Optional [start, stop, step] of the pages that are loaded
+    :param num_workers: Number of threads decoding pages concurrently
+    :param progress: Progress instance, updated once per loaded page
+    :param stats: Optional throughput statistics, updated once the pages are loaded
+    :return: The loaded stack
+    """
+    with TiffStackReader(filename) as reader:
+        page_indices = range(len(reader))
+        if indices:
+            page_indices = page_indices[indices[0]:indices[1]:indices[2]]
+
+        progress = Progress.ensure_instance(progress, num_steps=len(page_indices), task_name='Load TIFF stack')
+        memory_file_name = pu.create_shared_name(filename)
+        data = pu.create_array((len(page_indices), ) + tuple(reader.image_shape), dtype, memory_file_name)
+
+        time_start = time.perf_counter()
+        with progress:
+            if data.dtype == reader.dtype:
+                reader.read(page_indices, data, num_workers, progress)
+            else:
+                # decode in slabs of the stored dtype, then convert into the stack
+                slab_size = max(1, num_workers) * 4
+                for slab_start in range(0, len(page_indices), slab_size):
+                    slab_indices = page_indices[slab_start:slab_start + slab_size]
+                    data[slab_start:slab_start + len(slab_indices)] = reader.read(slab_indices,
+                                                                                  num_workers=num_workers,
+                                                                                  progress=progress)
+
+    if stats is not None:
+        stats.add_file(filename, os.path.getsize(filename), time.perf_counter() - time_start)
+
+    return Images(data, [filename], indices, memory_filename=memory_file_name)
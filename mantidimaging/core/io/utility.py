@@ -4,7 +4,7 @@ import os
 import re
 
 from logging import getLogger
-from typing import List
+from typing import List, Optional
 
 DEFAULT_IO_FILE_FORMAT = 'tif'
 
@@ -143,3 +143,32 @@ if __name__ == '__main__':
 
 def get_prefix(path: str, separator="_"):
     return path[:path.rfind(separator)]
+
+
+def get_filesystem_type(path: str, mounts_file='/proc/mounts') -> Optional[str]:
+    """
+    Find the type of the file system that contains the path, by finding
+    the longest mount point that is a prefix of the path.
+
+    :param path: The path to be checked, does not need to exist yet
+    :param mounts_file: The mount table to be searched, Linux only
+    :return: The file system type, e.g. 'ext4' or 'nfs4', or None if it cannot be determined
+    """
+    path = os.path.abspath(os.path.expanduser(path))
+    try:
+        with open(mounts_file) as f:
+            mounts = [line.split() for line in f]
+    except OSError:
+        return None
+
+    best_mount = ''
+    fs_type = None
+    for entry in mounts:
+        if len(entry) < 3:
+            continue
+        # spaces in mount points are escaped as octal in the mount table
+        mount_point = entry[1].replace('\\040', ' ')
+        if os.path.commonpath([path, mount_point]) == mount_point and len(mount_point) > len(best_mount):
+            best_mount = mount_point
+            fs_type = entry[2]
+    return fs_type
@@ -20,3 +20,6 @@ OPERATION_NAME_TOMOPY_RECON = "tomopy_recon"
 
 OPERATION_NAME_AXES_SWAP = "axes_swap"
 SINOGRAMS = "sinograms"
+
+IO_THROUGHPUT = "io_throughput"
+QUANTISATION = "quantisation"
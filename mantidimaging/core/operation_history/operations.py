@@ -56,10 +56,7 @@ def deserialize_metadata(metadata: Dict[str, Any]) -> List[ImageOperation]:
 
 
 def ops_to_partials(filter_ops: Iterable[ImageOperation]) -> Iterable[partial]:
-    filter_funcs: Dict[str, Callable] = {
-        f.__name__: f.filter_func
-        for f in load_filter_packages(ignored_packages=['mantidimaging.core.operations.wip'])
-    }
+    filter_funcs: Dict[str, Callable] = {f.__name__: f.filter_func for f in load_filter_packages()}
     fixed_funcs = {
         const.OPERATION_NAME_AXES_SWAP: lambda img, **_: np.swapaxes(img, 0, 1),
         # const.OPERATION_NAME_TOMOPY_RECON: lambda img, **kwargs: TomopyReconWindowModel.do_recon(img, **kwargs),
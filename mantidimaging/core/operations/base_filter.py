@@ -1,24 +1,67 @@
+from dataclasses import dataclass
+from enum import Enum
 from functools import partial
-from typing import TYPE_CHECKING, Any, Callable, Dict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
 
 import numpy as np
 
 from mantidimaging.core.data import Images
+from mantidimaging.core.parallel import autotune
+from mantidimaging.core.parallel import shared_mem as psm
+from mantidimaging.core.parallel import utility as pu
+from mantidimaging.core.utility.memory_usage import get_system_memory_linux
+from mantidimaging.core.utility.progress_reporting import Progress
 
 if TYPE_CHECKING:
     from PyQt5.QtWidgets import QFormLayout, QWidget  # noqa: F401
     from mantidimaging.gui.mvp_base import BaseMainWindowView
 
 
+class FilterAxis(Enum):
+    # works on every pixel on its own, whatever the orientation of the stack
+    NONE = 'none'
+    # works on each 2D image of the stack, e.g. the projections, or the slices of a reconstruction
+    PROJECTION = 'projection'
+    # works on the sinograms, the stack can be in either orientation
+    SINOGRAM = 'sinogram'
+
+
+@dataclass(frozen=True)
+class FilterTraits:
+    """
+    How a filter uses the data, used to schedule it and to plan its memory use.
+
+    The defaults are the most conservative, each filter declares its own traits.
+    """
+    # the stack is modified in place, instead of being replaced by a new array
+    in_place: bool = False
+    # every image is processed independently of the others, once any statistics of the whole stack
+    # are computed, so the stack can be split into slabs of images between workers
+    per_image: bool = False
+    # the filter first computes statistics of the whole stack, e.g. its range, so applying it to
+    # separate parts of the stack would give a different result
+    stack_statistics: bool = False
+    axis: FilterAxis = FilterAxis.PROJECTION
+    # the processing of separate slabs can run concurrently in threads of the same process
+    thread_safe: bool = False
+    # the shape of the stack can change, see BaseFilter.output_shape
+    resizes: bool = False
+    # the peak memory used by the filter, as a multiple of the size of the stack, including the stack
+    memory_multiplier: float = 2.0
+
+
 class BaseFilter:
     filter_name = "Unnamed Filter"
     __name__ = "BaseFilter"
     """
     The base class for filter algorithms, which should extend this class.
 
-    All of this classes methods must be overridden, except sv_params and the do_before and do_after wrappers
-    which are optional.
+    All of this classes methods must be overridden, except sv_params, filter_slab, output_shape,
+    estimate_peak_memory and the do_before and do_after wrappers which are optional.
+    Every filter declares its traits.
     """
+    traits = FilterTraits()
+
     @staticmethod
     def filter_func(data: Images) -> Images:
         """
@@ -33,6 +76,133 @@ class BaseFilter:
         raise_not_implemented("filter_func")
         return Images(np.asarray([]))
 
+    @staticmethod
+    def filter_slab(data: np.ndarray, **kwargs) -> None:
+        """
+        Optional. Applies the filter in place to a slab of consecutive images, as a single 3D array,
+        so that numpy vectorises across the images instead of the filter being called once per image.
+
+        Filters implementing this call execute_slabs from filter_func, the others process the
+        images one by one.
+
+        :param data: A contiguous slab of images of the stack, modified in place
+        :param kwargs: any additional arguments which the specific filter uses
+        """
+        raise_not_implemented("filter_slab")
+
+    @classmethod
+    def has_filter_slab(cls) -> bool:
+        """
+        :return: Whether the filter implements filter_slab, and can be run with execute_slabs
+        """
+        return cls.filter_slab is not BaseFilter.filter_slab
+
+    @classmethod
+    def output_shape(cls, shape: Tuple[int, ...], **kwargs) -> Tuple[int, ...]:
+        """
+        :param shape: The shape of the stack the filter is applied to
+        :param kwargs: The arguments of filter_func
+        :return: The shape of the stack after the filter, only resizing filters change it
+        """
+        return tuple(shape)
+
+    @classmethod
+    def estimate_peak_memory(cls, shape: Tuple[int, ...], dtype, **kwargs) -> int:
+        """
+        :param shape: The shape of the stack the filter is applied to
+        :param dtype: The type of the stack
+        :param kwargs: The arguments of filter_func
+        :return: The number of bytes used by the stack and its copies at the peak of the filter
+        """
+        itemsize = np.dtype(dtype).itemsize
+        nbytes = int(np.prod(shape)) * itemsize
+        if cls.traits.resizes:
+            # the input is kept until the output is filled
+            return nbytes + int(np.prod(cls.output_shape(shape, **kwargs))) * itemsize
+        return int(nbytes * cls.traits.memory_multiplier)
+
+    @classmethod
+    def check_memory(cls, shape: Tuple[int, ...], dtype, **kwargs) -> Optional[int]:
+        """
+        Refuses to run the filter if the memory it needs on top of the stack, which is already
+        allocated, is more than the memory available on the system. A filter that copies the images
+        it processes and that can be applied to parts of the stack is instead applied to slabs of
+        images that fit, one after the other.
+
+        :raises MemoryError: If there is not enough memory available
+        :return: The number of images to apply the filter to at a time, None to apply it to the whole stack
+        """
+        # imported here as the planner looks up the filters
+        from mantidimaging.core.utility.memory_planner import ExecutionMode, plan_memory
+
+        system_memory = get_system_memory_linux()
+        if system_memory is None:
+            return None
+        _, available = system_memory
+        plan = plan_memory(shape,
+                           dtype, [(cls, kwargs)],
+                           loaded_bytes=int(np.prod(shape)) * np.dtype(dtype).itemsize,
+                           available_bytes=available)
+        if plan.mode == ExecutionMode.SLABS:
+            return plan.slab_size
+        if not plan.fits:
+            raise MemoryError(f"{cls.filter_name} can not be applied to the stack. {plan.summary()}")
+        return None
+
+    @classmethod
+    def execute_slabs(cls,
+                      data: np.ndarray,
+                      slab_size: Optional[int] = None,
+                      cores: Optional[int] = None,
+                      progress: Optional[Progress] = None,
+                      shared_kwargs: Optional[Dict[str, np.ndarray]] = None,
+                      backend: Optional[str] = None,
+                      **kwargs) -> np.ndarray:
+        """
+        Runs filter_slab over slabs of the stack, in parallel, in place. Filters that do not
+        implement filter_slab are refused before any worker is started.
+
+        If none of the slab size, cores and backend are provided, the settings autotuned for the
+        filter and the images on this host are used, see parallel.autotune.
+
+        :param data: The shared array of the stack
+        :param slab_size: Number of images in each slab, picked from the size of the images if not provided
+        :param cores: The number of cores that will be used to process the data
+        :param progress: Progress instance, updated once per slab
+        :param shared_kwargs: Large arrays forwarded to filter_slab, which are inherited by the processes
+                              instead of being copied for every slab
+        :param backend: Run the slabs in processes or in threads, processes if not provided. Threads are
+                        only used for thread safe filters
+        :param kwargs: The arguments forwarded to filter_slab
+        :return: The processed stack
+        """
+        if not cls.has_filter_slab():
+            raise ValueError(f"{cls.filter_name} does not implement filter_slab")
+        if not cls.traits.per_image:
+            raise ValueError(f"{cls.filter_name} does not process the images independently, "
+                             "it can not be split into slabs")
+        if slab_size is None and not cores and backend is None:
+            tuned = autotune.tuned_settings(cls, data, shared_kwargs, kwargs)
+            if tuned is not None:
+                slab_size, cores, backend = tuned.slab_size, tuned.cores, tuned.backend
+        if not cores:
+            cores = pu.get_cores()
+        if slab_size is None:
+            # any copies made by the filter are part of the slab held in memory
+            slab_size = pu.calculate_slab_size(data.shape, int(data.itemsize * max(1., cls.traits.memory_multiplier)),
+                                               cores)
+        if backend is None or not cls.traits.thread_safe:
+            backend = pu.BACKEND_PROCESSES
+        return psm.execute_slabs(data,
+                                 cls.filter_slab,
+                                 slab_size,
+                                 cores=cores,
+                                 progress=progress,
+                                 msg=cls.filter_name,
+                                 shared_kwargs=shared_kwargs,
+                                 backend=backend,
+                                 **kwargs)
+
     @staticmethod
     def execute_wrapper(args) -> partial:  # type: ignore
         """
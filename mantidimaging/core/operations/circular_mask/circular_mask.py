@@ -1,14 +1,18 @@
 from functools import partial
 
 from mantidimaging.core.data import Images
-from mantidimaging.core.operations.base_filter import BaseFilter
-from mantidimaging.core.tools import importer
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
+from mantidimaging.core.utility.circular_mask import apply_circular_mask
 from mantidimaging.core.utility.progress_reporting import Progress
-from mantidimaging.gui.utility.qt_helpers import Type
 
 
 class CircularMaskFilter(BaseFilter):
     filter_name = "Circular Mask"
+    traits = FilterTraits(in_place=True,
+                          per_image=True,
+                          axis=FilterAxis.PROJECTION,
+                          thread_safe=True,
+                          memory_multiplier=1.0)
 
     @staticmethod
     def filter_func(data: Images,
@@ -25,23 +29,18 @@ class CircularMaskFilter(BaseFilter):
 
         :return: The processed 3D numpy.ndarray
         """
-        progress = Progress.ensure_instance(progress, num_steps=1, task_name='Circular Mask')
+        progress = Progress.ensure_instance(progress, task_name='Circular Mask')
 
         if circular_mask_ratio and 0 < circular_mask_ratio < 1:
-            tomopy = importer.do_importing('tomopy')
-
             with progress:
-                progress.update(msg="Applying circular mask")
-
-                # for some reason this doesn't like the ncore param, even though
-                # it's in the official tomopy docs
-                tomopy.circ_mask(arr=data.data, axis=0, ratio=circular_mask_ratio, val=circular_mask_value, ncore=cores)
+                apply_circular_mask(data.data, circular_mask_ratio, circular_mask_value, cores, progress)
 
         return data
 
     @staticmethod
     def register_gui(form, on_change, view):
         from mantidimaging.gui.utility import add_property_to_form
+        from mantidimaging.gui.utility.qt_helpers import Type
 
         _, radius_field = add_property_to_form('Radius', Type.FLOAT, 0.95, (0.0, 1.0), form=form, on_change=on_change)
 
@@ -1,12 +1,18 @@
 from functools import partial
 
 from mantidimaging.core.data import Images
-from mantidimaging.core.operations.base_filter import BaseFilter
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
 from mantidimaging.core.utility.progress_reporting import Progress
 
 
 class ClipValuesFilter(BaseFilter):
     filter_name = "Clip Values"
+    traits = FilterTraits(in_place=True,
+                          per_image=True,
+                          stack_statistics=True,
+                          axis=FilterAxis.NONE,
+                          thread_safe=True,
+                          memory_multiplier=1.0)
 
     @staticmethod
     def filter_func(data,
@@ -14,6 +20,7 @@ class ClipValuesFilter(BaseFilter):
                     clip_max=None,
                     clip_min_new_value=None,
                     clip_max_new_value=None,
+                    cores=None,
                     progress=None) -> Images:
         """
         Clip values below the min and above the max pixels.
@@ -53,13 +60,23 @@ class ClipValuesFilter(BaseFilter):
 
                 progress.update(msg=f"Clipping data with values min {clip_min} and max {clip_max}")
 
-                # this is the fastest way to clip the values, np.clip does not do
-                # the clipping in place and ends up copying the data
-                sample[sample < clip_min] = clip_min_new_value
-                sample[sample > clip_max] = clip_max_new_value
+                ClipValuesFilter.execute_slabs(sample,
+                                               cores=cores,
+                                               progress=progress,
+                                               clip_min=clip_min,
+                                               clip_max=clip_max,
+                                               clip_min_new_value=clip_min_new_value,
+                                               clip_max_new_value=clip_max_new_value)
 
         return data
 
+    @staticmethod
+    def filter_slab(data, clip_min, clip_max, clip_min_new_value, clip_max_new_value):
+        # this is the fastest way to clip the values, np.clip does not do
+        # the clipping in place and ends up copying the data
+        data[data < clip_min] = clip_min_new_value
+        data[data > clip_max] = clip_max_new_value
+
     @staticmethod
     def register_gui(form, on_change, view):
         from mantidimaging.gui.utility import add_property_to_form
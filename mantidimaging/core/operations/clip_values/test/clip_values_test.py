@@ -1,10 +1,12 @@
 import unittest
 from unittest import mock
 
+import numpy as np
 import numpy.testing as npt
 
 import mantidimaging.test_helpers.unit_test_helper as th
 from mantidimaging.core.operations.clip_values import ClipValuesFilter
+from mantidimaging.core.operations.gaussian import GaussianFilter
 from mantidimaging.core.utility.memory_usage import get_memory_usage_linux
 
 
@@ -51,6 +53,23 @@ class ClipValuesFilterTest(unittest.TestCase):
         npt.assert_approx_equal(result.data.min(), 0.1)
         npt.assert_approx_equal(result.data.max(), 0.9)
 
+    def test_execute_slabs_parallel(self):
+        images = th.generate_images((40, 8, 8))
+        expected = np.where(images.data < 0.2, 0.1, np.where(images.data > 0.8, 0.9, images.data))
+
+        ClipValuesFilter.filter_func(images,
+                                     clip_min=0.2,
+                                     clip_max=0.8,
+                                     clip_min_new_value=0.1,
+                                     clip_max_new_value=0.9,
+                                     cores=2)
+
+        npt.assert_equal(images.data, expected)
+
+    def test_has_filter_slab(self):
+        self.assertTrue(ClipValuesFilter.has_filter_slab())
+        self.assertFalse(GaussianFilter.has_filter_slab())
+
     def test_execute_min_max_no_new_values(self):
         images = th.generate_images()
         result = ClipValuesFilter().filter_func(images,
@@ -1,21 +1,29 @@
 from functools import partial
 from typing import Dict, Any, Union, Optional, List
 
+import numpy as np
+
 from mantidimaging import helper as h
 from mantidimaging.core.data import Images
-from mantidimaging.core.operations.base_filter import BaseFilter
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
 from mantidimaging.core.parallel import utility as pu
+from mantidimaging.core.utility.memory_usage import get_system_memory_linux
 from mantidimaging.core.utility.progress_reporting import Progress
 from mantidimaging.core.utility.sensible_roi import SensibleROI
-from mantidimaging.gui.windows.stack_visualiser.presenter import SVParameters
+
+# A deferred crop is compacted straight away when less than this fraction of the system memory is available
+MINIMUM_AVAILABLE_MEMORY_FRACTION = 0.2
 
 
 class CropCoordinatesFilter(BaseFilter):
     filter_name = "Crop Coordinates"
+    # a deferred crop is a view of the stack, see estimate_peak_memory
+    traits = FilterTraits(per_image=True, axis=FilterAxis.PROJECTION, thread_safe=True, resizes=True)
 
     @staticmethod
     def filter_func(images: Images,
                     region_of_interest: Optional[Union[List[int], List[float], SensibleROI]] = None,
+                    deferred=False,
                     progress=None) -> Images:
         """
         Execute the Crop Coordinates by Region of Interest filter.
@@ -33,6 +41,11 @@ class CropCoordinatesFilter(BaseFilter):
                                    The selection is a rectangle and expected order
                                    is - Left Top Right Bottom.
 
+        :param deferred: Crop to a view of the original memory instead of copying the data,
+                         which takes no time, e.g. when trying out several crops of a large stack.
+                         The copy is deferred until it is needed, see Images.compact, or done
+                         straight away if the system is low on memory.
+
         :return: The processed 3D numpy.ndarray
         """
 
@@ -45,6 +58,12 @@ class CropCoordinatesFilter(BaseFilter):
 
         h.check_data_stack(images)
 
+        if deferred:
+            images.crop_view(region_of_interest)
+            if _low_on_memory():
+                images.compact()
+            return images
+
         sample = images.data
         shape = (sample.shape[0], region_of_interest.height, region_of_interest.width)
         sample_name = images.memory_filename
@@ -55,21 +74,54 @@ class CropCoordinatesFilter(BaseFilter):
 
         return images
 
+    @classmethod
+    def output_shape(cls, shape, region_of_interest=None, **kwargs):
+        if region_of_interest is None:
+            region_of_interest = SensibleROI.from_list([0, 0, 50, 50])
+        if isinstance(region_of_interest, list):
+            region_of_interest = SensibleROI.from_list(region_of_interest)
+        return shape[0], region_of_interest.height, region_of_interest.width
+
+    @classmethod
+    def estimate_peak_memory(cls, shape, dtype, deferred=False, **kwargs):
+        if deferred:
+            return int(np.prod(shape)) * np.dtype(dtype).itemsize
+        return super().estimate_peak_memory(shape, dtype, **kwargs)
+
     @staticmethod
     def register_gui(form, on_change, view):
         from mantidimaging.gui.utility import add_property_to_form
+        from mantidimaging.gui.utility.qt_helpers import Type
 
         add_property_to_form('Select ROI on stack visualiser.', 'label', form=form)
+        _, deferred_field = add_property_to_form('Defer copy',
+                                                 Type.BOOL,
+                                                 default_value=False,
+                                                 tooltip='Crop without copying the data, until another '
+                                                 'operation or saving needs it',
+                                                 form=form,
+                                                 on_change=on_change)
 
-        return {}
+        return {'deferred_field': deferred_field}
 
     @staticmethod
     def sv_params() -> Dict[str, Any]:
+        from mantidimaging.gui.windows.stack_visualiser.presenter import SVParameters
+
         return {'region_of_interest': SVParameters.ROI}
 
     @staticmethod
-    def execute_wrapper(*args) -> partial:
-        return partial(CropCoordinatesFilter.filter_func)
+    def execute_wrapper(deferred_field=None) -> partial:
+        deferred = deferred_field.isChecked() if deferred_field is not None else False
+        return partial(CropCoordinatesFilter.filter_func, deferred=deferred)
+
+
+def _low_on_memory() -> bool:
+    memory = get_system_memory_linux()
+    if memory is None:
+        return False
+    total, available = memory
+    return available < MINIMUM_AVAILABLE_MEMORY_FRACTION * total
 
 
 def execute_single(data, roi, progress=None, out=None):
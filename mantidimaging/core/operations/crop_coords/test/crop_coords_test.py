@@ -1,5 +1,7 @@
 import unittest
+from unittest import mock
 
+import numpy as np
 import numpy.testing as npt
 
 import mantidimaging.test_helpers.unit_test_helper as th
@@ -44,6 +46,36 @@ class CropCoordsTest(unittest.TestCase):
         th.assert_not_equals(result.data, sample)
         images.free_memory()
 
+    def test_executed_deferred(self):
+        roi = SensibleROI.from_list([1, 1, 5, 5])
+        images = th.generate_images(automatic_free=False)
+        sample = images.data
+        expected = np.copy(sample[:, 1:5, 1:5])
+
+        with mock.patch('mantidimaging.core.operations.crop_coords.crop_coords._low_on_memory', return_value=False):
+            result = CropCoordinatesFilter.filter_func(images, roi, deferred=True)
+
+        # a view of the uncropped data, without a copy
+        self.assertTrue(np.shares_memory(result.data, sample))
+        self.assertEqual(result.deferred_crop, roi)
+        npt.assert_equal(result.data, expected)
+
+        result.compact()
+        npt.assert_equal(result.data, expected)
+        self.assertIsNone(result.deferred_crop)
+        images.free_memory()
+
+    def test_deferred_compacted_when_low_on_memory(self):
+        roi = SensibleROI.from_list([1, 1, 5, 5])
+        images = th.generate_images(automatic_free=False)
+
+        with mock.patch('mantidimaging.core.operations.crop_coords.crop_coords._low_on_memory', return_value=True):
+            result = CropCoordinatesFilter.filter_func(images, roi, deferred=True)
+
+        self.assertIsNone(result.deferred_crop)
+        npt.assert_equal(result.data.shape, (10, 4, 4))
+        images.free_memory()
+
     def test_memory_change_acceptable(self):
         """
         Expected behaviour for the filter is to be done in place
@@ -79,6 +111,13 @@ class CropCoordsTest(unittest.TestCase):
         CropCoordinatesFilter.execute_wrapper()(images, [1, 1, 5, 5])
         images.free_memory()
 
+        deferred_field = mock.Mock()
+        deferred_field.isChecked = mock.Mock(return_value=True)
+        images = th.generate_images(automatic_free=False)
+        CropCoordinatesFilter.execute_wrapper(deferred_field)(images, [1, 1, 5, 5])
+        self.assertEqual(deferred_field.isChecked.call_count, 1)
+        images.free_memory()
+
 
 if __name__ == '__main__':
     unittest.main()
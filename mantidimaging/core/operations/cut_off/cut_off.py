@@ -2,15 +2,21 @@ from functools import partial
 
 import numpy as np
 
-from mantidimaging.core.operations.base_filter import BaseFilter
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
 from mantidimaging.core.utility.progress_reporting import Progress
 
 
 class CutOffFilter(BaseFilter):
     filter_name = 'Intensity Cut Off'
+    traits = FilterTraits(in_place=True,
+                          per_image=True,
+                          stack_statistics=True,
+                          axis=FilterAxis.NONE,
+                          thread_safe=True,
+                          memory_multiplier=1.0)
 
     @staticmethod
-    def filter_func(data, threshold=None, progress=None):
+    def filter_func(data, threshold=None, cores=None, progress=None):
         """
         Cut off values above threshold relative to the max pixels.
 
@@ -31,10 +37,14 @@ class CutOffFilter(BaseFilter):
 
                 rel_cut_off = dmin + threshold * (dmax - dmin)
 
-                np.minimum(sample, rel_cut_off, out=sample)
+                CutOffFilter.execute_slabs(sample, cores=cores, progress=progress, cut_off=rel_cut_off)
 
         return data
 
+    @staticmethod
+    def filter_slab(data, cut_off):
+        np.minimum(data, cut_off, out=data)
+
     @staticmethod
     def register_gui(form, on_change, view):
         from mantidimaging.gui.utility import add_property_to_form
@@ -1,34 +1,42 @@
 from functools import partial
 from typing import Union, Callable, Dict, Any, TYPE_CHECKING
 
-from PyQt5.QtWidgets import QFormLayout, QDoubleSpinBox
+import numpy as np
 
 from mantidimaging import helper as h
 from mantidimaging.core.data import Images
-from mantidimaging.core.operations.base_filter import BaseFilter
-from mantidimaging.gui.mvp_base import BasePresenter
-from mantidimaging.gui.utility.qt_helpers import Type
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
+from mantidimaging.core.utility.progress_reporting import Progress
 
 if TYPE_CHECKING:
-    from PyQt5.QtWidgets import QWidget
+    from PyQt5.QtWidgets import QFormLayout, QDoubleSpinBox, QWidget
+    from mantidimaging.gui.mvp_base import BasePresenter
 
 
 class DivideFilter(BaseFilter):
     filter_name = "Divide"
+    traits = FilterTraits(in_place=True, per_image=True, axis=FilterAxis.NONE, thread_safe=True, memory_multiplier=1.0)
 
     @staticmethod
-    def filter_func(images: Images, value: Union[int, float] = 0e7, unit="micron", progress=None) -> Images:
+    def filter_func(images: Images, value: Union[int, float] = 0e7, unit="micron", cores=None, progress=None) -> Images:
         if unit == "micron":
             value *= 1e-4
 
         h.check_data_stack(images)
         if value != 0e7 or value != -0e7:
-            images.data /= value
+            progress = Progress.ensure_instance(progress, task_name='Divide')
+            with progress:
+                DivideFilter.execute_slabs(images.data, cores=cores, progress=progress, value=value)
         return images
 
+    @staticmethod
+    def filter_slab(data, value):
+        np.true_divide(data, value, out=data)
+
     @staticmethod
     def register_gui(form: 'QFormLayout', on_change: Callable, view: 'BasePresenter') -> Dict[str, 'QWidget']:
         from mantidimaging.gui.utility import add_property_to_form
+        from mantidimaging.gui.utility.qt_helpers import Type
 
         _, value_widget = add_property_to_form("Divide by", Type.FLOAT, form=form, on_change=on_change)
         assert value_widget is not None, "Requested widget was for FLOAT, got None instead"
@@ -42,7 +50,7 @@ class DivideFilter(BaseFilter):
         return {'value_widget': value_widget}
 
     @staticmethod
-    def execute_wrapper(value_widget: QDoubleSpinBox) -> partial:
+    def execute_wrapper(value_widget: 'QDoubleSpinBox') -> partial:
         value = value_widget.value()
         return partial(DivideFilter.filter_func, value=value)
 
@@ -1,30 +1,42 @@
 from functools import partial
-from typing import Any, Dict
+from typing import Any, Dict, TYPE_CHECKING
 
 import numpy as np
 
 from mantidimaging import helper as h
 from mantidimaging.core.data import Images
-from mantidimaging.core.operations.base_filter import BaseFilter
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
 from mantidimaging.core.parallel import two_shared_mem as ptsm
 from mantidimaging.core.parallel import utility as pu
 from mantidimaging.core.utility.progress_reporting import Progress
-from mantidimaging.gui.utility.qt_helpers import Type
-from mantidimaging.gui.widgets.stack_selector import StackSelectorWidgetView
-from mantidimaging.gui.windows.operations import FiltersWindowView
+
+if TYPE_CHECKING:
+    from mantidimaging.gui.windows.operations import FiltersWindowView
+    from mantidimaging.gui.widgets.stack_selector import StackSelectorWidgetView
 
 # The smallest and largest allowed pixel value
 MINIMUM_PIXEL_VALUE = 1e-9
 MAXIMUM_PIXEL_VALUE = 1e9
 
+AVERAGE_MEAN = 'Mean'
+AVERAGE_MEDIAN = 'Median'
+AVERAGE_METHODS = [AVERAGE_MEAN, AVERAGE_MEDIAN]
+
 
 class FlatFieldFilter(BaseFilter):
     filter_name = 'Flat-fielding'
+    traits = FilterTraits(in_place=True,
+                          per_image=True,
+                          axis=FilterAxis.PROJECTION,
+                          thread_safe=True,
+                          memory_multiplier=1.0)
 
     @staticmethod
     def filter_func(data: Images,
                     flat: Images = None,
                     dark: Images = None,
+                    average: str = AVERAGE_MEAN,
+                    minus_log: bool = False,
                     cores=None,
                     chunksize=None,
                     progress=None) -> Images:
@@ -34,8 +46,9 @@ class FlatFieldFilter(BaseFilter):
         :param data: Sample data which is to be processed. Expected in radiograms
         :param flat: Flat (open beam) image to use in normalization
         :param dark: Dark image to use in normalization
-        :param clip_min: After normalisation, clip any pixels under this value.
-        :param clip_max: After normalisation, clip any pixels over this value.
+        :param average: How the flat and dark stacks are averaged into a single image, 'Mean' or 'Median'
+        :param minus_log: Also convert the result from transmission to attenuation, in the same pass.
+                          The transmission is clipped to [MINIMUM_PIXEL_VALUE, MAXIMUM_PIXEL_VALUE] first.
         :param cores: The number of cores that will be used to process the data.
         :param chunksize: The number of chunks that each worker will receive.
         :return: Filtered data (stack of images)
@@ -43,8 +56,8 @@ class FlatFieldFilter(BaseFilter):
         h.check_data_stack(data)
 
         if flat is not None and dark is not None:
-            flat_avg = flat.data.mean(axis=0)
-            dark_avg = dark.data.mean(axis=0)
+            flat_avg = _average_images(flat.data, average, cores, chunksize)
+            dark_avg = _average_images(dark.data, average, cores, chunksize)
             if 2 != flat_avg.ndim or 2 != dark_avg.ndim:
                 raise ValueError(
                     f"Incorrect shape of the flat image ({flat_avg.shape}) or dark image ({dark_avg.shape}) \
@@ -57,16 +70,37 @@ class FlatFieldFilter(BaseFilter):
             progress = Progress.ensure_instance(progress,
                                                 num_steps=data.data.shape[0],
                                                 task_name='Background Correction')
-            _execute(data.data, flat_avg, dark_avg, cores, chunksize, progress)
+            _execute(data.data, flat_avg, dark_avg, cores, chunksize, progress, minus_log)
 
         h.check_data_stack(data)
         return data
 
     @staticmethod
-    def register_gui(form, on_change, view: FiltersWindowView) -> Dict[str, Any]:
+    def filter_slab(data, dark, norm_divide, minus_log=False):
+        """
+        Computes (data - dark) / (flat - dark), and optionally -log of the clipped result,
+        in place, one cache sized block of rows of each image at a time.
+
+        :param data: A slab of images
+        :param dark: The dark image
+        :param norm_divide: The (flat - dark) image
+        :param minus_log: Also take -log of the result
+        """
+        for rows, block in pu.row_blocks(data, pu.ROW_BLOCK_BYTES):
+            np.subtract(block, dark[rows], out=block)
+            np.true_divide(block, norm_divide[rows], out=block)
+            if minus_log:
+                np.clip(block, MINIMUM_PIXEL_VALUE, MAXIMUM_PIXEL_VALUE, out=block)
+                np.log(block, out=block)
+                np.negative(block, out=block)
+
+    @staticmethod
+    def register_gui(form, on_change, view: 'FiltersWindowView') -> Dict[str, Any]:
         from mantidimaging.gui.utility import add_property_to_form
+        from mantidimaging.gui.utility.qt_helpers import Type
+        from mantidimaging.gui.widgets.stack_selector import StackSelectorWidgetView
 
-        def try_to_select_relevant_stack(name: str, widget: StackSelectorWidgetView) -> None:
+        def try_to_select_relevant_stack(name: str, widget: 'StackSelectorWidgetView') -> None:
             for i in range(widget.count()):
                 if name.lower() in widget.itemText(i).lower():
                     widget.setCurrentIndex(i)
@@ -85,22 +119,45 @@ class FlatFieldFilter(BaseFilter):
         dark_widget.subscribe_to_main_window(view.main_window)
         try_to_select_relevant_stack("Dark", dark_widget)
 
+        _, average_widget = add_property_to_form("Flat/Dark average",
+                                                 Type.CHOICE,
+                                                 valid_values=AVERAGE_METHODS,
+                                                 form=form,
+                                                 on_change=on_change)
+        _, minus_log_widget = add_property_to_form("Apply -log",
+                                                   Type.BOOL,
+                                                   default_value=False,
+                                                   tooltip="Convert to attenuation in the same pass over the data",
+                                                   form=form,
+                                                   on_change=on_change)
+
         return {
             'flat_widget': flat_widget,
             'dark_widget': dark_widget,
+            'average_widget': average_widget,
+            'minus_log_widget': minus_log_widget,
         }
 
     @staticmethod
     def execute_wrapper(  # type: ignore
-            flat_widget: StackSelectorWidgetView, dark_widget: StackSelectorWidgetView) -> partial:
+            flat_widget: 'StackSelectorWidgetView',
+            dark_widget: 'StackSelectorWidgetView',
+            average_widget=None,
+            minus_log_widget=None) -> partial:
         flat_stack = flat_widget.main_window.get_stack_visualiser(flat_widget.current())
         flat_images = flat_stack.presenter.images
         dark_stack = dark_widget.main_window.get_stack_visualiser(dark_widget.current())
         dark_images = dark_stack.presenter.images
-        return partial(FlatFieldFilter.filter_func, flat=flat_images, dark=dark_images)
+        return partial(FlatFieldFilter.filter_func,
+                       flat=flat_images,
+                       dark=dark_images,
+                       average=average_widget.currentText() if average_widget is not None else AVERAGE_MEAN,
+                       minus_log=minus_log_widget.isChecked() if minus_log_widget is not None else False)
 
     @staticmethod
     def validate_execute_kwargs(kwargs):
+        from mantidimaging.gui.widgets.stack_selector import StackSelectorWidgetView
+
         # Validate something is in both path text inputs
         if 'flat_widget' not in kwargs or 'dark_widget' not in kwargs:
             return False
@@ -109,52 +166,53 @@ class FlatFieldFilter(BaseFilter):
         return True
 
 
-def _divide(data, norm_divide):
-    np.true_divide(data, norm_divide, out=data)
+def _average_images(stack: np.ndarray, method: str = AVERAGE_MEAN, cores=None, chunksize=None) -> np.ndarray:
+    """
+    Averages a stack into a single image, in parallel over the rows of the images.
 
+    :param stack: The stack of flat or dark images
+    :param method: 'Mean' or 'Median'
+    :return: The averaged image
+    """
+    if method not in AVERAGE_METHODS:
+        raise ValueError(f"Unknown average method '{method}', expected one of {AVERAGE_METHODS}")
+    reduce_func = np.mean if method == AVERAGE_MEAN else np.median
+    out_dtype = reduce_func(stack[:1, :1, :1], axis=0).dtype
 
-def _subtract(data, dark=None):
-    # specify out to do in place, otherwise the data is copied
-    np.subtract(data, dark, out=data)
+    average: np.ndarray
+    with pu.temp_shared_array((stack.shape[1], stack.shape[2]), out_dtype) as average:
+        # every row of the output is the average of the same row across all images,
+        # which is the average of the sinogram of that row
+        f = ptsm.create_partial(reduce_func, fwd_function=ptsm.return_to_second_but_dont_use_it, axis=0)
+        ptsm.execute(np.swapaxes(stack, 0, 1), average, f, cores, chunksize, msg="Averaging")
+        return np.array(average)
 
 
-def _execute(data, flat=None, dark=None, cores=None, chunksize=None, progress=None):
+def _execute(data, flat=None, dark=None, cores=None, chunksize=None, progress=None, minus_log=False):
     """
-    A benchmark justifying the current implementation, performed on
-    500x2048x2048 images.
-
-    #1 Separate runs
-    Subtract (sequential with np.subtract(data, dark, out=data)) - 13s
-    Divide (par) - 1.15s
-
-    #2 Separate parallel runs
-    Subtract (par) - 5.5s
-    Divide (par) - 1.15s
+    Applies the background correction, and optionally the minus log, with a single
+    parallel pass over the data.
 
-    #3 Added subtract into _divide so that it is:
-                np.true_divide(
-                    np.subtract(data, dark, out=data), norm_divide, out=data)
-    Subtract then divide (par) - 55s
+    Each slab of images is worked through in blocks of rows that fit in the cache, so all
+    the operations are done for the cost of reading and writing the data once, instead of
+    streaming every full image through memory once for every operation.
     """
     with progress:
         progress.update(msg="Applying background correction")
 
-        with pu.temp_shared_array((1, data.shape[1], data.shape[2]), data.dtype) as norm_divide:
-            # remove a dimension, I found this to be the easiest way to do it
-            norm_divide = norm_divide.reshape(data.shape[1], data.shape[2])
-
-            # subtract dark from flat and copy into shared array with [:]
-            norm_divide[:] = np.subtract(flat, dark)
-
-            # prevent divide-by-zero issues, and negative pixels make no sense
-            norm_divide[norm_divide == 0] = MINIMUM_PIXEL_VALUE
-
-            # subtract the dark from all images
-            f = ptsm.create_partial(_subtract, fwd_function=ptsm.inplace_second_2d)
-            data, dark = ptsm.execute(data, dark, f, cores, chunksize, progress=progress)
-
-            # divide the data by (flat - dark)
-            f = ptsm.create_partial(_divide, fwd_function=ptsm.inplace_second_2d)
-            data, norm_divide = ptsm.execute(data, norm_divide, f, cores, chunksize, progress=progress)
+        dark = np.asarray(dark, dtype=data.dtype)
+        norm_divide = np.subtract(flat, dark, dtype=data.dtype)
+        # prevent divide-by-zero issues, and negative pixels make no sense
+        norm_divide[norm_divide == 0] = MINIMUM_PIXEL_VALUE
+
+        # the dark and flat images are inherited by the processes, instead of being copied for every slab
+        FlatFieldFilter.execute_slabs(data,
+                                      cores=cores,
+                                      progress=progress,
+                                      shared_kwargs={
+                                          'dark': dark,
+                                          'norm_divide': norm_divide
+                                      },
+                                      minus_log=minus_log)
 
     return data
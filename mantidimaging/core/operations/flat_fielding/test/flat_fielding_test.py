@@ -8,6 +8,7 @@ import numpy.testing as npt
 import mantidimaging.test_helpers.unit_test_helper as th
 from mantidimaging.core.data import Images
 from mantidimaging.core.operations.flat_fielding import FlatFieldFilter
+from mantidimaging.core.operations.flat_fielding import flat_fielding
 
 
 class FlatFieldingTest(unittest.TestCase):
@@ -42,6 +43,39 @@ class FlatFieldingTest(unittest.TestCase):
 
         npt.assert_almost_equal(result.data, expected, 7)
 
+    def test_fused_minus_log(self):
+        images, flat, dark = self._make_images()
+        # a dark brighter than the sample gives negative transmission, which is clipped before the log
+        dark.data[:, 0, 0] = 2
+        sample = np.copy(images.data)
+        expected = (sample - dark.data.mean(axis=0)) / (flat.data.mean(axis=0) - dark.data.mean(axis=0))
+        expected = -np.log(np.clip(expected, flat_fielding.MINIMUM_PIXEL_VALUE, flat_fielding.MAXIMUM_PIXEL_VALUE))
+
+        result = FlatFieldFilter.filter_func(images, flat, dark, minus_log=True)
+
+        npt.assert_allclose(result.data, expected, rtol=1e-5)
+        self.assertTrue(np.isfinite(result.data).all())
+
+    def test_average_images(self):
+        flat = th.generate_images((5, 20, 30))
+
+        npt.assert_equal(flat_fielding._average_images(flat.data, flat_fielding.AVERAGE_MEAN), flat.data.mean(axis=0))
+        npt.assert_equal(flat_fielding._average_images(flat.data, flat_fielding.AVERAGE_MEDIAN),
+                         np.median(flat.data, axis=0))
+        self.assertRaises(ValueError, flat_fielding._average_images, flat.data, 'Mode')
+
+    def test_median_average(self):
+        images, flat, dark = self._make_images()
+        images.data[:] = 26.
+        flat.data[:] = 7.
+        # the median ignores the single bright image
+        flat.data[0] = 100.
+        dark.data[:] = 6.
+
+        result = FlatFieldFilter.filter_func(images, flat, dark, average=flat_fielding.AVERAGE_MEDIAN)
+
+        npt.assert_almost_equal(result.data, 20., 7)
+
     def test_execute_wrapper_return_is_runnable(self):
         """
         Test that the partial returned by execute_wrapper can be executed (kwargs are named correctly)
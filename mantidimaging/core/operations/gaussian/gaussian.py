@@ -1,22 +1,44 @@
-from functools import partial
+from functools import lru_cache, partial
 from logging import getLogger
 
+import numpy as np
+import scipy.fft
 import scipy.ndimage as scipy_ndimage
 
 from mantidimaging import helper as h
 from mantidimaging.core.data import Images
-from mantidimaging.core.operations.base_filter import BaseFilter
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
+from mantidimaging.core.operations.median_filter.cpu_median import PAD_MODES
 from mantidimaging.core.parallel import shared_mem as psm
 from mantidimaging.core.utility.progress_reporting import Progress
-from mantidimaging.gui.utility import add_property_to_form
-from mantidimaging.gui.utility.qt_helpers import Type
+
+ENGINE_SPATIAL = 'spatial'
+ENGINE_FFT = 'fft'
+
+# From this sigma the FFT is faster than the spatial filter, see _execute
+FFT_MINIMUM_SIGMA = 4
+# Number of images transformed together by the FFT engine
+FFT_SLAB_SIZE = 4
+# Number of rows of every image held by each slab when smoothing along the stack axis
+STACK_AXIS_SLAB_ROWS = 16
+# The kernel is truncated at this many standard deviations, as in scipy.ndimage
+TRUNCATE = 4.0
 
 
 class GaussianFilter(BaseFilter):
     filter_name = "Gaussian"
+    # smooth_3d also smooths along the stack, so the images are not independent
+    traits = FilterTraits(in_place=True, axis=FilterAxis.PROJECTION, thread_safe=True, memory_multiplier=1.0)
 
     @staticmethod
-    def filter_func(data: Images, size=None, mode=None, order=None, cores=None, chunksize=None, progress=None):
+    def filter_func(data: Images,
+                    size=None,
+                    mode=None,
+                    order=None,
+                    smooth_3d=False,
+                    cores=None,
+                    chunksize=None,
+                    progress=None):
         """
         :param data: Input data as a 3D numpy.ndarray
         :param size: Size of the kernel
@@ -29,6 +51,7 @@ class GaussianFilter(BaseFilter):
                       An order of 1, 2, or 3 corresponds to convolution
                       with the first, second or third derivatives of a Gaussian.
                       Higher order derivatives are not implemented
+        :param smooth_3d: Also smooth across the images, along the stack axis
         :param cores: The number of cores that will be used to process the data.
         :param chunksize: The number of chunks that each worker will receive.
 
@@ -37,49 +60,145 @@ class GaussianFilter(BaseFilter):
         h.check_data_stack(data)
 
         if size and size > 1:
-            _execute(data.data, size, mode, order, cores, chunksize, progress)
+            _execute(data.data, size, mode, order, cores, chunksize, progress, smooth_3d)
         h.check_data_stack(data)
         return data
 
     @staticmethod
     def register_gui(form, on_change, view):
+        from mantidimaging.gui.utility import add_property_to_form
+        from mantidimaging.gui.utility.qt_helpers import Type
+
         _, size_field = add_property_to_form('Kernel Size', Type.INT, 3, (0, 1000), form=form, on_change=on_change)
 
         _, order_field = add_property_to_form('Order', Type.INT, 0, (0, 3), form=form, on_change=on_change)
 
         _, mode_field = add_property_to_form('Mode', Type.CHOICE, valid_values=modes(), form=form, on_change=on_change)
 
-        return {'size_field': size_field, 'order_field': order_field, 'mode_field': mode_field}
+        _, smooth_3d_field = add_property_to_form('3D',
+                                                  Type.BOOL,
+                                                  default_value=False,
+                                                  tooltip='Also smooth across the projections',
+                                                  form=form,
+                                                  on_change=on_change)
+
+        return {
+            'size_field': size_field,
+            'order_field': order_field,
+            'mode_field': mode_field,
+            'smooth_3d_field': smooth_3d_field
+        }
 
     @staticmethod
-    def execute_wrapper(size_field=None, order_field=None, mode_field=None):
+    def execute_wrapper(size_field=None, order_field=None, mode_field=None, smooth_3d_field=None):
         return partial(GaussianFilter.filter_func,
                        size=size_field.value(),
                        mode=mode_field.currentText(),
-                       order=order_field.value())
+                       order=order_field.value(),
+                       smooth_3d=smooth_3d_field.isChecked() if smooth_3d_field is not None else False)
 
 
 def modes():
     return ['reflect', 'constant', 'nearest', 'mirror', 'wrap']
 
 
-def _execute(data, size, mode, order, cores=None, chunksize=None, progress=None):
+def select_engine(sigma, order) -> str:
+    return ENGINE_FFT if not order and sigma >= FFT_MINIMUM_SIGMA else ENGINE_SPATIAL
+
+
+@lru_cache(maxsize=4)
+def _kernel_transform(shape, sigma, radius, dtype) -> np.ndarray:
+    """
+    Real FFT of the 2D Gaussian kernel, centred at the origin of an array of the given shape.
+    Cached, as every slab of the stack has the same shape.
+    """
+    x = np.arange(-radius, radius + 1)
+    kernel_1d = np.exp(-0.5 * x * x / sigma**2)
+    kernel_1d /= kernel_1d.sum()
+
+    kernel = np.zeros(shape, dtype=dtype)
+    kernel[:2 * radius + 1, :2 * radius + 1] = np.outer(kernel_1d, kernel_1d)
+    kernel = np.roll(kernel, (-radius, -radius), axis=(0, 1))
+    return scipy.fft.rfft2(kernel)
+
+
+def _fft_gaussian_slab(slab: np.ndarray, sigma, mode):
+    """
+    Smooths every image of the slab with a single batched real FFT.
+
+    The images are padded by the radius of the kernel using the boundary mode, which keeps the
+    wrap around of the circular convolution inside the padding, that is cropped at the end.
+    """
+    radius = int(TRUNCATE * sigma + 0.5)
+    padded = np.pad(slab, ((0, 0), (radius, radius), (radius, radius)), mode=PAD_MODES[mode])
+    # single precision stacks are transformed in single precision
+    dtype = np.float32 if slab.dtype == np.float32 else np.float64
+    shape = tuple(scipy.fft.next_fast_len(length, real=True) for length in padded.shape[1:])
+
+    transformed = scipy.fft.rfft2(padded.astype(dtype, copy=False), s=shape, axes=(-2, -1))
+    transformed *= _kernel_transform(shape, sigma, radius, dtype)
+    smoothed = scipy.fft.irfft2(transformed, s=shape, axes=(-2, -1))
+    slab[:] = smoothed[:, radius:radius + slab.shape[1], radius:radius + slab.shape[2]]
+
+
+def _stack_axis_gaussian_slab(slab: np.ndarray, sigma, mode, order):
+    """
+    Smooths along the stack axis, the slab holds a block of rows of every image.
+    """
+    slab[:] = scipy_ndimage.gaussian_filter1d(slab, sigma, axis=0, order=order, mode=mode)
+
+
+def _execute(data, size, mode, order, cores=None, chunksize=None, progress=None, smooth_3d=False):
+    """
+    Applies the Gaussian filter to every image, and with smooth_3d along the stack axis too.
+
+    For small sigmas each image is filtered by scipy.ndimage.gaussian_filter, whose cost grows
+    with the width of the kernel. For large sigmas slabs of images are filtered with a real FFT,
+    whose cost does not depend on the width of the kernel.
+
+    The smoothing along the stack axis is a separate pass over slabs holding a block of rows
+    of every image, so the memory used is bounded by the size of the slab.
+    """
     log = getLogger(__name__)
     progress = Progress.ensure_instance(progress, task_name='Gaussian filter')
-
-    # Parallel CPU version of the Gaussian filter
-    # create the partial function to forward the parameters
-    f = psm.create_partial(scipy_ndimage.gaussian_filter,
-                           fwd_func=psm.return_fwd_func,
-                           sigma=size,
-                           mode=mode,
-                           order=order)
+    mode = mode if mode else 'reflect'
+    order = order if order else 0
+    engine = select_engine(size, order)
 
     log.info("Starting PARALLEL gaussian filter, with pixel data type: {0}, "
-             "filter size/width: {1}.".format(data.dtype, size))
+             "filter size/width: {1}, engine: {2}, 3D: {3}.".format(data.dtype, size, engine, smooth_3d))
 
     progress.update()
-    data = psm.execute(data, f, cores, chunksize, progress, msg="Gaussian filter")
+    if engine == ENGINE_FFT:
+        data = psm.execute_slabs(data,
+                                 _fft_gaussian_slab,
+                                 FFT_SLAB_SIZE,
+                                 cores=cores,
+                                 progress=progress,
+                                 msg="Gaussian filter",
+                                 sigma=size,
+                                 mode=mode)
+    else:
+        # Parallel CPU version of the Gaussian filter
+        # create the partial function to forward the parameters
+        f = psm.create_partial(scipy_ndimage.gaussian_filter,
+                               fwd_func=psm.return_fwd_func,
+                               sigma=size,
+                               mode=mode,
+                               order=order)
+        data = psm.execute(data, f, cores, chunksize, progress, msg="Gaussian filter")
+
+    if smooth_3d:
+        data = psm.execute_slabs(data,
+                                 _stack_axis_gaussian_slab,
+                                 STACK_AXIS_SLAB_ROWS,
+                                 axis=1,
+                                 cores=cores,
+                                 progress=progress,
+                                 msg="Gaussian filter 3D",
+                                 sigma=size,
+                                 mode=mode,
+                                 order=order)
 
     progress.mark_complete()
     log.info("Finished  gaussian filter, with pixel data type: {0}, "
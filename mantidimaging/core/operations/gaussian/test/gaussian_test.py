@@ -2,9 +2,12 @@ import unittest
 from unittest import mock
 
 import numpy as np
+import numpy.testing as npt
+import scipy.ndimage as scipy_ndimage
 
 import mantidimaging.test_helpers.unit_test_helper as th
 from mantidimaging.core.operations.gaussian import GaussianFilter
+from mantidimaging.core.operations.gaussian.gaussian import ENGINE_FFT, ENGINE_SPATIAL, select_engine
 from mantidimaging.core.utility.memory_usage import get_memory_usage_linux
 
 
@@ -46,6 +49,30 @@ class GaussianTest(unittest.TestCase):
 
         th.assert_not_equals(result.data, original)
 
+    def test_engine_selection(self):
+        self.assertEqual(select_engine(2, 0), ENGINE_SPATIAL)
+        self.assertEqual(select_engine(8, 0), ENGINE_FFT)
+        # the FFT engine only implements the smoothing kernel
+        self.assertEqual(select_engine(8, 1), ENGINE_SPATIAL)
+
+    def test_fft_engine_matches_scipy(self):
+        for mode in ['reflect', 'constant', 'nearest', 'mirror', 'wrap']:
+            images = th.generate_images((5, 40, 30))
+            expected = np.stack([scipy_ndimage.gaussian_filter(image, sigma=6, mode=mode) for image in images.data])
+
+            GaussianFilter.filter_func(images, 6, mode, 0)
+
+            npt.assert_allclose(images.data, expected, rtol=0, atol=1e-5, err_msg=mode)
+
+    def test_3d_matches_scipy(self):
+        for size, order in [(2, 0), (6, 0), (2, 1)]:
+            images = th.generate_images((12, 20, 18))
+            expected = scipy_ndimage.gaussian_filter(images.data, sigma=size, mode='reflect', order=order)
+
+            GaussianFilter.filter_func(images, size, 'reflect', order, smooth_3d=True)
+
+            npt.assert_allclose(images.data, expected, rtol=0, atol=1e-5, err_msg=f"size {size}, order {order}")
+
     def test_memory_change_acceptable(self):
         """
         Expected behaviour for the filter is to be done in place
@@ -80,7 +107,9 @@ class GaussianTest(unittest.TestCase):
         mode_field.currentText = mock.Mock(return_value=0)
         order_field = mock.Mock()
         order_field.value = mock.Mock(return_value=0)
-        execute_func = GaussianFilter.execute_wrapper(size_field, order_field, mode_field)
+        smooth_3d_field = mock.Mock()
+        smooth_3d_field.isChecked = mock.Mock(return_value=False)
+        execute_func = GaussianFilter.execute_wrapper(size_field, order_field, mode_field, smooth_3d_field)
 
         images = th.generate_images()
         execute_func(images)
@@ -88,6 +117,7 @@ class GaussianTest(unittest.TestCase):
         self.assertEqual(size_field.value.call_count, 1)
         self.assertEqual(mode_field.currentText.call_count, 1)
         self.assertEqual(order_field.value.call_count, 1)
+        self.assertEqual(smooth_3d_field.isChecked.call_count, 1)
 
 
 if __name__ == '__main__':
@@ -1,10 +1,10 @@
-from typing import List
+from typing import List, Type
 
 from mantidimaging.core.operations.base_filter import BaseFilter
 from mantidimaging.core.utility.registrator import get_package_children, import_items
 
 
-def load_filter_packages(package_name="mantidimaging.core.operations", ignored_packages=None) -> List[BaseFilter]:
+def load_filter_packages(package_name="mantidimaging.core.operations", ignored_packages=None) -> List[Type[BaseFilter]]:
     """
     Imports all subpackages with a FILTER_CLASS attribute, which should be an extension of BaseFilter.
 
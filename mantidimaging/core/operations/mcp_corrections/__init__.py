@@ -0,0 +1,3 @@
+from .mcp_corrections import MCPCorrectionsFilter  # noqa:F401
+
+FILTER_CLASS = MCPCorrectionsFilter
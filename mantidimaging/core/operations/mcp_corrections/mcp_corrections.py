@@ -0,0 +1,164 @@
+from functools import lru_cache, partial
+from typing import Tuple
+
+import numpy as np
+
+from mantidimaging import helper as h
+from mantidimaging.core.data import Images
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
+from mantidimaging.core.parallel import shared_mem as psm
+from mantidimaging.core.utility.progress_reporting import Progress
+
+# The Timepix MCP detector, a 2x2 grid of 256x256 chips with 4 pixel wide gaps between them
+DEFAULT_CHIP_SIZE = 256
+DEFAULT_CHIPS_X = 2
+DEFAULT_CHIPS_Y = 2
+DEFAULT_GAP_WIDTH = 4
+
+# Number of images in each slab corrected by a worker. Filling the gaps touches few pixels, the slabs
+# are large so that the work of each task outweighs the cost of dispatching it
+SLAB_SIZE = 64
+
+# The pixels of a gap and the pixels on either side of the gap that it is interpolated from,
+# as (rows, columns) slices of an image
+Gap = Tuple[Tuple[slice, slice], Tuple[slice, slice], Tuple[slice, slice]]
+
+
+def _gap_ranges(num_chips: int, chip_size: int, gap_width: int):
+    """
+    :return: The [start, end) range of the gap at every boundary between two chips
+    """
+    return [(boundary - gap_width // 2, boundary - gap_width // 2 + gap_width)
+            for boundary in range(chip_size, num_chips * chip_size, chip_size)]
+
+
+@lru_cache(maxsize=8)
+def _gap_maps(shape: Tuple[int, int], chip_size: int, chips_x: int, chips_y: int, gap_width: int) -> Tuple[Gap, ...]:
+    """
+    The gaps of the detector layout, validated against the image shape.
+
+    The gaps between columns of chips are filled first, then the gaps between rows of chips across
+    the whole width of the image, so the pixels where two gaps cross are interpolated from the
+    already filled vertical gaps.
+    """
+    expected_shape = (chips_y * chip_size, chips_x * chip_size)
+    if tuple(shape) != expected_shape:
+        raise ValueError(f"The images have the shape {tuple(shape)}, the detector layout of {chips_y}x{chips_x} chips "
+                         f"of {chip_size} pixels expects {expected_shape}")
+    if not 0 <= gap_width < chip_size:
+        raise ValueError(f"The gap width must be between 0 and the chip size {chip_size}, got {gap_width}")
+    if gap_width == 0:
+        return ()
+
+    whole = slice(None)
+    vertical_gaps = [((whole, slice(start, end)), (whole, slice(start - 1, start)), (whole, slice(end, end + 1)))
+                     for start, end in _gap_ranges(chips_x, chip_size, gap_width)]
+    horizontal_gaps = [((slice(start, end), whole), (slice(start - 1, start), whole), (slice(end, end + 1), whole))
+                       for start, end in _gap_ranges(chips_y, chip_size, gap_width)]
+    return tuple(vertical_gaps + horizontal_gaps)
+
+
+def _correct_slab(slab: np.ndarray, chip_size: int, chips_x: int, chips_y: int, gap_width: int):
+    whole_slab = (slice(None), )
+    for gap, first, second in _gap_maps(slab.shape[1:], chip_size, chips_x, chips_y, gap_width):
+        # the gap of every image of the slab is set to the mean of the pixels on either side, broadcast across the gap.
+        # The sum is made in float64, as it would overflow for integer stacks
+        slab[whole_slab + gap] = np.add(slab[whole_slab + first], slab[whole_slab + second], dtype=np.float64) / 2
+
+
+class MCPCorrectionsFilter(BaseFilter):
+    filter_name = "MCP Corrections"
+    traits = FilterTraits(in_place=True,
+                          per_image=True,
+                          axis=FilterAxis.PROJECTION,
+                          thread_safe=True,
+                          memory_multiplier=1.0)
+
+    @staticmethod
+    def filter_func(images: Images,
+                    chip_size=DEFAULT_CHIP_SIZE,
+                    chips_x=DEFAULT_CHIPS_X,
+                    chips_y=DEFAULT_CHIPS_Y,
+                    gap_width=DEFAULT_GAP_WIDTH,
+                    cores=None,
+                    progress=None) -> Images:
+        """
+        Fills the gaps between the chips of an MCP/Timepix detector by interpolating the pixels
+        on either side of each gap. The chips are not shifted.
+
+        Each gap is filled in a whole slab of images at once by broadcasting, from the gaps of the
+        detector layout that are computed once, and the slabs are processed in parallel.
+
+        :param images: Input data
+        :param chip_size: The size of the square chips, in pixels
+        :param chips_x: Number of chips across the detector
+        :param chips_y: Number of chips down the detector
+        :param gap_width: Width of the gaps centred on the boundaries between chips, in pixels
+
+        :return: The processed images
+        """
+        progress = Progress.ensure_instance(progress, task_name='MCP Corrections')
+        h.check_data_stack(images)
+
+        # validates the layout before the workers are started
+        _gap_maps(images.data.shape[1:], chip_size, chips_x, chips_y, gap_width)
+
+        with progress:
+            psm.execute_slabs(images.data,
+                              _correct_slab,
+                              SLAB_SIZE,
+                              cores=cores,
+                              progress=progress,
+                              msg="MCP corrections",
+                              chip_size=chip_size,
+                              chips_x=chips_x,
+                              chips_y=chips_y,
+                              gap_width=gap_width)
+
+        return images
+
+    @staticmethod
+    def register_gui(form, on_change, view):
+        from mantidimaging.gui.utility import add_property_to_form
+        from mantidimaging.gui.utility.qt_helpers import Type
+
+        _, chip_size_field = add_property_to_form('Chip size',
+                                                  Type.INT,
+                                                  DEFAULT_CHIP_SIZE, (1, 10000),
+                                                  form=form,
+                                                  on_change=on_change,
+                                                  tooltip="Size of the square chips, in pixels")
+
+        _, chips_x_field = add_property_to_form('Chips across',
+                                                Type.INT,
+                                                DEFAULT_CHIPS_X, (1, 100),
+                                                form=form,
+                                                on_change=on_change)
+
+        _, chips_y_field = add_property_to_form('Chips down',
+                                                Type.INT,
+                                                DEFAULT_CHIPS_Y, (1, 100),
+                                                form=form,
+                                                on_change=on_change)
+
+        _, gap_width_field = add_property_to_form('Gap width',
+                                                  Type.INT,
+                                                  DEFAULT_GAP_WIDTH, (0, 1000),
+                                                  form=form,
+                                                  on_change=on_change,
+                                                  tooltip="Width of the gaps between the chips, in pixels")
+
+        return {
+            'chip_size_field': chip_size_field,
+            'chips_x_field': chips_x_field,
+            'chips_y_field': chips_y_field,
+            'gap_width_field': gap_width_field
+        }
+
+    @staticmethod
+    def execute_wrapper(chip_size_field=None, chips_x_field=None, chips_y_field=None, gap_width_field=None):
+        return partial(MCPCorrectionsFilter.filter_func,
+                       chip_size=chip_size_field.value(),
+                       chips_x=chips_x_field.value(),
+                       chips_y=chips_y_field.value(),
+                       gap_width=gap_width_field.value())
@@ -0,0 +1,101 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+import numpy.testing as npt
+
+import mantidimaging.test_helpers.unit_test_helper as th
+from mantidimaging.core.operations.mcp_corrections import MCPCorrectionsFilter
+
+
+def _loop_corrections(data, chip_size, gap_width):
+    """
+    Corrects one gap of one image at a time, as the gaps were corrected before being vectorised
+    """
+    for image in data:
+        for boundary in range(chip_size, image.shape[1], chip_size):
+            start = boundary - gap_width // 2
+            end = start + gap_width
+            image[:, start:end] = (image[:, start - 1:start] + image[:, end:end + 1]) / 2
+        for boundary in range(chip_size, image.shape[0], chip_size):
+            start = boundary - gap_width // 2
+            end = start + gap_width
+            image[start:end, :] = (image[start - 1:start, :] + image[end:end + 1, :]) / 2
+    return data
+
+
+class MCPCorrectionsTest(unittest.TestCase):
+    """
+    Test MCP corrections filter.
+
+    Tests return value and in-place modified data.
+    """
+    def test_executed(self):
+        images = th.generate_images((5, 32, 32))
+        expected = _loop_corrections(np.copy(images.data), 16, 4)
+
+        result = MCPCorrectionsFilter.filter_func(images, chip_size=16, cores=1)
+
+        npt.assert_allclose(result.data, expected, rtol=1e-6)
+
+    def test_executed_layout(self):
+        images = th.generate_images((3, 20, 30))
+        expected = _loop_corrections(np.copy(images.data), 10, 3)
+
+        MCPCorrectionsFilter.filter_func(images, chip_size=10, chips_x=3, chips_y=2, gap_width=3, cores=1)
+
+        npt.assert_allclose(images.data, expected, rtol=1e-6)
+
+    def test_executed_parallel(self):
+        images = th.generate_images((200, 16, 16))
+        expected = _loop_corrections(np.copy(images.data), 8, 2)
+
+        MCPCorrectionsFilter.filter_func(images, chip_size=8, gap_width=2, cores=2)
+
+        npt.assert_allclose(images.data, expected, rtol=1e-6)
+
+    def test_executed_integer_stack_does_not_overflow(self):
+        images = th.generate_images((2, 32, 32))
+        images.data = np.full((2, 32, 32), 60000, dtype=np.uint16)
+
+        MCPCorrectionsFilter.filter_func(images, chip_size=16, cores=1)
+
+        npt.assert_equal(images.data, 60000)
+
+    def test_no_gap_unchanged(self):
+        images = th.generate_images((2, 32, 32))
+        original = np.copy(images.data)
+
+        MCPCorrectionsFilter.filter_func(images, chip_size=16, gap_width=0, cores=1)
+
+        npt.assert_equal(images.data, original)
+
+    def test_layout_mismatch_raises(self):
+        images = th.generate_images((2, 30, 32))
+        self.assertRaises(ValueError, MCPCorrectionsFilter.filter_func, images, chip_size=16, cores=1)
+        self.assertRaises(ValueError, MCPCorrectionsFilter.filter_func, images, chip_size=15, gap_width=15, cores=1)
+
+    def test_execute_wrapper_return_is_runnable(self):
+        """
+        Test that the partial returned by execute_wrapper can be executed (kwargs are named correctly)
+        """
+        chip_size_field = mock.Mock()
+        chip_size_field.value = mock.Mock(return_value=5)
+        chips_x_field = mock.Mock()
+        chips_x_field.value = mock.Mock(return_value=2)
+        chips_y_field = mock.Mock()
+        chips_y_field.value = mock.Mock(return_value=2)
+        gap_width_field = mock.Mock()
+        gap_width_field.value = mock.Mock(return_value=2)
+        execute_func = MCPCorrectionsFilter.execute_wrapper(chip_size_field, chips_x_field, chips_y_field,
+                                                            gap_width_field)
+
+        images = th.generate_images((2, 10, 10))
+        execute_func(images)
+
+        self.assertEqual(chip_size_field.value.call_count, 1)
+        self.assertEqual(gap_width_field.value.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
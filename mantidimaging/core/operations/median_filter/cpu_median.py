@@ -0,0 +1,152 @@
+"""
+CPU engines for the 2D median filter, giving the same result as scipy.ndimage.median_filter.
+
+The cost of scipy's median filter grows with the area of the kernel. Two faster engines
+are picked automatically when they apply:
+
+- sorting network: for 3x3 kernels the median of the 9 shifted copies of the image is
+  selected with 19 vectorised compare-exchange operations.
+- sliding histogram: for integer valued data (integer dtypes, or floats holding whole
+  numbers, e.g. detector counts) with a limited number of distinct levels, the median is
+  found from a histogram of the kernel that is updated as it slides across the image
+  (Huang's algorithm, as implemented by skimage.filters.rank.median). Its cost grows with
+  the kernel width and the number of levels, not with the kernel area, so it is faster
+  for the large kernels used for outlier removal. It is not a constant time median.
+
+Everything else uses scipy: even kernel sizes, data containing NaNs, and floats that are not
+whole numbers, or have more levels than the histogram is limited to, with kernels larger
+than 3x3. Such floats have about as many levels as pixels, and an exact median of them that
+is faster than scipy needs compiled code.
+"""
+import warnings
+from logging import getLogger
+from typing import Any, Dict, Optional
+
+import numpy as np
+import scipy.ndimage as scipy_ndimage
+
+LOG = getLogger(__name__)
+
+ENGINE_SCIPY = 'scipy'
+ENGINE_SORTING_NETWORK = 'sorting-network'
+ENGINE_SLIDING_HISTOGRAM = 'sliding-histogram'
+
+# The numpy padding modes equivalent to the scipy.ndimage boundary modes
+PAD_MODES: Dict[str, Any] = {
+    'reflect': 'symmetric',
+    'mirror': 'reflect',
+    'nearest': 'edge',
+    'wrap': 'wrap',
+    'constant': 'constant',
+}
+
+# The sliding histogram is used while the number of distinct levels is below this many per
+# element of the kernel. Its cost grows with the number of levels, scipy's with the kernel area,
+# the limit keeps the histogram comfortably faster than scipy.
+HISTOGRAM_LEVELS_PER_KERNEL_ELEMENT = 8
+MAXIMUM_HISTOGRAM_LEVELS = 2**16
+
+# Compare-exchange pairs of the optimal 9 element median network, the median ends up at index 4
+MEDIAN_9_NETWORK = ((1, 2), (4, 5), (7, 8), (0, 1), (3, 4), (6, 7), (1, 2), (4, 5), (7, 8), (0, 3), (5, 8), (4, 7),
+                    (3, 6), (1, 4), (2, 5), (4, 7), (4, 2), (6, 4), (4, 2))
+
+
+def _import_rank():
+    try:
+        from skimage.filters import rank
+    except ImportError:
+        return None
+    return rank
+
+
+def _integer_levels(image: np.ndarray, mode: str) -> Optional[int]:
+    """
+    :return: The number of levels between the smallest and largest value of the image,
+             or None if the image does not hold only whole numbers
+    """
+    if not np.issubdtype(image.dtype, np.integer):
+        if not np.issubdtype(image.dtype, np.floating) or not np.array_equal(image, np.rint(image)):
+            return None
+    low, high = _value_range(image, mode)
+    if not np.isfinite(low) or not np.isfinite(high):
+        return None
+    return int(high - low) + 1
+
+
+def _value_range(image: np.ndarray, mode: str):
+    low, high = image.min(), image.max()
+    if mode == 'constant':
+        # the border is padded with zeros
+        low, high = min(low, 0), max(high, 0)
+    return low, high
+
+
+def select_engine(image: np.ndarray, size: int, mode: str) -> str:
+    """
+    :return: The fastest engine that gives the same result as scipy for this image and kernel
+    """
+    if image.ndim != 2 or not isinstance(size, (int, np.integer)) or size % 2 == 0 or mode not in PAD_MODES:
+        return ENGINE_SCIPY
+
+    if size == 3:
+        if np.issubdtype(image.dtype, np.floating) and np.isnan(image).any():
+            return ENGINE_SCIPY
+        return ENGINE_SORTING_NETWORK
+
+    levels = _integer_levels(image, mode)
+    if levels is not None and levels <= min(MAXIMUM_HISTOGRAM_LEVELS, HISTOGRAM_LEVELS_PER_KERNEL_ELEMENT * size**2) \
+            and _import_rank() is not None:
+        return ENGINE_SLIDING_HISTOGRAM
+
+    return ENGINE_SCIPY
+
+
+def _sorting_network_median_3x3(image: np.ndarray, mode: str) -> np.ndarray:
+    padded = np.pad(image, 1, mode=PAD_MODES[mode])
+    height, width = image.shape
+    values = [padded[dy:dy + height, dx:dx + width].copy() for dy in range(3) for dx in range(3)]
+    for a, b in MEDIAN_9_NETWORK:
+        low = np.minimum(values[a], values[b])
+        np.maximum(values[a], values[b], out=values[b])
+        values[a] = low
+    return values[4]
+
+
+def _sliding_histogram_median(image: np.ndarray, size: int, mode: str) -> np.ndarray:
+    rank = _import_rank()
+    low, high = _value_range(image, mode)
+    levels_dtype = np.uint8 if high - low < 2**8 else np.uint16
+    # the whole numbers are shifted to start at 0, which is exact for them
+    levels = np.subtract(image, low, dtype=np.float64).astype(levels_dtype)
+
+    radius = size // 2
+    if mode == 'constant':
+        padded = np.pad(levels, radius, mode='constant', constant_values=-low)
+    else:
+        padded = np.pad(levels, radius, mode=PAD_MODES[mode])
+    with warnings.catch_warnings():
+        # skimage warns about the number of bins, which is already limited by select_engine
+        warnings.simplefilter('ignore', UserWarning)
+        median = rank.median(padded, footprint=np.ones((size, size), dtype=bool))
+    median = median[radius:-radius, radius:-radius]
+    return np.add(median, low, dtype=np.float64).astype(image.dtype)
+
+
+def median_filter(image: np.ndarray, size: int, mode: str = 'reflect', engine: Optional[str] = None) -> np.ndarray:
+    """
+    Median filter of a single image, with the same result as scipy.ndimage.median_filter.
+
+    :param image: The 2D image
+    :param size: Size of the kernel
+    :param mode: The mode with which to handle the edges, as in scipy.ndimage
+    :param engine: The engine to use, picked with select_engine if not provided
+    :return: The filtered image
+    """
+    if engine is None:
+        engine = select_engine(image, size, mode)
+
+    if engine == ENGINE_SORTING_NETWORK:
+        return _sorting_network_median_3x3(image, mode)
+    elif engine == ENGINE_SLIDING_HISTOGRAM:
+        return _sliding_histogram_median(image, size, mode)
+    return scipy_ndimage.median_filter(image, size=size, mode=mode)
@@ -2,16 +2,13 @@ from functools import partial
 from logging import getLogger
 from typing import Callable, Dict, Any, TYPE_CHECKING
 
-import scipy.ndimage as scipy_ndimage
-
 from mantidimaging import helper as h
 from mantidimaging.core.data import Images
-from mantidimaging.core.operations.base_filter import BaseFilter
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
+from mantidimaging.core.operations.median_filter import cpu_median
 from mantidimaging.core.gpu import utility as gpu
 from mantidimaging.core.parallel import shared_mem as psm
 from mantidimaging.core.utility.progress_reporting import Progress
-from mantidimaging.gui.utility import add_property_to_form
-from mantidimaging.gui.utility.qt_helpers import Type
 
 if TYPE_CHECKING:
     from PyQt5.QtWidgets import QFormLayout
@@ -19,6 +16,11 @@ if TYPE_CHECKING:
 
 class MedianFilter(BaseFilter):
     filter_name = "Median"
+    traits = FilterTraits(in_place=True,
+                          per_image=True,
+                          axis=FilterAxis.PROJECTION,
+                          thread_safe=True,
+                          memory_multiplier=1.0)
 
     @staticmethod
     def filter_func(data: Images, size=None, mode="reflect", cores=None, chunksize=None, progress=None, force_cpu=True):
@@ -46,6 +48,9 @@ class MedianFilter(BaseFilter):
 
     @staticmethod
     def register_gui(form: 'QFormLayout', on_change: Callable, view) -> Dict[str, Any]:
+        from mantidimaging.gui.utility import add_property_to_form
+        from mantidimaging.gui.utility.qt_helpers import Type
+
         _, size_field = add_property_to_form('Kernel Size', Type.INT, 3, (0, 1000), form=form, on_change=on_change)
 
         _, mode_field = add_property_to_form('Mode', Type.CHOICE, valid_values=modes(), form=form, on_change=on_change)
@@ -75,12 +80,13 @@ def _execute(data, size, mode, cores=None, chunksize=None, progress=None):
     log = getLogger(__name__)
     progress = Progress.ensure_instance(progress, task_name='Median filter')
 
-    # create the partial function to forward the parameters
-    f = psm.create_partial(scipy_ndimage.median_filter, fwd_func=psm.return_fwd_func, size=size, mode=mode)
+    # the engine is picked for every image, as the range of values can differ between them
+    f = psm.create_partial(cpu_median.median_filter, fwd_func=psm.return_fwd_func, size=size, mode=mode)
 
     with progress:
         log.info("PARALLEL median filter, with pixel data type: {0}, filter "
-                 "size/width: {1}.".format(data.dtype, size))
+                 "size/width: {1}, engine for the first image: {2}.".format(
+                     data.dtype, size, cpu_median.select_engine(data[0], size, mode)))
 
         progress.update()
         data = psm.execute(data, f, cores, chunksize, progress, msg="Median filter")
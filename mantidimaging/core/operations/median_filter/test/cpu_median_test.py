@@ -0,0 +1,57 @@
+import unittest
+
+import numpy as np
+import numpy.testing as npt
+import scipy.ndimage as scipy_ndimage
+
+from mantidimaging.core.operations.median_filter import cpu_median
+from mantidimaging.core.operations.median_filter.median_filter import modes
+
+
+class CpuMedianTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(42)
+
+    def _assert_parity(self, image, size, expected_engine):
+        for mode in modes():
+            self.assertEqual(cpu_median.select_engine(image, size, mode), expected_engine, mode)
+            result = cpu_median.median_filter(image, size, mode)
+            self.assertEqual(result.dtype, image.dtype)
+            npt.assert_array_equal(result, scipy_ndimage.median_filter(image, size=size, mode=mode), err_msg=mode)
+
+    def test_sorting_network_float(self):
+        self._assert_parity(self.rng.random((23, 31), dtype=np.float32), 3, cpu_median.ENGINE_SORTING_NETWORK)
+
+    def test_sorting_network_integer(self):
+        image = self.rng.integers(0, 60000, (17, 12)).astype(np.uint16)
+        self._assert_parity(image, 3, cpu_median.ENGINE_SORTING_NETWORK)
+
+    def test_sliding_histogram_uint8(self):
+        image = self.rng.integers(0, 256, (40, 37)).astype(np.uint8)
+        self._assert_parity(image, 9, cpu_median.ENGINE_SLIDING_HISTOGRAM)
+
+    def test_sliding_histogram_integer_valued_float(self):
+        # detector counts loaded as floats, with an offset so that the constant mode border extends the range
+        image = self.rng.integers(1000, 1600, (41, 35)).astype(np.float32)
+        self._assert_parity(image, 15, cpu_median.ENGINE_SLIDING_HISTOGRAM)
+
+    def test_sliding_histogram_negative_values(self):
+        image = self.rng.integers(-90, 90, (30, 30)).astype(np.int32)
+        self._assert_parity(image, 5, cpu_median.ENGINE_SLIDING_HISTOGRAM)
+
+    def test_scipy_fallback(self):
+        # too many distinct levels for the histogram
+        self._assert_parity(self.rng.random((20, 20), dtype=np.float32), 5, cpu_median.ENGINE_SCIPY)
+        self._assert_parity(self.rng.integers(0, 60000, (20, 20)).astype(np.uint16), 5, cpu_median.ENGINE_SCIPY)
+        # even kernels are centred differently
+        self._assert_parity(self.rng.integers(0, 10, (20, 20)).astype(np.uint8), 4, cpu_median.ENGINE_SCIPY)
+
+    def test_nan_uses_scipy(self):
+        image = self.rng.random((10, 10), dtype=np.float32)
+        image[3, 3] = np.nan
+        self.assertEqual(cpu_median.select_engine(image, 3, 'reflect'), cpu_median.ENGINE_SCIPY)
+        self.assertEqual(cpu_median.select_engine(image, 9, 'reflect'), cpu_median.ENGINE_SCIPY)
+
+
+if __name__ == '__main__':
+    unittest.main()
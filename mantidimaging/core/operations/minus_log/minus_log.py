@@ -1,17 +1,20 @@
 from functools import partial
 
+import numpy as np
+
 from mantidimaging.core.data import Images
 
-from mantidimaging.core.operations.base_filter import BaseFilter
-from mantidimaging.core.tools import importer
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
+from mantidimaging.core.parallel import utility as pu
 from mantidimaging.core.utility.progress_reporting import Progress
 
 
 class MinusLogFilter(BaseFilter):
     filter_name = "Minus Log"
+    traits = FilterTraits(in_place=True, per_image=True, axis=FilterAxis.NONE, thread_safe=True, memory_multiplier=1.0)
 
     @staticmethod
-    def filter_func(images: Images, minus_log=True, progress=None):
+    def filter_func(images: Images, minus_log=True, cores=None, chunksize=None, progress=None):
         """
         This filter should be used on transmission images (background corrected
         images).
@@ -20,26 +23,29 @@ class MinusLogFilter(BaseFilter):
 
         :param images: Sample data which is to be processed. Expected in radiograms
         :param minus_log: Specify whether to calculate minus log or just return.
+        :param cores: The number of cores that will be used to process the data.
+        :param chunksize: The number of chunks that each worker will receive.
 
         :return: Inverted image
         """
         progress = Progress.ensure_instance(progress, task_name='Minus Log')
 
         if minus_log:
-            # import early to check if tomopy is available
-            tomopy = importer.do_importing('tomopy')
-
             with progress:
                 progress.update(msg="Calculating -log on the sample data")
-                sample = images.data
-                # this check prevents division by 0 errors from the minus_log
-                sample[sample == 0] = 1e-6
-
                 # the operation is done in place
-                tomopy.prep.normalize.minus_log(sample, out=sample)
+                MinusLogFilter.execute_slabs(images.data, cores=cores, progress=progress)
 
         return images
 
+    @staticmethod
+    def filter_slab(data):
+        for _, block in pu.row_blocks(data, pu.ROW_BLOCK_BYTES):
+            # this check prevents division by 0 errors from the log
+            block[block == 0] = 1e-6
+            np.log(block, out=block)
+            np.negative(block, out=block)
+
     @staticmethod
     def execute_wrapper(**kwargs):
         return partial(MinusLogFilter.filter_func, minus_log=True)
@@ -25,6 +25,15 @@ class MinusLogTest(unittest.TestCase):
 
         npt.assert_equal(result.data, sample)
 
+    def test_execute(self):
+        images = th.generate_images()
+        images.data[0, 0, 0] = 0
+        expected = -np.log(np.where(images.data == 0, 1e-6, images.data))
+
+        result = MinusLogFilter.filter_func(images, minus_log=True)
+
+        npt.assert_allclose(result.data, expected, rtol=1e-6)
+
     def test_memory_change_acceptable(self):
         """
         Expected behaviour for the filter is to be done in place
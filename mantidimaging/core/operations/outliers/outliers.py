@@ -2,12 +2,10 @@ from functools import partial
 
 import numpy as np
 
-from mantidimaging.core.operations.base_filter import BaseFilter
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
 from mantidimaging.core.parallel import utility
 from mantidimaging.core.tools import importer
 from mantidimaging.core.utility.progress_reporting import Progress
-from mantidimaging.gui.utility import add_property_to_form
-from mantidimaging.gui.utility.qt_helpers import Type
 
 OUTLIERS_DARK = 'dark'
 OUTLIERS_BRIGHT = 'bright'
@@ -20,6 +18,8 @@ _default_dim = DIM_2D
 
 class OutliersFilter(BaseFilter):
     filter_name = "Remove Outliers TomoPy"
+    # TomoPy runs its own threads, and filters a float copy of the stack
+    traits = FilterTraits(in_place=True, per_image=True, axis=FilterAxis.PROJECTION, memory_multiplier=2.0)
 
     @staticmethod
     def filter_func(data,
@@ -71,6 +71,9 @@ class OutliersFilter(BaseFilter):
 
     @staticmethod
     def register_gui(form, on_change, view):
+        from mantidimaging.gui.utility import add_property_to_form
+        from mantidimaging.gui.utility.qt_helpers import Type
+
         _, diff_field = add_property_to_form('Difference',
                                              'float',
                                              1,
@@ -1,29 +1,39 @@
 from functools import partial
+from typing import Tuple
 
 import numpy as np
-import scipy.ndimage as scipy_ndimage
 
 from mantidimaging.core.data import Images
-from mantidimaging.core.operations.base_filter import BaseFilter
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
+from mantidimaging.core.operations.median_filter import cpu_median
 from mantidimaging.core.parallel import shared_mem as psm
 from mantidimaging.core.parallel import utility
-from mantidimaging.gui.utility import add_property_to_form
-from mantidimaging.gui.utility.qt_helpers import Type
 
 _default_radius = 3
 
+# Number of images, or sinograms, processed by each task
+SLAB_SIZE = 8
+# Number of pixels sampled to narrow down the candidates for the median absolute deviation
+MAD_SAMPLE_SIZE = 2**16
+# Half width of the bracket around the median of the sample, in standard deviations
+# of the rank of the sample median. A bracket missing the median falls back to a full selection.
+MAD_BRACKET_DEVIATIONS = 6
+
 
 class OutliersISISFilter(BaseFilter):
     filter_name = "Remove Outliers ISIS"
+    traits = FilterTraits(in_place=True,
+                          per_image=True,
+                          axis=FilterAxis.PROJECTION,
+                          thread_safe=True,
+                          memory_multiplier=1.0)
 
     @staticmethod
     def _execute(data, diff, radius):
         # Adapted for 2D image from source: https://stackoverflow.com/a/16562028/2823526
-        median = scipy_ndimage.median_filter(data, radius)
-        abs_diff = np.abs(data - median)
-        mdev = np.median(abs_diff)
-        s = abs_diff / mdev
-        return np.where(s < diff, data, median)
+        result = np.array(data)
+        _remove_outliers_inplace(result, diff, radius, _scratch(result.shape, result.dtype))
+        return result
 
     @staticmethod
     def filter_func(images: Images, diff=None, radius=_default_radius, axis=0, cores=None, progress=None):
@@ -39,13 +49,25 @@ class OutliersISISFilter(BaseFilter):
             cores = 1
 
         if diff and radius and diff > 0 and radius > 0:
-            data = images.projections if axis == 0 else images.sinograms
-            func = psm.create_partial(OutliersISISFilter._execute, psm.return_fwd_func, diff=diff, radius=radius)
-            psm.execute(data, func, cores, progress=progress, msg=f"Outliers with threshold {diff} and kernel {radius}")
+            # the slabs are taken directly along the requested axis, the stack is never swapped
+            slab_axis = axis if not images.is_sinograms else 1 - axis
+            psm.execute_slabs(images.data,
+                              _remove_outliers_slab,
+                              SLAB_SIZE,
+                              slab_axis,
+                              cores,
+                              progress=progress,
+                              msg=f"Outliers with threshold {diff} and kernel {radius}",
+                              diff=diff,
+                              radius=radius,
+                              image_axis=slab_axis)
         return images
 
     @staticmethod
     def register_gui(form, on_change, view):
+        from mantidimaging.gui.utility import add_property_to_form
+        from mantidimaging.gui.utility.qt_helpers import Type
+
         _, diff_field = add_property_to_form('Difference',
                                              'float',
                                              1,
@@ -74,3 +96,83 @@ class OutliersISISFilter(BaseFilter):
             raise AttributeError("apply_to_field not given a valid input.")
 
         return partial(OutliersISISFilter.filter_func, diff=diff_field.value(), radius=size_field.value(), axis=axis)
+
+
+def _scratch(shape, dtype) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    :return: Scratch buffers of the worker for a single image: the image, its absolute deviation from the median,
+             and the mask of the replaced pixels
+    """
+    image = utility.scratch_buffer('outliers_isis.image', shape, dtype)
+    abs_diff = utility.scratch_buffer('outliers_isis.abs_diff', shape, dtype)
+    replace = utility.scratch_buffer('outliers_isis.replace', shape, bool)
+    return image, abs_diff, replace
+
+
+def _median_of_flat(values: np.ndarray) -> float:
+    """
+    Median of a contiguous array, that only fully selects the values close to the median.
+
+    The median of a strided sample brackets the median of all values. One pass counts the values
+    below the bracket and extracts the few inside it, and the median is selected from those.
+    The result is the same as np.median, which selects from a copy of all the values.
+    """
+    flat = values.reshape(-1)
+    num_values = flat.size
+    step = num_values // MAD_SAMPLE_SIZE
+    if step < 2:
+        return float(np.median(flat))
+
+    sample = np.sort(flat[::step])
+    # the rank of the sample median varies by about sqrt(n) / 2
+    half_width = int(np.ceil(MAD_BRACKET_DEVIATIONS * np.sqrt(sample.size) / 2))
+    middle = sample.size // 2
+    low = sample[max(0, middle - half_width)]
+    high = sample[min(sample.size - 1, middle + half_width)]
+
+    num_below = int(np.count_nonzero(flat < low))
+    inside = flat[(flat >= low) & (flat <= high)]
+
+    # np.median averages the two middle values when there is an even number of values
+    ranks = [(num_values - 1) // 2, num_values // 2]
+    if not all(num_below <= rank < num_below + inside.size for rank in ranks):
+        return float(np.median(flat))
+
+    inside_ranks = [rank - num_below for rank in ranks]
+    selected = np.partition(inside, inside_ranks)[inside_ranks]
+    return float(np.mean(selected))
+
+
+def _remove_outliers_inplace(image: np.ndarray, diff: float, radius: int, scratch):
+    """
+    Replaces the pixels of the image that deviate from the median filtered image by at least diff
+    times the median absolute deviation of the whole image, with the median.
+
+    :param image: A contiguous image, modified in place
+    :param scratch: Scratch buffers from _scratch
+    """
+    _, abs_diff, replace = scratch
+    median = cpu_median.median_filter(image, radius)
+    np.subtract(image, median, out=abs_diff)
+    np.abs(abs_diff, out=abs_diff)
+    mdev = _median_of_flat(abs_diff)
+    # same as abs_diff / mdev >= diff, without dividing by a zero deviation
+    np.greater_equal(abs_diff, diff * mdev, out=replace)
+    np.copyto(image, median, where=replace)
+
+
+def _remove_outliers_slab(slab: np.ndarray, diff: float, radius: int, image_axis: int = 0):
+    """
+    Removes the outliers of every image of the slab, the images lie along image_axis.
+    """
+    for idx in range(slab.shape[image_axis]):
+        image = slab[idx] if image_axis == 0 else slab[:, idx]
+        work = _scratch(image.shape, image.dtype)
+        if image.flags.c_contiguous:
+            _remove_outliers_inplace(image, diff, radius, work)
+        else:
+            # sinograms are strided, they are processed in a contiguous copy
+            contiguous = work[0]
+            contiguous[:] = image
+            _remove_outliers_inplace(contiguous, diff, radius, work)
+            image[:] = contiguous
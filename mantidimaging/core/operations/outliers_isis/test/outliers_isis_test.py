@@ -2,9 +2,19 @@ import unittest
 from unittest import mock
 
 import numpy as np
+import numpy.testing as npt
+import scipy.ndimage as scipy_ndimage
 
 import mantidimaging.test_helpers.unit_test_helper as th
 from mantidimaging.core.operations.outliers_isis import OutliersISISFilter
+from mantidimaging.core.operations.outliers_isis import outliers_isis
+
+
+def _reference_outliers(data, diff, radius):
+    median = scipy_ndimage.median_filter(data, radius)
+    abs_diff = np.abs(data - median)
+    s = abs_diff / np.median(abs_diff)
+    return np.where(s < diff, data, median)
 
 
 class OutliersISISTest(unittest.TestCase):
@@ -27,6 +37,28 @@ class OutliersISISTest(unittest.TestCase):
 
         th.assert_not_equals(result.data, sample)
 
+    def test_matches_reference(self):
+        for axis in [0, 1]:
+            images = th.generate_images((13, 12, 11))
+            images.data[3, 4, 5] = 50
+            images.data[9, 2, 2] = -50
+            if axis == 0:
+                expected = np.array([_reference_outliers(image, 2, 3) for image in images.data])
+            else:
+                expected = np.swapaxes(
+                    np.array([_reference_outliers(sino, 2, 3) for sino in np.swapaxes(images.data, 0, 1)]), 0, 1)
+
+            OutliersISISFilter.filter_func(images, 2, 3, axis=axis, cores=2)
+
+            npt.assert_array_equal(images.data, expected)
+
+    def test_median_of_flat(self):
+        values = np.random.default_rng(0).exponential(size=(300, 501)).astype(np.float32)
+        self.assertEqual(outliers_isis._median_of_flat(values), np.median(values))
+        self.assertEqual(outliers_isis._median_of_flat(values[:, :500]), np.median(values[:, :500]))
+        values[:] = 0
+        self.assertEqual(outliers_isis._median_of_flat(values), 0)
+
     def test_execute_wrapper_return_is_runnable(self):
         """
         Test that the partial returned by execute_wrapper can be executed (kwargs are named correctly)
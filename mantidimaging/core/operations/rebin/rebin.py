@@ -1,27 +1,42 @@
 from functools import partial
-from typing import Optional
+from typing import Optional, Tuple
 
 import numpy
 import skimage.transform
 
 from mantidimaging import helper as h
 from mantidimaging.core.data import Images
-from mantidimaging.core.operations.base_filter import BaseFilter
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
 from mantidimaging.core.parallel import two_shared_mem as ptsm
 from mantidimaging.core.parallel import utility as pu
-from mantidimaging.gui.utility import add_property_to_form
-from mantidimaging.gui.utility.qt_helpers import Type
+
+REDUCTION_MEAN = 'Mean'
+REDUCTION_SUM = 'Sum'
+REDUCTION_MEDIAN = 'Median'
+REDUCTIONS = (REDUCTION_MEAN, REDUCTION_SUM, REDUCTION_MEDIAN)
+
+# Number of output images written by each slab of the block reduction
+BLOCK_SLAB_SIZE = 4
 
 
 class RebinFilter(BaseFilter):
     """
-    This filter temporarily increases memory usage, while the image is being rebinned.
-    The memory usage will be lowered after the filter has finished executing.
+    When the image is shrunk by an integer factor the pixels are binned by reducing every
+    block of factor x factor pixels, otherwise the image is resized with interpolation.
     """
     filter_name = "Rebin"
+    # the binned stack is allocated while the original is still in memory, see output_shape
+    traits = FilterTraits(axis=FilterAxis.PROJECTION, thread_safe=True, resizes=True)
 
     @staticmethod
-    def filter_func(images: Images, rebin_param=0.5, mode=None, cores=None, chunksize=None, progress=None) -> Images:
+    def filter_func(images: Images,
+                    rebin_param=0.5,
+                    mode=None,
+                    reduction=REDUCTION_MEAN,
+                    projection_factor=1,
+                    cores=None,
+                    chunksize=None,
+                    progress=None) -> Images:
         """
         :param images: Sample data which is to be processed. Expects radiograms
         :param rebin_param: int, float or tuple
@@ -30,6 +45,11 @@ class RebinFilter(BaseFilter):
                             tuple - Size of the output image (x, y).
         :param mode: Interpolation to use for re-sizing
                      ('nearest', 'lanczos', 'bilinear', 'bicubic' or 'cubic').
+        :param reduction: How the blocks of pixels are reduced when binning by an integer factor,
+                          one of 'Mean', 'Sum' or 'Median'
+        :param projection_factor: Number of consecutive images binned together. Binning along the images
+                                  requires an integer binning factor, left over images are dropped.
+                                  A stack with fewer images than the factor is not binned along the images.
         :param cores: The number of cores that will be used to process the data.
         :param chunksize: The number of chunks that each worker will receive.
 
@@ -42,6 +62,11 @@ class RebinFilter(BaseFilter):
         else:
             param_valid = rebin_param > 0
 
+        projection_factor = _projection_factor(images.data.shape, projection_factor)
+        block_factors = _block_factors(images.data.shape, rebin_param)
+        if param_valid and projection_factor > 1 and block_factors is None:
+            raise ValueError("Binning along the images requires an integer binning factor")
+
         if param_valid:
             sample = images.data
             sample_name: Optional[str]
@@ -53,19 +78,30 @@ class RebinFilter(BaseFilter):
                 sample_name = None
                 # force single core execution as it's faster for a single image
                 cores = 1
-            empty_resized_data = _create_reshaped_array(sample.shape, sample.dtype, rebin_param, sample_name)
+            empty_resized_data = _create_reshaped_array(sample.shape, sample.dtype, rebin_param, sample_name,
+                                                        projection_factor)
 
-            f = ptsm.create_partial(skimage.transform.resize,
-                                    ptsm.return_to_second_but_dont_use_it,
-                                    mode=mode,
-                                    output_shape=empty_resized_data.shape[1:])
-            ptsm.execute(sample, empty_resized_data, f, cores, chunksize, progress=progress, msg="Applying Rebin")
+            if block_factors is not None:
+                _execute_block_par(sample, empty_resized_data, (projection_factor, ) + block_factors,
+                                   reduction if reduction else REDUCTION_MEAN, cores, progress)
+            else:
+                _execute_par(sample, empty_resized_data, mode, cores, chunksize, progress)
             images.data = empty_resized_data
 
         return images
 
+    @classmethod
+    def output_shape(cls, shape, rebin_param=0.5, projection_factor=1, **kwargs):
+        if not (min(rebin_param) if isinstance(rebin_param, tuple) else rebin_param) > 0:
+            return tuple(shape)
+        num_images = shape[0] // _projection_factor(shape, projection_factor)
+        return (num_images, ) + _expected_image_shape(shape, rebin_param)
+
     @staticmethod
     def register_gui(form, on_change, view):
+        from mantidimaging.gui.utility import add_property_to_form
+        from mantidimaging.gui.utility.qt_helpers import Type
+
         # Rebin by uniform factor options
         _, factor = add_property_to_form('Factor', 'float', 0.5, (0.0, 1.0), on_change=on_change)
         factor.setSingleStep(0.05)
@@ -104,9 +140,21 @@ class RebinFilter(BaseFilter):
         mode_field = Qt.QComboBox()
         mode_field.addItems(modes())
 
+        # Integer factor binning options
+        label_reduction = Qt.QLabel("Binning")
+        reduction_field = Qt.QComboBox()
+        reduction_field.addItems(REDUCTIONS)
+        reduction_field.setToolTip("How the pixels are combined when shrinking by an integer factor")
+        reduction_field.currentIndexChanged.connect(lambda: on_change())
+
+        label_projection_factor, projection_factor_field = add_property_to_form(
+            'Bin images', Type.INT, 1, (1, 100), tooltip="Number of images binned together", on_change=on_change)
+
         form.addRow(rebin_to_dimensions_radio, shape_fields)
         form.addRow(rebin_by_factor_radio, factor)
         form.addRow(label_mode, mode_field)
+        form.addRow(label_reduction, reduction_field)
+        form.addRow(label_projection_factor, projection_factor_field)
 
         # Ensure good default UI state
         rebin_to_dimensions_radio.setChecked(True)
@@ -119,6 +167,8 @@ class RebinFilter(BaseFilter):
             "rebin_by_factor_radio": rebin_by_factor_radio,
             "factor": factor,
             "mode_field": mode_field,
+            "reduction_field": reduction_field,
+            "projection_factor_field": projection_factor_field,
         }
 
     @staticmethod
@@ -127,7 +177,9 @@ class RebinFilter(BaseFilter):
                         shape_y=None,
                         rebin_by_factor_radio=None,
                         factor=None,
-                        mode_field=None):
+                        mode_field=None,
+                        reduction_field=None,
+                        projection_factor_field=None):
         if rebin_to_dimensions_radio.isChecked():
             params = (shape_x.value(), shape_y.value())
         elif rebin_by_factor_radio.isChecked():
@@ -135,7 +187,13 @@ class RebinFilter(BaseFilter):
         else:
             raise ValueError('Unknown bin dimension mode')
 
-        return partial(RebinFilter.filter_func, mode=mode_field.currentText(), rebin_param=params)
+        reduction = reduction_field.currentText() if reduction_field is not None else REDUCTION_MEAN
+        projection_factor = projection_factor_field.value() if projection_factor_field is not None else 1
+        return partial(RebinFilter.filter_func,
+                       mode=mode_field.currentText(),
+                       rebin_param=params,
+                       reduction=reduction,
+                       projection_factor=projection_factor)
 
 
 def modes():
@@ -151,17 +209,89 @@ def _execute_par(data: numpy.ndarray, resized_data, mode, cores=None, chunksize=
     return resized_data
 
 
-def _create_reshaped_array(old_shape, dtype, rebin_param, sample_name: Optional[str]):
-    num_images = old_shape[0]
-
+def _expected_image_shape(old_shape, rebin_param) -> Tuple[int, int]:
     # use SciPy's calculation to find the expected dimensions
     # int to avoid visible deprecation warning
     if isinstance(rebin_param, tuple):
-        expected_dimy = int(rebin_param[0])
-        expected_dimx = int(rebin_param[1])
+        return int(rebin_param[0]), int(rebin_param[1])
+    return int(rebin_param * old_shape[1]), int(rebin_param * old_shape[2])
+
+
+def _block_factors(old_shape, rebin_param) -> Optional[Tuple[int, int]]:
+    """
+    :return: The binning factors along the rows and columns if the image is shrunk by an integer
+             factor along both, otherwise None. For a target shape the factors must divide the
+             image exactly, for a fraction the left over rows and columns are dropped.
+    """
+    new_shape = _expected_image_shape(old_shape, rebin_param)
+    if min(new_shape) <= 0:
+        return None
+
+    if isinstance(rebin_param, tuple):
+        if any(old % new != 0 for old, new in zip(old_shape[1:], new_shape)):
+            return None
+        return old_shape[1] // new_shape[0], old_shape[2] // new_shape[1]
+
+    factor = round(1 / rebin_param)
+    if factor < 1 or abs(1 / rebin_param - factor) > 1e-6 \
+            or any(old // factor != new for old, new in zip(old_shape[1:], new_shape)):
+        return None
+    return factor, factor
+
+
+def _projection_factor(shape, projection_factor) -> int:
+    """
+    :return: The number of images binned together. The images are not binned if there are fewer of them
+             than the factor, e.g. in the preview of a single image, as that would not leave any image.
+    """
+    if not projection_factor or shape[0] < projection_factor:
+        return 1
+    return projection_factor
+
+
+def _block_reduce(slab: numpy.ndarray, out: numpy.ndarray, factors: Tuple[int, int, int], reduction: str):
+    """
+    Bins the slab into the output by reducing every block of factors pixels, along the images,
+    rows and columns. Left over images, rows and columns of the slab are dropped.
+    """
+    num_images, height, width = out.shape
+    image_factor, row_factor, column_factor = factors
+    slab = slab[:num_images * image_factor, :height * row_factor, :width * column_factor]
+    # one axis per block position, that is reduced, after every output axis
+    blocks = slab.reshape(num_images, image_factor, height, row_factor, width, column_factor)
+
+    if reduction == REDUCTION_MEAN:
+        reduced = blocks.mean(axis=(1, 3, 5), dtype=numpy.float64)
+    elif reduction == REDUCTION_SUM:
+        reduced = blocks.sum(axis=(1, 3, 5), dtype=numpy.float64)
+    elif reduction == REDUCTION_MEDIAN:
+        reduced = numpy.median(blocks, axis=(1, 3, 5))
     else:
-        expected_dimy = int(rebin_param * old_shape[1])
-        expected_dimx = int(rebin_param * old_shape[2])
+        raise ValueError(f"Unknown binning reduction '{reduction}', expected one of {REDUCTIONS}")
+
+    if numpy.issubdtype(out.dtype, numpy.integer):
+        info = numpy.iinfo(out.dtype)
+        reduced = numpy.clip(numpy.rint(reduced), info.min, info.max)
+    out[:] = reduced
+
+
+def _execute_block_par(data: numpy.ndarray, binned_data, factors, reduction, cores=None, progress=None):
+    ptsm.execute_slabs(data,
+                       binned_data,
+                       _block_reduce,
+                       BLOCK_SLAB_SIZE * factors[0],
+                       BLOCK_SLAB_SIZE,
+                       cores=cores,
+                       progress=progress,
+                       msg="Applying Rebin",
+                       factors=factors,
+                       reduction=reduction)
+    return binned_data
+
+
+def _create_reshaped_array(old_shape, dtype, rebin_param, sample_name: Optional[str], projection_factor=1):
+    num_images = old_shape[0] // projection_factor
+    expected_dimy, expected_dimx = _expected_image_shape(old_shape, rebin_param)
 
     # allocate memory for images with new dimensions
     shape = (num_images, expected_dimy, expected_dimx)
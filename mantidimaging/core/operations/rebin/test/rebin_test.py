@@ -6,6 +6,7 @@ import numpy.testing as npt
 
 import mantidimaging.test_helpers.unit_test_helper as th
 from mantidimaging.core.operations.rebin import RebinFilter
+from mantidimaging.core.operations.rebin.rebin import REDUCTION_MEDIAN, REDUCTION_SUM, _block_factors
 from mantidimaging.core.utility.memory_usage import get_memory_usage_linux
 
 
@@ -113,6 +114,61 @@ class RebinTest(unittest.TestCase):
 
         images.free_memory()
 
+    def test_block_factors(self):
+        self.assertEqual(_block_factors((2, 10, 12), 0.5), (2, 2))
+        self.assertEqual(_block_factors((2, 10, 12), 0.25), (4, 4))
+        self.assertEqual(_block_factors((2, 10, 12), (5, 3)), (2, 4))
+        self.assertIsNone(_block_factors((2, 10, 12), 0.3))
+        self.assertIsNone(_block_factors((2, 10, 12), 2.0))
+        self.assertIsNone(_block_factors((2, 10, 12), (4, 3)))
+
+    def test_executed_block_mean(self):
+        images = th.generate_images((7, 10, 12), automatic_free=False)
+        expected = images.data[:, :10, :12].reshape(7, 5, 2, 6, 2).mean(axis=(2, 4))
+
+        result = RebinFilter.filter_func(images, 0.5, 'reflect')
+
+        npt.assert_allclose(result.data, expected, rtol=1e-6)
+        images.free_memory()
+
+    def test_executed_block_sum_images(self):
+        images = th.generate_images((7, 10, 12), automatic_free=False)
+        # the last image has no pair and is dropped
+        expected = images.data[:6].reshape(3, 2, 5, 2, 3, 4).sum(axis=(1, 3, 5))
+
+        result = RebinFilter.filter_func(images, (5, 3), 'reflect', reduction=REDUCTION_SUM, projection_factor=2)
+
+        npt.assert_allclose(result.data, expected, rtol=1e-5)
+        images.free_memory()
+
+    def test_images_are_not_binned_if_fewer_than_factor(self):
+        # the preview is calculated on a single image
+        images = th.generate_images((1, 10, 12), automatic_free=False)
+        expected = images.data.reshape(1, 5, 2, 6, 2).mean(axis=(2, 4))
+
+        result = RebinFilter.filter_func(images, 0.5, 'reflect', projection_factor=2)
+
+        npt.assert_allclose(result.data, expected, rtol=1e-6)
+        self.assertEqual(RebinFilter.output_shape((1, 10, 12), rebin_param=0.5, projection_factor=2), (1, 5, 6))
+        images.free_memory()
+
+    def test_executed_block_median_int(self):
+        images = th.generate_images((4, 9, 9), dtype=np.uint16, automatic_free=False)
+        images.data[:] = np.arange(images.data.size).reshape(images.data.shape) % 1000
+        expected = np.median(images.data.reshape(4, 3, 3, 3, 3), axis=(2, 4))
+
+        result = RebinFilter.filter_func(images, (3, 3), 'reflect', reduction=REDUCTION_MEDIAN)
+
+        self.assertEqual(result.data.dtype, np.uint16)
+        npt.assert_equal(result.data, np.rint(expected))
+        images.free_memory()
+
+    def test_binning_images_requires_integer_factor(self):
+        images = th.generate_images(automatic_free=False)
+
+        self.assertRaises(ValueError, RebinFilter.filter_func, images, 0.3, 'reflect', projection_factor=2)
+        images.free_memory()
+
     def test_memory_change_acceptable(self):
         """
         This filter will increase the memory usage as it has to allocate memory
@@ -150,10 +206,16 @@ class RebinTest(unittest.TestCase):
         factor.value = mock.Mock(return_value=0)
         mode_field = mock.Mock()
         mode_field.currentText = mock.Mock(return_value=0)
+        reduction_field = mock.Mock()
+        reduction_field.currentText = mock.Mock(return_value='Mean')
+        projection_factor_field = mock.Mock()
+        projection_factor_field.value = mock.Mock(return_value=1)
         execute_func = RebinFilter.execute_wrapper(rebin_to_dimensions_radio=rebin_to_dimensions_radio,
                                                    rebin_by_factor_radio=rebin_by_factor_radio,
                                                    factor=factor,
-                                                   mode_field=mode_field)
+                                                   mode_field=mode_field,
+                                                   reduction_field=reduction_field,
+                                                   projection_factor_field=projection_factor_field)
 
         images = th.generate_images(automatic_free=False)
         execute_func(images)
@@ -163,6 +225,8 @@ class RebinTest(unittest.TestCase):
         self.assertEqual(rebin_by_factor_radio.isChecked.call_count, 1)
         self.assertEqual(factor.value.call_count, 1)
         self.assertEqual(mode_field.currentText.call_count, 1)
+        self.assertEqual(reduction_field.currentText.call_count, 1)
+        self.assertEqual(projection_factor_field.value.call_count, 1)
 
 
 if __name__ == '__main__':
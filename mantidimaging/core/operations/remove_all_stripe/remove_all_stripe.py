@@ -1,30 +1,36 @@
 from functools import partial
+from typing import TYPE_CHECKING
 
-from PyQt5.QtWidgets import QSpinBox, QDoubleSpinBox
 from sarepy.prep.stripe_removal_original import remove_all_stripe
 
-from mantidimaging.core.operations.base_filter import BaseFilter
-from mantidimaging.core.parallel import shared_mem as psm
-from mantidimaging.gui.utility.qt_helpers import Type
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
+from mantidimaging.core.parallel.sinogram_slabs import execute_sinograms
+
+if TYPE_CHECKING:
+    from PyQt5.QtWidgets import QSpinBox, QDoubleSpinBox
 
 
 class RemoveAllStripesFilter(BaseFilter):
     filter_name = "Remove all stripes"
+    # the workers keep a scratch slab of sinograms, see execute_sinograms
+    traits = FilterTraits(in_place=True, axis=FilterAxis.SINOGRAM, memory_multiplier=1.0)
 
     @staticmethod
     def filter_func(images, snr=3, la_size=61, sm_size=21, dim=1, cores=None, chunksize=None, progress=None):
-        f = psm.create_partial(remove_all_stripe,
-                               psm.return_fwd_func,
-                               snr=snr,
-                               la_size=la_size,
-                               sm_size=sm_size,
-                               dim=dim)
-        psm.execute(images.data, f, cores, chunksize, progress)
-        return images
+        return execute_sinograms(images,
+                                 remove_all_stripe,
+                                 cores=cores,
+                                 progress=progress,
+                                 msg="Removing all stripes",
+                                 snr=snr,
+                                 la_size=la_size,
+                                 sm_size=sm_size,
+                                 dim=dim)
 
     @staticmethod
     def register_gui(form, on_change, view):
         from mantidimaging.gui.utility import add_property_to_form
+        from mantidimaging.gui.utility.qt_helpers import Type
 
         label, _ = add_property_to_form("This filter requires sinograms\nto produce a sensible result.",
                                         Type.LABEL,
@@ -65,7 +71,8 @@ class RemoveAllStripesFilter(BaseFilter):
         return {'snr': snr, 'la_size': la_size, 'sm_size': sm_size, 'dim': dim}
 
     @staticmethod
-    def execute_wrapper(snr: QDoubleSpinBox, la_size: QSpinBox, sm_size: QSpinBox, dim: QSpinBox):  # type: ignore
+    def execute_wrapper(  # type: ignore
+            snr: 'QDoubleSpinBox', la_size: 'QSpinBox', sm_size: 'QSpinBox', dim: 'QSpinBox'):
         return partial(RemoveAllStripesFilter.filter_func,
                        snr=snr.value(),
                        la_size=la_size.value(),
@@ -1,25 +1,34 @@
 from functools import partial
+from typing import TYPE_CHECKING
 
-from PyQt5.QtWidgets import QSpinBox, QDoubleSpinBox
 from sarepy.prep.stripe_removal_original import remove_unresponsive_and_fluctuating_stripe
 
-from mantidimaging.core.operations.base_filter import BaseFilter
-from mantidimaging.core.parallel import shared_mem as psm
-from mantidimaging.gui.utility.qt_helpers import Type
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
+from mantidimaging.core.parallel.sinogram_slabs import execute_sinograms
+
+if TYPE_CHECKING:
+    from PyQt5.QtWidgets import QSpinBox, QDoubleSpinBox
 
 
 class RemoveDeadStripesFilter(BaseFilter):
     filter_name = "Remove dead stripes"
+    # the workers keep a scratch slab of sinograms, see execute_sinograms
+    traits = FilterTraits(in_place=True, axis=FilterAxis.SINOGRAM, memory_multiplier=1.0)
 
     @staticmethod
     def filter_func(images, snr=3, size=61, cores=None, chunksize=None, progress=None):
-        f = psm.create_partial(remove_unresponsive_and_fluctuating_stripe, psm.return_fwd_func, snr=snr, size=size)
-        psm.execute(images.data, f, cores, chunksize, progress)
-        return images
+        return execute_sinograms(images,
+                                 remove_unresponsive_and_fluctuating_stripe,
+                                 cores=cores,
+                                 progress=progress,
+                                 msg="Removing dead stripes",
+                                 snr=snr,
+                                 size=size)
 
     @staticmethod
     def register_gui(form, on_change, view):
         from mantidimaging.gui.utility import add_property_to_form
+        from mantidimaging.gui.utility.qt_helpers import Type
 
         label, _ = add_property_to_form("This filter requires sinograms\nto produce a sensible result.",
                                         Type.LABEL,
@@ -46,5 +55,5 @@ class RemoveDeadStripesFilter(BaseFilter):
         return {'snr': snr, 'size': size}
 
     @staticmethod
-    def execute_wrapper(snr: QDoubleSpinBox, size: QSpinBox):  # type: ignore
+    def execute_wrapper(snr: 'QDoubleSpinBox', size: 'QSpinBox'):  # type: ignore
         return partial(RemoveDeadStripesFilter.filter_func, snr=snr.value(), size=size.value())
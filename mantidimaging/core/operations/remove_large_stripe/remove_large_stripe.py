@@ -1,25 +1,34 @@
 from functools import partial
+from typing import TYPE_CHECKING
 
-from PyQt5.QtWidgets import QSpinBox, QDoubleSpinBox
 from sarepy.prep.stripe_removal_original import remove_large_stripe
 
-from mantidimaging.core.operations.base_filter import BaseFilter
-from mantidimaging.core.parallel import shared_mem as psm
-from mantidimaging.gui.utility.qt_helpers import Type
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
+from mantidimaging.core.parallel.sinogram_slabs import execute_sinograms
+
+if TYPE_CHECKING:
+    from PyQt5.QtWidgets import QSpinBox, QDoubleSpinBox
 
 
 class RemoveLargeStripesFilter(BaseFilter):
     filter_name = "Remove large stripes"
+    # the workers keep a scratch slab of sinograms, see execute_sinograms
+    traits = FilterTraits(in_place=True, axis=FilterAxis.SINOGRAM, memory_multiplier=1.0)
 
     @staticmethod
     def filter_func(images, snr=3, la_size=61, cores=None, chunksize=None, progress=None):
-        f = psm.create_partial(remove_large_stripe, psm.return_fwd_func, snr=snr, size=la_size)
-        psm.execute(images.data, f, cores, chunksize, progress)
-        return images
+        return execute_sinograms(images,
+                                 remove_large_stripe,
+                                 cores=cores,
+                                 progress=progress,
+                                 msg="Removing large stripes",
+                                 snr=snr,
+                                 size=la_size)
 
     @staticmethod
     def register_gui(form, on_change, view):
         from mantidimaging.gui.utility import add_property_to_form
+        from mantidimaging.gui.utility.qt_helpers import Type
         label, _ = add_property_to_form("This filter requires sinograms\nto produce a sensible result.",
                                         Type.LABEL,
                                         form=form,
@@ -46,5 +55,5 @@ class RemoveLargeStripesFilter(BaseFilter):
         return {'snr': snr, 'la_size': la_size}
 
     @staticmethod
-    def execute_wrapper(snr: QDoubleSpinBox, la_size: QSpinBox):  # type: ignore
+    def execute_wrapper(snr: 'QDoubleSpinBox', la_size: 'QSpinBox'):  # type: ignore
         return partial(RemoveLargeStripesFilter.filter_func, snr=snr.value(), la_size=la_size.value())
@@ -1,13 +1,15 @@
 from functools import partial
 
-from mantidimaging.core.operations.base_filter import BaseFilter
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
+from mantidimaging.core.parallel.sinogram_slabs import execute_sinograms
 from mantidimaging.core.tools import importer
 from mantidimaging.core.utility.progress_reporting import Progress
-from mantidimaging.gui.utility.qt_helpers import Type
 
 
 class StripeRemovalFilter(BaseFilter):
     filter_name = "Stripe Removal"
+    # the workers keep a scratch slab of sinograms, see execute_sinograms
+    traits = FilterTraits(in_place=True, axis=FilterAxis.SINOGRAM, memory_multiplier=1.0)
 
     @staticmethod
     def filter_func(images, wf=None, ti=None, sf=None, cores=None, chunksize=None, progress=None):
@@ -61,18 +63,17 @@ class StripeRemovalFilter(BaseFilter):
         with progress:
             if wf:
                 progress.update(msg=msg.format('Fourier-wavelet'))
-                func = partial(_wf, images.data, wf, cores, chunksize)
+                _wf(images, wf, cores, progress)
             elif sf:
                 progress.update(msg=msg.format('Smoothing-Filter'))
-                func = partial(_sf, images.data, sf, cores, chunksize)
-
-            images.data = func()
+                _sf(images, sf, cores, progress)
 
         return images
 
     @staticmethod
     def register_gui(form, on_change, view):
         from mantidimaging.gui.utility import add_property_to_form
+        from mantidimaging.gui.utility.qt_helpers import Type
 
         label, _ = add_property_to_form("This filter requires sinograms\nto produce a sensible result.",
                                         Type.LABEL,
@@ -174,11 +175,12 @@ def _get_params(params):
         return dict(map(lambda p: p.split('='), params))
 
 
-def _wf(data, params, cores, chunksize):
+def _wf(images, params, cores, progress):
     tomopy = importer.do_importing('tomopy')
 
     # creating a dictionary with all possible params for this func
-    kwargs = dict(level=None, wname=u'db5', sigma=2, pad=True, ncore=cores, nchunk=chunksize)
+    # the slabs are processed in parallel, so tomopy runs on a single core for each of them
+    kwargs = dict(level=None, wname=u'db5', sigma=2, pad=True, ncore=1)
 
     # process the input parameters
     params = _get_params(params)
@@ -191,7 +193,13 @@ def _wf(data, params, cores, chunksize):
     kwargs['sigma'] = int(params.get('sigma')) if params.get('sigma') else kwargs['sigma']
     kwargs['pad'] = bool(params.get('pad')) if params.get('pad') else kwargs['pad']
 
-    return tomopy.prep.stripe.remove_stripe_fw(data, **kwargs)
+    return execute_sinograms(images,
+                             tomopy.prep.stripe.remove_stripe_fw,
+                             per_sinogram=False,
+                             cores=cores,
+                             progress=progress,
+                             msg="Fourier-wavelet stripe removal",
+                             **kwargs)
 
 
 # FIXME takes a huge amount of time even for preview
@@ -215,11 +223,11 @@ def _wf(data, params, cores, chunksize):
 #     return tomopy.prep.stripe.remove_stripe_ti(data, **kwargs)
 
 
-def _sf(data, params, cores, chunksize):
+def _sf(images, params, cores, progress):
     tomopy = importer.do_importing('tomopy')
 
     # creating a dictionary with all possible params for this func
-    kwargs = dict(size=5, ncore=cores, nchunk=chunksize)
+    kwargs = dict(size=5, ncore=1)
 
     # process the input parameters
     params = _get_params(params)
@@ -228,4 +236,10 @@ def _sf(data, params, cores, chunksize):
     # this means if the user hasn't passed anything that matches the string
     # then the default is used
     kwargs['size'] = int(params.get('size')) if params.get('size') else kwargs['size']
-    return tomopy.prep.stripe.remove_stripe_sf(data, **kwargs)
+    return execute_sinograms(images,
+                             tomopy.prep.stripe.remove_stripe_sf,
+                             per_sinogram=False,
+                             cores=cores,
+                             progress=progress,
+                             msg="Smoothing filter stripe removal",
+                             **kwargs)
@@ -1,37 +1,40 @@
 from functools import partial
+from typing import TYPE_CHECKING
 
-from PyQt5.QtWidgets import QSpinBox
 from sarepy.prep.stripe_removal_improved import remove_stripe_based_filtering_sorting, \
     remove_stripe_based_2d_filtering_sorting
 
-from mantidimaging.core.operations.base_filter import BaseFilter
-from mantidimaging.core.parallel import shared_mem as psm
-from mantidimaging.gui.utility.qt_helpers import Type
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
+from mantidimaging.core.parallel.sinogram_slabs import execute_sinograms
+
+if TYPE_CHECKING:
+    from PyQt5.QtWidgets import QSpinBox
 
 
 class RemoveStripeFilteringFilter(BaseFilter):
     filter_name = "Remove stripes with filtering"
+    # the workers keep a scratch slab of sinograms, see execute_sinograms
+    traits = FilterTraits(in_place=True, axis=FilterAxis.SINOGRAM, memory_multiplier=1.0)
 
     @staticmethod
     def filter_func(images, sigma=3, size=21, window_dim=1, filtering_dim=1, cores=None, chunksize=None, progress=None):
         if filtering_dim == 1:
-            f = psm.create_partial(remove_stripe_based_filtering_sorting,
-                                   psm.return_fwd_func,
-                                   sigma=sigma,
-                                   size=size,
-                                   dim=window_dim)
+            func = remove_stripe_based_filtering_sorting
         else:
-            f = psm.create_partial(remove_stripe_based_2d_filtering_sorting,
-                                   psm.return_fwd_func,
-                                   sigma=sigma,
-                                   size=size,
-                                   dim=window_dim)
-        psm.execute(images.data, f, cores, chunksize, progress)
-        return images
+            func = remove_stripe_based_2d_filtering_sorting
+        return execute_sinograms(images,
+                                 func,
+                                 cores=cores,
+                                 progress=progress,
+                                 msg="Removing stripes with filtering",
+                                 sigma=sigma,
+                                 size=size,
+                                 dim=window_dim)
 
     @staticmethod
     def register_gui(form, on_change, view):
         from mantidimaging.gui.utility import add_property_to_form
+        from mantidimaging.gui.utility.qt_helpers import Type
 
         label, _ = add_property_to_form("This filter requires sinograms\nto produce a sensible result.",
                                         Type.LABEL,
@@ -70,7 +73,8 @@ class RemoveStripeFilteringFilter(BaseFilter):
         return {'sigma': sigma, 'size': size, 'window_dim': window_dim, 'filtering_dim': filtering_dim}
 
     @staticmethod
-    def execute_wrapper(sigma: QSpinBox, size: QSpinBox, window_dim: QSpinBox, filtering_dim: QSpinBox):  # type: ignore
+    def execute_wrapper(  # type: ignore
+            sigma: 'QSpinBox', size: 'QSpinBox', window_dim: 'QSpinBox', filtering_dim: 'QSpinBox'):
         return partial(RemoveStripeFilteringFilter.filter_func,
                        sigma=sigma.value(),
                        size=size.value(),
@@ -1,30 +1,35 @@
 from functools import partial
+from typing import TYPE_CHECKING
 
-from PyQt5.QtWidgets import QSpinBox
 from sarepy.prep.stripe_removal_improved import remove_stripe_based_sorting_fitting
 
-from mantidimaging.core.operations.base_filter import BaseFilter
-from mantidimaging.core.parallel import shared_mem as psm
-from mantidimaging.gui.utility.qt_helpers import Type
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
+from mantidimaging.core.parallel.sinogram_slabs import execute_sinograms
+
+if TYPE_CHECKING:
+    from PyQt5.QtWidgets import QSpinBox
 
 
 class RemoveStripeSortingFittingFilter(BaseFilter):
     filter_name = "Remove stripes with sorting and fitting"
+    # the workers keep a scratch slab of sinograms, see execute_sinograms
+    traits = FilterTraits(in_place=True, axis=FilterAxis.SINOGRAM, memory_multiplier=1.0)
 
     @staticmethod
     def filter_func(images, order=1, sigmax=3, sigmay=3, cores=None, chunksize=None, progress=None):
-        f = psm.create_partial(remove_stripe_based_sorting_fitting,
-                               psm.return_fwd_func,
-                               order=order,
-                               sigmax=sigmax,
-                               sigmay=sigmay)
-
-        psm.execute(images.data, f, cores, chunksize, progress)
-        return images
+        return execute_sinograms(images,
+                                 remove_stripe_based_sorting_fitting,
+                                 cores=cores,
+                                 progress=progress,
+                                 msg="Removing stripes with sorting and fitting",
+                                 order=order,
+                                 sigmax=sigmax,
+                                 sigmay=sigmay)
 
     @staticmethod
     def register_gui(form, on_change, view):
         from mantidimaging.gui.utility import add_property_to_form
+        from mantidimaging.gui.utility.qt_helpers import Type
 
         label, _ = add_property_to_form("This filter requires sinograms\nto produce a sensible result.",
                                         Type.LABEL,
@@ -51,7 +56,7 @@ class RemoveStripeSortingFittingFilter(BaseFilter):
         return {'order': order, 'sigmax': sigmax, 'sigmay': sigmay}
 
     @staticmethod
-    def execute_wrapper(order: QSpinBox, sigmax: QSpinBox, sigmay: QSpinBox):  # type: ignore
+    def execute_wrapper(order: 'QSpinBox', sigmax: 'QSpinBox', sigmay: 'QSpinBox'):  # type: ignore
         return partial(RemoveStripeSortingFittingFilter.filter_func,
                        order=order.value(),
                        sigmax=sigmax.value(),
@@ -1,16 +1,23 @@
 from functools import partial
-from typing import Dict, Any
-
-from PyQt5.QtWidgets import QDoubleSpinBox, QComboBox
+from typing import Dict, Any, TYPE_CHECKING
 
 from mantidimaging.core.data import Images
-from mantidimaging.core.operations.base_filter import BaseFilter
-from mantidimaging.gui.utility.qt_helpers import Type
-from mantidimaging.gui.windows.operations import FiltersWindowView
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
+
+if TYPE_CHECKING:
+    from PyQt5.QtWidgets import QDoubleSpinBox, QComboBox
+    from mantidimaging.gui.windows.operations import FiltersWindowView
 
 
 class RescaleFilter(BaseFilter):
     filter_name = 'Rescale'
+    # the masks of the values outside of the input range are the size of the stack, as booleans
+    traits = FilterTraits(in_place=True,
+                          per_image=True,
+                          stack_statistics=True,
+                          axis=FilterAxis.NONE,
+                          thread_safe=True,
+                          memory_multiplier=1.25)
 
     @staticmethod
     def filter_func(images: Images,
@@ -24,8 +31,9 @@ class RescaleFilter(BaseFilter):
         return images
 
     @staticmethod
-    def register_gui(form, on_change, view: FiltersWindowView) -> Dict[str, Any]:
+    def register_gui(form, on_change, view: 'FiltersWindowView') -> Dict[str, Any]:
         from mantidimaging.gui.utility import add_property_to_form
+        from mantidimaging.gui.utility.qt_helpers import Type
         _, min_input_widget = add_property_to_form('Min input',
                                                    Type.FLOAT,
                                                    form=form,
@@ -58,8 +66,8 @@ class RescaleFilter(BaseFilter):
 
     @staticmethod
     def execute_wrapper(  # type: ignore
-            min_input_widget: QDoubleSpinBox, max_input_widget: QDoubleSpinBox, max_output_widget: QDoubleSpinBox,
-            preset_widget: QComboBox) -> partial:
+            min_input_widget: 'QDoubleSpinBox', max_input_widget: 'QDoubleSpinBox', max_output_widget: 'QDoubleSpinBox',
+            preset_widget: 'QComboBox') -> partial:
         min_input = min_input_widget.value()
         max_input = max_input_widget.value()
         max_output = max_output_widget.value()
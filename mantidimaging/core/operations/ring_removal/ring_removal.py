@@ -1,32 +1,59 @@
-from functools import partial
+from functools import lru_cache, partial
+from typing import Optional, Tuple
+
+import numpy as np
+import scipy.ndimage as scipy_ndimage
 
 from mantidimaging import helper as h
 from mantidimaging.core.data import Images
-from mantidimaging.core.operations.base_filter import BaseFilter
-from mantidimaging.core.utility.optional_imports import safe_import
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
+from mantidimaging.core.parallel import shared_mem as psm
 from mantidimaging.core.utility.progress_reporting import Progress
-from mantidimaging.gui.utility.qt_helpers import Type
+
+DEFAULT_THRESH = 300.0
+DEFAULT_THRESH_MAX = 300.0
+DEFAULT_THRESH_MIN = -100.0
+DEFAULT_THETA_MIN = 30
+DEFAULT_RWIDTH = 30
+
+# The rings are averaged over theta_min degrees, so a finer angular sampling of the polar grid
+# only makes the median filter along the radius slower
+MAXIMUM_POLAR_ANGLES = 720
+# Number of slices processed by a worker at a time, progress is reported once per slab
+SLAB_SIZE = 4
 
 
 class RingRemovalFilter(BaseFilter):
     filter_name = "Ring Removal"
+    traits = FilterTraits(in_place=True,
+                          per_image=True,
+                          axis=FilterAxis.PROJECTION,
+                          thread_safe=True,
+                          memory_multiplier=1.0)
 
     @staticmethod
     def filter_func(images: Images,
                     run_ring_removal=False,
                     center_x=None,
                     center_y=None,
-                    thresh=300.0,
-                    thresh_max=300.0,
-                    thresh_min=-100.0,
-                    theta_min=30,
-                    rwidth=30,
+                    thresh=DEFAULT_THRESH,
+                    thresh_max=DEFAULT_THRESH_MAX,
+                    thresh_min=DEFAULT_THRESH_MIN,
+                    theta_min=DEFAULT_THETA_MIN,
+                    rwidth=DEFAULT_RWIDTH,
                     cores=None,
                     chunksize=None,
                     progress=None):
         """
         Removal of ring artifacts in reconstructed volume.
 
+        Every slice is resampled on a polar grid around the centre of rotation, where the rings
+        become lines of constant radius. The rings are the small deviations from a median filter
+        along the radius, averaged along the angle, and are subtracted from the slice after being
+        resampled back. Slabs of slices are processed in parallel with scratch memory for a single
+        slice, and the polar and inverse polar sampling coordinates are computed once for the whole
+        volume.
+
         :param images: Sample data which is to be processed. Expected in radiograms
         :param run_ring_removal: Uses Wavelet-Fourier based ring removal
         :param center_x: (float, optional) abscissa location of center of rotation
@@ -45,56 +72,71 @@ class RingRemovalFilter(BaseFilter):
         """
         progress = Progress.ensure_instance(progress, task_name='Ring Removal')
 
-        tp = safe_import('tomopy.misc.corr')
-
         if run_ring_removal:
             h.check_data_stack(images)
 
             with progress:
-                progress.update(msg="Ring Removal")
-                sample = images.data
-                tp.remove_ring(sample,
-                               center_x=center_x,
-                               center_y=center_y,
-                               thresh=thresh,
-                               thresh_max=thresh_max,
-                               thresh_min=thresh_min,
-                               theta_min=theta_min,
-                               rwidth=rwidth,
-                               ncore=cores,
-                               nchunk=chunksize,
-                               out=sample)
+                _execute(images.data, center_x, center_y, thresh, thresh_max, thresh_min, theta_min, rwidth, cores,
+                         chunksize, progress)
 
         return images
 
     @staticmethod
     def register_gui(form, on_change, view):
         from mantidimaging.gui.utility import add_property_to_form
+        from mantidimaging.gui.utility.qt_helpers import Type
 
         range1 = (0, 1000000)
         range2 = (-1000000, 1000000)
 
-        _, x_field = add_property_to_form('Abcissa X', Type.INT, valid_values=range1, form=form, on_change=on_change)
+        _, x_field = add_property_to_form('Abcissa X',
+                                          Type.INT,
+                                          valid_values=range1,
+                                          tooltip="0 for the middle of the image",
+                                          form=form,
+                                          on_change=on_change)
 
-        _, y_field = add_property_to_form('Ordinate Y', Type.INT, valid_values=range1, form=form, on_change=on_change)
+        _, y_field = add_property_to_form('Ordinate Y',
+                                          Type.INT,
+                                          valid_values=range1,
+                                          tooltip="0 for the middle of the image",
+                                          form=form,
+                                          on_change=on_change)
 
-        _, thresh = add_property_to_form('Threshold', Type.FLOAT, valid_values=range2, form=form, on_change=on_change)
+        _, thresh = add_property_to_form('Threshold',
+                                         Type.FLOAT,
+                                         DEFAULT_THRESH,
+                                         valid_values=range2,
+                                         form=form,
+                                         on_change=on_change)
 
         _, thresh_min = add_property_to_form('Threshold Min',
                                              Type.FLOAT,
+                                             DEFAULT_THRESH_MIN,
                                              valid_values=range2,
                                              form=form,
                                              on_change=on_change)
 
         _, thresh_max = add_property_to_form('Threshold Max',
                                              Type.FLOAT,
+                                             DEFAULT_THRESH_MAX,
                                              valid_values=range2,
                                              form=form,
                                              on_change=on_change)
 
-        _, theta = add_property_to_form('Theta', Type.INT, valid_values=(-1000, 1000), form=form, on_change=on_change)
+        _, theta = add_property_to_form('Theta',
+                                        Type.INT,
+                                        DEFAULT_THETA_MIN,
+                                        valid_values=(-1000, 1000),
+                                        form=form,
+                                        on_change=on_change)
 
-        _, rwidth = add_property_to_form('RWidth', Type.INT, valid_values=range2, form=form, on_change=on_change)
+        _, rwidth = add_property_to_form('RWidth',
+                                         Type.INT,
+                                         DEFAULT_RWIDTH,
+                                         valid_values=range2,
+                                         form=form,
+                                         on_change=on_change)
 
         return {
             "x_field": x_field,
@@ -114,12 +156,121 @@ class RingRemovalFilter(BaseFilter):
                         thresh_min=None,
                         theta=None,
                         rwidth=None):
+        def value(field):
+            return field.value() if field is not None else None
+
+        # a centre of 0 selects the middle of the image
         return partial(RingRemovalFilter.filter_func,
                        run_ring_removal=True,
-                       center_x=x_field,
-                       center_y=y_field,
-                       thresh=thresh,
-                       thresh_max=thresh_max,
-                       thresh_min=thresh_min,
-                       theta_min=theta,
-                       rwidth=rwidth)
+                       center_x=value(x_field) or None,
+                       center_y=value(y_field) or None,
+                       thresh=value(thresh),
+                       thresh_max=value(thresh_max),
+                       thresh_min=value(thresh_min),
+                       theta_min=value(theta),
+                       rwidth=value(rwidth))
+
+
+def _polar_shape(shape: Tuple[int, int], center: Tuple[float, float]) -> Tuple[int, int]:
+    """
+    :return: Number of radii and angles of the polar grid. The radius reaches the furthest corner,
+             and the angular step is about a pixel at the largest radius, up to MAXIMUM_POLAR_ANGLES.
+    """
+    rows, cols = shape
+    center_y, center_x = center
+    max_radius = max(np.hypot(y - center_y, x - center_x) for y in (0, rows - 1) for x in (0, cols - 1))
+    num_radii = int(np.ceil(max_radius)) + 1
+    num_angles = min(MAXIMUM_POLAR_ANGLES, max(8, int(np.ceil(2 * np.pi * max_radius))))
+    return num_radii, num_angles
+
+
+@lru_cache(maxsize=4)
+def _polar_grids(shape: Tuple[int, int], center: Tuple[float, float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The sampling coordinates of the polar transform and of its inverse. They only depend on the
+    shape of the slices and on the centre, so they are computed once per volume.
+
+    :return: The image coordinates of every (radius, angle) of the polar grid, and the polar grid
+             coordinates of every pixel of the image
+    """
+    num_radii, num_angles = _polar_shape(shape, center)
+    center_y, center_x = center
+
+    radii = np.arange(num_radii, dtype=np.float64)[:, np.newaxis]
+    angles = (2 * np.pi / num_angles) * np.arange(num_angles)[np.newaxis, :]
+    polar_coords = np.array([center_y + radii * np.sin(angles), center_x + radii * np.cos(angles)], dtype=np.float32)
+
+    y, x = np.mgrid[:shape[0], :shape[1]]
+    radius = np.hypot(y - center_y, x - center_x)
+    angle = np.mod(np.arctan2(y - center_y, x - center_x), 2 * np.pi) * (num_angles / (2 * np.pi))
+    image_coords = np.array([radius, angle], dtype=np.float32)
+
+    polar_coords.setflags(write=False)
+    image_coords.setflags(write=False)
+    return polar_coords, image_coords
+
+
+def _remove_ring_slab(slab: np.ndarray, polar_coords: np.ndarray, image_coords: np.ndarray, thresh: float,
+                      thresh_max: float, thresh_min: float, theta_min: int, rwidth: int):
+    """
+    Removes the rings of a slab of slices in place. The scratch arrays are the size of one slice
+    and of its polar transform, and are reused for every slice of the slab.
+    """
+    num_radii, num_angles = polar_coords.shape[1:]
+    clipped = np.empty(slab.shape[1:], dtype=np.float32)
+    polar = np.empty((num_radii, num_angles), dtype=np.float32)
+    median = np.empty_like(polar)
+    # the first angle is repeated at the end, so that the inverse transform wraps around
+    rings = np.empty((num_radii, num_angles + 1), dtype=np.float32)
+    correction = np.empty_like(clipped)
+    angle_width = max(1, int(round(theta_min / 360 * num_angles)))
+
+    for image in slab:
+        np.clip(image, thresh_min, thresh_max, out=clipped, casting='unsafe')
+        scipy_ndimage.map_coordinates(clipped, polar_coords, output=polar, order=1, mode='nearest')
+
+        # the rings are lines of constant radius, they are removed by a median along the radius
+        scipy_ndimage.median_filter(polar, size=(max(1, rwidth), 1), output=median, mode='nearest')
+        np.subtract(polar, median, out=polar)
+        # larger deviations are structures of the sample, not rings
+        polar[np.abs(polar) > thresh] = 0
+        # the rings are constant along the angle, the noise is averaged out
+        scipy_ndimage.uniform_filter1d(polar, angle_width, axis=1, output=rings[:, :-1], mode='wrap')
+        rings[:, -1] = rings[:, 0]
+
+        scipy_ndimage.map_coordinates(rings, image_coords, output=correction, order=1, mode='nearest')
+        np.subtract(image, correction, out=image, casting='unsafe')
+
+
+def _execute(data: np.ndarray,
+             center_x: Optional[float],
+             center_y: Optional[float],
+             thresh: Optional[float],
+             thresh_max: Optional[float],
+             thresh_min: Optional[float],
+             theta_min: Optional[int],
+             rwidth: Optional[int],
+             cores=None,
+             chunksize=None,
+             progress=None):
+    rows, cols = data.shape[1:]
+    if center_y is None:
+        center_y = (rows - 1) / 2.
+    if center_x is None:
+        center_x = (cols - 1) / 2.
+    polar_coords, image_coords = _polar_grids((rows, cols), (center_y, center_x))
+    # the grids are inherited by the workers instead of being copied for every slab
+    shared_kwargs = {'polar_coords': polar_coords, 'image_coords': image_coords}
+
+    psm.execute_slabs(data,
+                      _remove_ring_slab,
+                      SLAB_SIZE,
+                      cores=cores,
+                      progress=progress,
+                      msg="Ring Removal",
+                      shared_kwargs=shared_kwargs,
+                      thresh=thresh if thresh is not None else DEFAULT_THRESH,
+                      thresh_max=thresh_max if thresh_max is not None else DEFAULT_THRESH_MAX,
+                      thresh_min=thresh_min if thresh_min is not None else DEFAULT_THRESH_MIN,
+                      theta_min=theta_min if theta_min is not None else DEFAULT_THETA_MIN,
+                      rwidth=rwidth if rwidth is not None else DEFAULT_RWIDTH)
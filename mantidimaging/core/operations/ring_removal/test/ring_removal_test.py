@@ -4,8 +4,9 @@ import numpy as np
 import numpy.testing as npt
 
 import mantidimaging.test_helpers.unit_test_helper as th
-from mantidimaging.core.operations.ring_removal import RingRemovalFilter
+from mantidimaging.core.operations.ring_removal import RingRemovalFilter, ring_removal
 from mantidimaging.core.utility.memory_usage import get_memory_usage_linux
+from mantidimaging.core.utility.optional_imports import safe_import, tomopy_available
 
 
 class RingRemovalTest(unittest.TestCase):
@@ -38,6 +39,68 @@ class RingRemovalTest(unittest.TestCase):
 
         self.assertLess(get_memory_usage_linux(kb=True)[0], cached_memory * 1.1)
 
+    @staticmethod
+    def _ring_sample(size=128):
+        y, x = np.mgrid[:size, :size]
+        radius = np.hypot(y - (size - 1) / 2, x - (size - 1) / 2)
+        sample = 20 + 30 * (radius < 50)
+        ring = 10 * np.exp(-((radius - 30) / 1.5)**2)
+        return radius, sample, ring
+
+    def test_executed_removes_ring(self):
+        radius, sample, ring = self._ring_sample()
+
+        images = th.generate_images((3, ) + sample.shape)
+        images.data[:] = sample + ring
+
+        result = RingRemovalFilter.filter_func(images, run_ring_removal=True, cores=1)
+
+        on_ring = np.abs(radius - 30) < 1.5
+        error = np.abs(result.data - sample)
+        self.assertLess(error[:, on_ring].mean(), 0.2 * ring[on_ring].mean())
+        self.assertLess(error[:, radius < 45].mean(), 0.5)
+
+    def test_executed_in_slabs_matches_single_slab(self):
+        radius, sample, ring = self._ring_sample(64)
+        images = th.generate_images((2 * ring_removal.SLAB_SIZE + 1, ) + sample.shape)
+        images.data[:] = sample + ring
+        images.data[:] += np.arange(images.num_images).reshape(-1, 1, 1)
+        expected = np.copy(images.data)
+        polar_coords, image_coords = ring_removal._polar_grids(sample.shape, (31.5, 31.5))
+        ring_removal._remove_ring_slab(expected, polar_coords, image_coords, ring_removal.DEFAULT_THRESH,
+                                       ring_removal.DEFAULT_THRESH_MAX, ring_removal.DEFAULT_THRESH_MIN,
+                                       ring_removal.DEFAULT_THETA_MIN, ring_removal.DEFAULT_RWIDTH)
+
+        RingRemovalFilter.filter_func(images, run_ring_removal=True)
+
+        npt.assert_allclose(images.data, expected, rtol=1e-6)
+
+    @unittest.skipIf(not tomopy_available(), reason="Needs tomopy to compare with its ring removal")
+    def test_executed_close_to_tomopy(self):
+        radius, sample, ring = self._ring_sample()
+        images = th.generate_images((3, ) + sample.shape)
+        images.data[:] = sample + ring
+        expected = safe_import('tomopy.misc.corr').remove_ring(np.copy(images.data), ncore=1)
+
+        RingRemovalFilter.filter_func(images, run_ring_removal=True, cores=1)
+
+        inside = radius < 45
+        self.assertLess(np.abs(images.data - expected)[:, inside].mean(), 0.1 * ring.max())
+
+    def test_executed_flat_image_unchanged(self):
+        images = th.generate_images((2, 40, 50))
+        images.data[:] = 5
+
+        RingRemovalFilter.filter_func(images, run_ring_removal=True, cores=1)
+
+        npt.assert_allclose(images.data, 5, atol=1e-5)
+
+    def test_polar_grids_cached(self):
+        polar_coords, image_coords = ring_removal._polar_grids((20, 30), (9.5, 14.5))
+        self.assertIs(ring_removal._polar_grids((20, 30), (9.5, 14.5))[0], polar_coords)
+        self.assertEqual(image_coords.shape, (2, 20, 30))
+        self.assertFalse(polar_coords.flags.writeable)
+
     def test_execute_wrapper_return_is_runnable(self):
         """
         Test that the partial returned by execute_wrapper can be executed (kwargs are named correctly)
@@ -3,24 +3,45 @@ from logging import getLogger
 from typing import Any, Dict
 
 import numpy as np
+from scipy import stats
 
 from mantidimaging import helper as h
 from mantidimaging.core.data import Images
-from mantidimaging.core.operations.base_filter import BaseFilter
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
 from mantidimaging.core.parallel import two_shared_mem as ptsm
 from mantidimaging.core.parallel import utility as pu
 from mantidimaging.core.utility import value_scaling
 from mantidimaging.core.utility.progress_reporting import Progress
 from mantidimaging.core.utility.sensible_roi import SensibleROI
-from mantidimaging.gui.utility import add_property_to_form
-from mantidimaging.gui.windows.stack_visualiser import SVParameters
+
+STATISTIC_MEAN = 'Mean'
+STATISTIC_MEDIAN = 'Median'
+STATISTIC_TRIMMED_MEAN = 'Trimmed mean'
+STATISTICS = (STATISTIC_MEAN, STATISTIC_MEDIAN, STATISTIC_TRIMMED_MEAN)
+
+# Fraction of the air region pixels cut from each end by the trimmed mean
+DEFAULT_TRIM_PROPORTION = 0.1
+# Number of images in each slab, whose air statistics are computed and which is divided by them in one pass
+SLAB_SIZE = 8
 
 
 class RoiNormalisationFilter(BaseFilter):
     filter_name = "ROI Normalisation"
+    traits = FilterTraits(in_place=True,
+                          per_image=True,
+                          axis=FilterAxis.PROJECTION,
+                          thread_safe=True,
+                          memory_multiplier=1.0)
 
     @staticmethod
-    def filter_func(images: Images, air_region: SensibleROI = None, cores=None, chunksize=None, progress=None):
+    def filter_func(images: Images,
+                    air_region: SensibleROI = None,
+                    statistic=STATISTIC_MEAN,
+                    trim_proportion=DEFAULT_TRIM_PROPORTION,
+                    include_180deg=False,
+                    cores=None,
+                    chunksize=None,
+                    progress=None):
         """
         Normalise by beam intensity.
 
@@ -35,6 +56,14 @@ class RoiNormalisationFilter(BaseFilter):
                            from which sums will be calculated and all images will
                            be normalised.
 
+        :param statistic: How the air region of each image is summarised: 'Mean', 'Median',
+                          which ignores hot pixels, or 'Trimmed mean'.
+
+        :param trim_proportion: Fraction of the air region pixels cut from each end by the trimmed mean.
+
+        :param include_180deg: Also normalise the loaded 180 degree projection, by the air statistic
+                               of the projection of the stack closest to 180 degrees.
+
         :param cores: The number of cores that will be used to process the data.
 
         :param chunksize: The number of chunks that each worker will receive.
@@ -47,18 +76,41 @@ class RoiNormalisationFilter(BaseFilter):
         # just get data reference
         if air_region:
             progress = Progress.ensure_instance(progress, task_name='ROI Normalisation')
-            _execute(images.data, air_region, cores, chunksize, progress)
+            air_values = _execute(images.data, air_region, cores, chunksize, progress, statistic, trim_proportion)
+            if include_180deg and images.has_proj180deg():
+                images_180deg = images.proj180deg.data
+                np.true_divide(images_180deg,
+                               images_180deg.dtype.type(air_values[_index_of_180deg(images)]),
+                               out=images_180deg)
         h.check_data_stack(images)
         return images
 
     @staticmethod
     def register_gui(form, on_change, view):
+        from mantidimaging.gui.utility import add_property_to_form
+        from mantidimaging.gui.utility.qt_helpers import Type
+
         add_property_to_form("Select ROI on stack visualiser.", "label", form=form, on_change=on_change)
-        return {}
+        _, statistic_field = add_property_to_form('Air statistic',
+                                                  Type.CHOICE,
+                                                  valid_values=STATISTICS,
+                                                  tooltip="How the air region of each image is summarised",
+                                                  form=form,
+                                                  on_change=on_change)
+        _, include_180deg_field = add_property_to_form(
+            'Reuse for 180 degree',
+            Type.BOOL,
+            default_value=False,
+            tooltip="Normalise the loaded 180 degree projection by the air statistic of the closest projection",
+            form=form,
+            on_change=on_change)
+        return {'statistic_field': statistic_field, 'include_180deg_field': include_180deg_field}
 
     @staticmethod
-    def execute_wrapper():
-        return partial(RoiNormalisationFilter.filter_func)
+    def execute_wrapper(statistic_field=None, include_180deg_field=None):
+        statistic = statistic_field.currentText() if statistic_field is not None else STATISTIC_MEAN
+        include_180deg = include_180deg_field.isChecked() if include_180deg_field is not None else False
+        return partial(RoiNormalisationFilter.filter_func, statistic=statistic, include_180deg=include_180deg)
 
     @staticmethod
     def do_before_wrapper() -> partial:
@@ -70,46 +122,81 @@ class RoiNormalisationFilter(BaseFilter):
 
     @staticmethod
     def sv_params() -> Dict[str, Any]:
-        return {"air_region": SVParameters.ROI}
-
-
-def _calc_sum(data, air_sums, air_left=None, air_top=None, air_right=None, air_bottom=None):
-    return data[air_top:air_bottom, air_left:air_right].mean()
+        from mantidimaging.gui.windows.stack_visualiser import SVParameters
 
-
-def _divide_by_air_sum(data=None, air_sums=None):
-    data[:] = np.true_divide(data, air_sums)
+        return {"air_region": SVParameters.ROI}
 
 
-def _execute(data, air_region: SensibleROI, cores=None, chunksize=None, progress=None):
+def _index_of_180deg(images: Images) -> int:
+    """
+    :return: The index of the projection of the stack closest to 180 degrees
+    """
+    angles = np.asarray(images.projection_angles().value)[:images.num_projections]
+    return int(np.argmin(np.abs(angles - np.pi)))
+
+
+def _air_statistics(air: np.ndarray, statistic=STATISTIC_MEAN, trim_proportion=DEFAULT_TRIM_PROPORTION):
+    """
+    :param air: The air regions of a slab of images
+    :return: The statistic of the air region of each image as a float64 array
+    """
+    air = air.reshape(air.shape[0], -1)
+    if statistic == STATISTIC_MEAN:
+        return air.mean(axis=1, dtype=np.float64)
+    elif statistic == STATISTIC_MEDIAN:
+        return np.median(air, axis=1)
+    return stats.trim_mean(air, trim_proportion, axis=1)
+
+
+def _normalise_slab(data=None, air_values=None, air_region=None, statistic=None, trim_proportion=None):
+    """
+    Computes the air statistics of a slab of images into air_values, and divides the slab by them.
+    """
+    air = data[:, air_region.top:air_region.bottom, air_region.left:air_region.right]
+    air_values[:, 0, 0] = _air_statistics(air, statistic, trim_proportion)
+    np.true_divide(data, air_values.astype(data.dtype), out=data)
+
+
+def _execute(data,
+             air_region: SensibleROI,
+             cores=None,
+             chunksize=None,
+             progress=None,
+             statistic=STATISTIC_MEAN,
+             trim_proportion=DEFAULT_TRIM_PROPORTION) -> np.ndarray:
+    """
+    Normalises every image by the statistic of its air region, in a single parallel pass over slabs
+    of images: the air statistics of each slab are computed and the slab is divided by them at once.
+
+    :return: The statistic of the air region of each image
+    """
     log = getLogger(__name__)
+    if statistic not in STATISTICS:
+        raise ValueError(f"Unknown air region statistic '{statistic}', expected one of {STATISTICS}")
 
     with progress:
         progress.update(msg="Normalization by air region")
         if isinstance(air_region, list):
             air_region = SensibleROI.from_list(air_region)
 
-        # initialise same number of air sums
-        img_num = data.shape[0]
-        with pu.temp_shared_array((img_num, 1, 1), data.dtype) as air_sums:
-            # turn into a 1D array, from the 3D that is returned
-            air_sums = air_sums.reshape(img_num)
-
-            calc_sums_partial = ptsm.create_partial(_calc_sum,
-                                                    fwd_function=ptsm.return_to_second,
-                                                    air_left=air_region.left,
-                                                    air_top=air_region.top,
-                                                    air_right=air_region.right,
-                                                    air_bottom=air_region.bottom)
-
-            data, air_sums = ptsm.execute(data, air_sums, calc_sums_partial, cores, chunksize, progress=progress)
-
-            air_sums_partial = ptsm.create_partial(_divide_by_air_sum, fwd_function=ptsm.inplace)
-
-            data, air_sums = ptsm.execute(data, air_sums, air_sums_partial, cores, chunksize, progress=progress)
-
-            avg = np.average(air_sums)
-            max_avg = np.max(air_sums) / avg
-            min_avg = np.min(air_sums) / avg
-
-            log.info(f"Normalization by air region. " f"Average: {avg}, max ratio: {max_avg}, min ratio: {min_avg}.")
+        air_values: np.ndarray
+        with pu.temp_shared_array((data.shape[0], 1, 1), np.float64) as air_values:
+            ptsm.execute_slabs(data,
+                               air_values,
+                               _normalise_slab,
+                               SLAB_SIZE,
+                               SLAB_SIZE,
+                               cores=cores,
+                               progress=progress,
+                               msg="Normalization by air region",
+                               air_region=air_region,
+                               statistic=statistic,
+                               trim_proportion=trim_proportion)
+            air_values = air_values.reshape(-1).copy()
+
+        avg = np.average(air_values)
+        max_avg = np.max(air_values) / avg
+        min_avg = np.min(air_values) / avg
+
+        log.info(f"Normalization by air region. " f"Average: {avg}, max ratio: {max_avg}, min ratio: {min_avg}.")
+    return air_values
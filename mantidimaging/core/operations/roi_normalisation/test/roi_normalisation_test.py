@@ -1,10 +1,13 @@
 import unittest
+from unittest import mock
 
 import numpy as np
 import numpy.testing as npt
 
 import mantidimaging.test_helpers.unit_test_helper as th
 from mantidimaging.core.operations.roi_normalisation import RoiNormalisationFilter
+from mantidimaging.core.operations.roi_normalisation.roi_normalisation import STATISTIC_MEDIAN, \
+    STATISTIC_TRIMMED_MEAN
 
 
 class ROINormalisationTest(unittest.TestCase):
@@ -47,6 +50,66 @@ class ROINormalisationTest(unittest.TestCase):
 
         th.assert_not_equals(result.data[0], original)
 
+    def test_executed_mean(self):
+        images = th.generate_images()
+        air = [3, 3, 6, 5]
+        expected = images.data / images.data[:, 3:5, 3:6].mean(axis=(1, 2)).reshape(-1, 1, 1)
+
+        result = RoiNormalisationFilter.filter_func(images, air)
+
+        npt.assert_allclose(result.data, expected, rtol=1e-5)
+
+    def test_executed_median_ignores_hot_pixel(self):
+        images = th.generate_images()
+        images.data[:, 3:5, 3:6] = 2
+        images.data[:, 3, 3] = 1000
+        expected = images.data / 2
+
+        result = RoiNormalisationFilter.filter_func(images, [3, 3, 6, 5], statistic=STATISTIC_MEDIAN)
+
+        npt.assert_allclose(result.data, expected, rtol=1e-6)
+
+    def test_executed_trimmed_mean(self):
+        images = th.generate_images()
+        images.data[:, 3:5, 3:8] = 2
+        images.data[:, 3, 3] = 1000
+        images.data[:, 4, 7] = 0
+        expected = images.data / 2
+
+        result = RoiNormalisationFilter.filter_func(images, [3, 3, 8, 5],
+                                                    statistic=STATISTIC_TRIMMED_MEAN,
+                                                    trim_proportion=0.1)
+
+        npt.assert_allclose(result.data, expected, rtol=1e-6)
+
+    def test_executed_include_180deg(self):
+        images = th.generate_images((11, 10, 10))
+        images.data[5] *= 3
+        images.proj180deg = th.generate_images((1, 10, 10))
+        air = [3, 3, 6, 5]
+        # with the default angles from 0 to 360 degrees, the sixth projection is at 180 degrees
+        expected_180deg = images.proj180deg.data / images.data[5, 3:5, 3:6].mean()
+
+        RoiNormalisationFilter.filter_func(images, air, include_180deg=True)
+
+        npt.assert_allclose(images.proj180deg.data, expected_180deg, rtol=1e-5)
+
+    def test_executed_without_180deg_leaves_it(self):
+        images = th.generate_images()
+        images.proj180deg = th.generate_images((1, 10, 10))
+        original_180deg = np.copy(images.proj180deg.data)
+
+        RoiNormalisationFilter.filter_func(images, [3, 3, 6, 5])
+
+        npt.assert_equal(images.proj180deg.data, original_180deg)
+
+    def test_unknown_statistic_raises(self):
+        images = th.generate_images()
+        original = np.copy(images.data)
+
+        self.assertRaises(ValueError, RoiNormalisationFilter.filter_func, images, [3, 3, 6, 5], statistic="Mode")
+        npt.assert_equal(images.data, original)
+
     def test_execute_wrapper_return_is_runnable(self):
         """
         Test that the partial returned by execute_wrapper can be executed (kwargs are named correctly)
@@ -54,6 +117,14 @@ class ROINormalisationTest(unittest.TestCase):
         images = th.generate_images()
         RoiNormalisationFilter.execute_wrapper()(images)
 
+        statistic_field = mock.Mock()
+        statistic_field.currentText = mock.Mock(return_value=STATISTIC_MEDIAN)
+        include_180deg_field = mock.Mock()
+        include_180deg_field.isChecked = mock.Mock(return_value=True)
+        RoiNormalisationFilter.execute_wrapper(statistic_field, include_180deg_field)(images)
+        self.assertEqual(statistic_field.currentText.call_count, 1)
+        self.assertEqual(include_180deg_field.isChecked.call_count, 1)
+
 
 if __name__ == '__main__':
     unittest.main()
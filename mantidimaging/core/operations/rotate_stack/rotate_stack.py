@@ -1,23 +1,35 @@
-from functools import partial
+from functools import lru_cache, partial
+from typing import Optional
 
-from skimage.transform import rotate
+import numpy as np
+from skimage.transform import AffineTransform, SimilarityTransform, warp
 
 from mantidimaging import helper as h
 from mantidimaging.core.data import Images
-from mantidimaging.core.operations.base_filter import BaseFilter
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
 from mantidimaging.core.parallel import shared_mem as psm
 from mantidimaging.core.utility.progress_reporting import Progress
-from mantidimaging.gui.utility.qt_helpers import Type
+
+# Number of images in each slab rotated by a multiple of 90 degrees
+QUARTER_TURN_SLAB_SIZE = 8
 
 
 class RotateFilter(BaseFilter):
     filter_name = "Rotate Stack"
+    traits = FilterTraits(in_place=True,
+                          per_image=True,
+                          axis=FilterAxis.PROJECTION,
+                          thread_safe=True,
+                          memory_multiplier=1.0)
 
     @staticmethod
     def filter_func(data: Images, angle=None, dark=None, cores=None, chunksize=None, progress=None):
         """
         Rotates images by an arbitrary degree.
 
+        Rotations by a multiple of 90 degrees are exact and do not interpolate, as long as the
+        rotated images keep their shape, i.e. 180 degrees or square images.
+
         :param data: stack of sample images
         :param angle: The rotation to be performed, in degrees
         :param cores: cores for parallel execution
@@ -35,6 +47,7 @@ class RotateFilter(BaseFilter):
     @staticmethod
     def register_gui(form, on_change, view):
         from mantidimaging.gui.utility import add_property_to_form
+        from mantidimaging.gui.utility.qt_helpers import Type
 
         _, angle = add_property_to_form('Angle of rotation\ncounter clockwise (degrees)',
                                         Type.FLOAT,
@@ -50,12 +63,43 @@ class RotateFilter(BaseFilter):
         return partial(RotateFilter.filter_func, angle=angle.value())
 
 
-def _rotate_image_inplace(data, angle=None):
-    data[:, :] = rotate(data[:, :], angle)
+def _quarter_turns(angle: float) -> Optional[int]:
+    """
+    :return: The number of counter clockwise quarter turns if the angle is a multiple of 90 degrees
+    """
+    if angle % 90 != 0:
+        return None
+    return int(round(angle / 90)) % 4
+
+
+@lru_cache(maxsize=8)
+def _rotation_transform(shape, angle: float) -> AffineTransform:
+    """
+    The transform from the output to the input coordinates used by skimage.transform.rotate,
+    built once per image shape and angle instead of once per image.
+    """
+    rows, cols = shape
+    center = np.array((cols, rows)) / 2.0 - 0.5
+    tform = SimilarityTransform(translation=-center) + SimilarityTransform(rotation=np.deg2rad(angle)) \
+        + SimilarityTransform(translation=center)
+    matrix = tform.params.copy()
+    # make sure the transform is exactly affine, for the fast warp
+    matrix[2] = (0, 0, 1)
+    return AffineTransform(matrix=matrix)
 
 
 def _rotate_image(data, angle=None):
-    return rotate(data[:, :], angle)
+    # same as skimage.transform.rotate, but keeping the range of integer images
+    return warp(data[:, :], _rotation_transform(data.shape, angle), order=1, mode='constant', preserve_range=True)
+
+
+def _rotate_image_inplace(data, angle=None):
+    data[:, :] = _rotate_image(data, angle)
+
+
+def _rotate_quarter_turns_slab(slab, turns=None):
+    # rot90 returns a view of the slab, copy it before overwriting the slab
+    slab[:] = np.rot90(slab, turns, axes=(1, 2)).copy()
 
 
 def _execute_seq(data, angle: float, progress: Progress):
@@ -73,15 +117,26 @@ def _execute_seq(data, angle: float, progress: Progress):
 
 def _execute(data, angle: float, cores: int, chunksize: int, progress: Progress):
     progress = Progress.ensure_instance(progress, task_name='Rotate Stack')
+    turns = _quarter_turns(angle)
 
     with progress:
-        f = psm.create_partial(_rotate_image_inplace, fwd_func=psm.inplace, angle=angle)
-
-        data = psm.execute(data,
-                           f,
-                           cores=cores,
-                           chunksize=chunksize,
-                           progress=progress,
-                           msg=f"Rotating by {angle} degrees")
+        if turns is not None and (turns % 2 == 0 or data.shape[1] == data.shape[2]):
+            if turns:
+                data = psm.execute_slabs(data,
+                                         _rotate_quarter_turns_slab,
+                                         QUARTER_TURN_SLAB_SIZE,
+                                         cores=cores,
+                                         progress=progress,
+                                         msg=f"Rotating by {angle} degrees",
+                                         turns=turns)
+        else:
+            f = psm.create_partial(_rotate_image_inplace, fwd_func=psm.inplace, angle=angle)
+
+            data = psm.execute(data,
+                               f,
+                               cores=cores,
+                               chunksize=chunksize,
+                               progress=progress,
+                               msg=f"Rotating by {angle} degrees")
 
     return data
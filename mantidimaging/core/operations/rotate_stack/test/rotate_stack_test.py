@@ -1,7 +1,9 @@
 import unittest
 from unittest import mock
 
+import numpy as np
 import numpy.testing as npt
+from skimage.transform import rotate
 
 import mantidimaging.test_helpers.unit_test_helper as th
 from mantidimaging.core.operations.rotate_stack import RotateFilter
@@ -34,6 +36,33 @@ class RotateStackTest(unittest.TestCase):
 
         npt.assert_equal(result.data[:, :, -1], 42)
 
+    def test_quarter_turns_exact(self):
+        for rotation in [90, 180, 270, -90, 360]:
+            images = th.generate_images((10, 10, 10))
+            expected = np.stack([rotate(image, rotation) for image in images.data])
+
+            RotateFilter.filter_func(images, rotation)
+
+            npt.assert_allclose(images.data, expected, atol=1e-6, err_msg=str(rotation))
+
+    def test_arbitrary_angle_matches_skimage(self):
+        for shape, rotation in [((4, 10, 10), 13.5), ((4, 9, 14), 90)]:
+            images = th.generate_images(shape)
+            expected = np.stack([rotate(image, rotation) for image in images.data])
+
+            RotateFilter.filter_func(images, rotation)
+
+            npt.assert_allclose(images.data, expected, atol=1e-6, err_msg=str(rotation))
+
+    def test_integer_range_kept(self):
+        images = th.generate_images((4, 10, 10), dtype=np.uint16)
+        images.data[:] = 1000
+
+        RotateFilter.filter_func(images, 13.5)
+
+        # the corners are rotated out of the image
+        npt.assert_equal(images.data[:, 3:7, 3:7], 1000)
+
     def test_memory_change_acceptable(self):
         """
         Expected behaviour for the filter is to be done in place
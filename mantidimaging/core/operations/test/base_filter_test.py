@@ -0,0 +1,117 @@
+import importlib
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import mantidimaging.test_helpers.unit_test_helper as th
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterAxis, FilterTraits
+from mantidimaging.core.operations.crop_coords import CropCoordinatesFilter
+from mantidimaging.core.operations.gaussian import GaussianFilter
+from mantidimaging.core.operations.minus_log import MinusLogFilter
+from mantidimaging.core.operations.rebin import RebinFilter
+from mantidimaging.core.utility.registrator import get_package_children
+
+GB = 1024**3
+
+
+def importable_filters():
+    """
+    The filters of the operations package, except those whose optional dependencies are not installed
+    """
+    for package in get_package_children('mantidimaging.core.operations', packages=True):
+        try:
+            module = importlib.import_module(package.name)
+        except ImportError:
+            continue
+        if hasattr(module, 'FILTER_CLASS'):
+            yield module.FILTER_CLASS
+
+
+class BaseFilterTest(unittest.TestCase):
+    def test_every_filter_declares_traits(self):
+        for filter_class in importable_filters():
+            self.assertIsNot(filter_class.traits, BaseFilter.traits, filter_class.filter_name)
+            self.assertIsInstance(filter_class.traits.axis, FilterAxis)
+            self.assertGreaterEqual(filter_class.traits.memory_multiplier, 1, filter_class.filter_name)
+
+    def test_filters_with_filter_slab_are_per_image(self):
+        for filter_class in importable_filters():
+            if filter_class.has_filter_slab():
+                self.assertTrue(filter_class.traits.per_image, filter_class.filter_name)
+
+    def test_estimate_peak_memory_in_place(self):
+        self.assertEqual(MinusLogFilter.estimate_peak_memory((10, 20, 30), np.float32), 10 * 20 * 30 * 4)
+
+    def test_estimate_peak_memory_default_is_a_copy(self):
+        class UnknownFilter(BaseFilter):
+            pass
+
+        self.assertEqual(UnknownFilter.estimate_peak_memory((10, 20, 30), np.float32), 2 * 10 * 20 * 30 * 4)
+
+    def test_estimate_peak_memory_resizing(self):
+        self.assertEqual(RebinFilter.output_shape((10, 20, 30), rebin_param=0.5, projection_factor=2), (5, 10, 15))
+        self.assertEqual(RebinFilter.estimate_peak_memory((10, 20, 30), np.float32, rebin_param=0.5),
+                         (10 * 20 * 30 + 10 * 10 * 15) * 4)
+
+        roi = [0, 0, 10, 5]
+        self.assertEqual(CropCoordinatesFilter.output_shape((10, 20, 30), region_of_interest=roi), (10, 5, 10))
+        self.assertEqual(CropCoordinatesFilter.estimate_peak_memory((10, 20, 30), np.float32, region_of_interest=roi),
+                         (10 * 20 * 30 + 10 * 5 * 10) * 4)
+        self.assertEqual(
+            CropCoordinatesFilter.estimate_peak_memory((10, 20, 30), np.float32, region_of_interest=roi, deferred=True),
+            10 * 20 * 30 * 4)
+
+    @mock.patch('mantidimaging.core.utility.memory_planner.get_shared_memory_linux')
+    @mock.patch('mantidimaging.core.operations.base_filter.get_system_memory_linux')
+    def test_check_memory(self, get_system_memory, get_shared_memory):
+        get_system_memory.return_value = (16 * GB, 2 * GB)
+        get_shared_memory.return_value = (16 * GB, 16 * GB)
+        shape = (1000, 1024, 1024)
+
+        # in place, no memory needed on top of the 4 GB stack
+        MinusLogFilter.check_memory(shape, np.float32)
+        # the 1 GB binned stack fits
+        RebinFilter.check_memory(shape, np.float32, rebin_param=0.5)
+        self.assertRaises(MemoryError, RebinFilter.check_memory, shape, np.float32, rebin_param=0.9)
+
+        get_system_memory.return_value = None
+        RebinFilter.check_memory(shape, np.float32, rebin_param=0.9)
+
+    @mock.patch('mantidimaging.core.utility.memory_planner.get_shared_memory_linux')
+    @mock.patch('mantidimaging.core.operations.base_filter.get_system_memory_linux')
+    def test_check_memory_picks_slabs(self, get_system_memory, get_shared_memory):
+        class CopyingFilter(BaseFilter):
+            traits = FilterTraits(in_place=True, per_image=True, memory_multiplier=2.)
+
+        get_system_memory.return_value = (16 * GB, 2 * GB)
+        get_shared_memory.return_value = (16 * GB, 16 * GB)
+        shape = (1024, 1024, 1024)
+
+        # the copy of the 4 GB stack does not fit, the copies of 512 images of 4 MB do
+        self.assertEqual(CopyingFilter.check_memory(shape, np.float32), 512)
+        self.assertIsNone(CopyingFilter.check_memory((100, 1024, 1024), np.float32))
+
+    def test_execute_slabs_refuses_filters_that_are_not_per_image(self):
+        class StackFilter(BaseFilter):
+            traits = FilterTraits(in_place=True, memory_multiplier=1.)
+
+            @staticmethod
+            def filter_slab(data):
+                data[:] = 0
+
+        data = th.generate_shared_array((4, 5, 6))
+        self.assertRaises(ValueError, StackFilter.execute_slabs, data, cores=1)
+        self.assertFalse(GaussianFilter.traits.per_image)
+
+    def test_execute_slabs_refuses_filters_without_filter_slab(self):
+        class ImageFilter(BaseFilter):
+            traits = FilterTraits(in_place=True, per_image=True, memory_multiplier=1.)
+
+        data = th.generate_shared_array((4, 5, 6))
+        self.assertFalse(ImageFilter.has_filter_slab())
+        self.assertRaises(ValueError, ImageFilter.execute_slabs, data, cores=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1 +0,0 @@
-from .mcp_corrections import execute  # noqa:F401  # noqa:F821
@@ -10,6 +10,8 @@ parallel.exclusive_mem: Runs a function in parallel.
                          piece of data it's processing, before processing it,
                          if the data is in any way read or modified, triggering
                          the copy-on-write.
+parallel.sinogram_slabs: Runs a sinogram filter in parallel over slabs of
+                         sinograms, in projection or sinogram ordered stacks.
 """
 
 import os
@@ -0,0 +1,253 @@
+"""
+Picks the fastest way of running a filter over slabs of a stack on this host.
+
+The first time a filter implementing filter_slab is applied to a large stack of images of a
+given shape and type, it is run on a small sample of the stack with every candidate backend,
+number of cores and slab size. The fastest settings are stored in a local config file and are
+used by default from then on. The settings are kept per host name, as the home directory can be
+shared between the nodes of a cluster, which have different CPUs and numbers of cores.
+
+Setting the environment variable MANTIDIMAGING_AUTOTUNE to 0 disables the autotuning, the
+heuristic defaults of parallel.utility are used instead.
+"""
+import json
+import os
+import socket
+import time
+from dataclasses import asdict, dataclass
+from logging import getLogger
+from multiprocessing.pool import Pool, ThreadPool
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Type
+
+import numpy as np
+
+from mantidimaging.core.parallel import utility as pu
+
+if TYPE_CHECKING:
+    from mantidimaging.core.operations.base_filter import BaseFilter  # noqa: F401
+
+LOG = getLogger(__name__)
+
+AUTOTUNE_ENV = 'MANTIDIMAGING_AUTOTUNE'
+CONFIG_PATH_ENV = 'MANTIDIMAGING_AUTOTUNE_CONFIG'
+DEFAULT_CONFIG_PATH = '~/.mantidimaging/autotune.json'
+
+# Smaller stacks are processed in about a second, which is not worth a benchmark
+MINIMUM_STACK_BYTES = 4 * pu.SLAB_BYTES
+MINIMUM_IMAGES = 64
+
+# The sample of the stack that the candidates are timed on
+SAMPLE_BYTES = pu.SLAB_BYTES
+SAMPLE_IMAGES = 64
+# The sample always has enough images for the parallel candidates, even if they are large,
+# execute_impl runs 10 images or fewer synchronously
+MINIMUM_SAMPLE_IMAGES = 16
+MINIMUM_PARALLEL_IMAGES = 11
+
+SLAB_SIZES = (1, 4, 16)
+# The parallel candidates need a slab for every core, up to this many slabs, to be timed fairly
+MINIMUM_PARALLEL_SLABS = 10
+
+# The settings tuned on this host, by key, loaded from the config file on first use
+_tuned: Optional[Dict[str, 'TunedSettings']] = None
+
+
+@dataclass(frozen=True)
+class TunedSettings:
+    backend: str
+    cores: int
+    slab_size: int
+
+
+def enabled() -> bool:
+    return os.environ.get(AUTOTUNE_ENV, '1') != '0'
+
+
+def config_path() -> str:
+    return os.path.abspath(os.path.expanduser(os.environ.get(CONFIG_PATH_ENV, DEFAULT_CONFIG_PATH)))
+
+
+def settings_key(filter_name: str,
+                 image_shape: Tuple[int, ...],
+                 dtype,
+                 options: Optional[Dict[str, Any]] = None) -> str:
+    """
+    :param options: The arguments of filter_slab that change the work done on each image, see work_options
+    """
+    key = f"{filter_name} {'x'.join(str(size) for size in image_shape)} {np.dtype(dtype).name}"
+    if options:
+        key += " " + " ".join(f"{name}={value}" for name, value in sorted(options.items()))
+    return key
+
+
+def work_options(shared_kwargs: Optional[Dict[str, Any]], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The arguments of filter_slab that select what is done to each image, e.g. whether flat-fielding
+    also takes the minus log, or whether there is a dark image to subtract. These are the flags,
+    the modes and the arguments that are not given. Numbers and arrays are the same amount of work
+    whatever their value.
+    """
+    options: Dict[str, Any] = {}
+    for name, value in {**(shared_kwargs or {}), **kwargs}.items():
+        if value is None or isinstance(value, (bool, str)):
+            options[name] = value
+    return options
+
+
+def _read_config(path: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(path) as config_file:
+            return json.load(config_file)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError):
+        LOG.warning(f"Could not read the autotuning config {path}, it will be replaced", exc_info=True)
+        return {}
+
+
+def _host_settings() -> Dict[str, TunedSettings]:
+    global _tuned
+    if _tuned is None:
+        host_config = _read_config(config_path()).get(socket.gethostname(), {})
+        _tuned = {}
+        for key, values in host_config.items():
+            try:
+                _tuned[key] = TunedSettings(**values)
+            except TypeError:
+                LOG.warning(f"Ignoring the invalid autotuning settings of {key}: {values}")
+    return _tuned
+
+
+def lookup(key: str) -> Optional[TunedSettings]:
+    return _host_settings().get(key)
+
+
+def store(key: str, settings: TunedSettings):
+    """
+    Stores the settings of this host in the config file, keeping those of the other hosts.
+    """
+    _host_settings()[key] = settings
+
+    path = config_path()
+    config = _read_config(path)
+    config.setdefault(socket.gethostname(), {})[key] = asdict(settings)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # written next to the config and renamed, so that other processes never read half of it
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as config_file:
+            json.dump(config, config_file, indent=4)
+        os.replace(temp_path, path)
+    except OSError:
+        LOG.warning(f"Could not save the autotuning config {path}, the settings are only kept for this session",
+                    exc_info=True)
+
+
+def clear():
+    """
+    Forgets the settings loaded from the config file, they are read again on next use.
+    """
+    global _tuned
+    _tuned = None
+
+
+def candidates(max_cores: int, thread_safe: bool, sample_images: int) -> List[TunedSettings]:
+    """
+    :param max_cores: The number of cores of the system
+    :param thread_safe: The filter can run in threads of the same process
+    :param sample_images: The number of images the candidates are timed on
+    :return: The settings that are timed
+    """
+    slab_sizes = [size for size in SLAB_SIZES if size <= sample_images]
+    settings = [TunedSettings(pu.BACKEND_PROCESSES, 1, slab_size) for slab_size in slab_sizes]
+
+    backends = [pu.BACKEND_PROCESSES, pu.BACKEND_THREADS] if thread_safe else [pu.BACKEND_PROCESSES]
+    if sample_images < MINIMUM_PARALLEL_IMAGES:
+        return settings
+    for cores in sorted({max_cores // 2, max_cores}):
+        if cores < 2:
+            continue
+        for slab_size in slab_sizes:
+            if -(-sample_images // slab_size) < min(cores, MINIMUM_PARALLEL_SLABS):
+                continue
+            settings.extend(TunedSettings(backend, cores, slab_size) for backend in backends)
+    return settings
+
+
+def _sample_images(data: np.ndarray) -> int:
+    image_bytes = max(1, data[0].nbytes)
+    return max(1, min(max(MINIMUM_SAMPLE_IMAGES, min(SAMPLE_IMAGES, SAMPLE_BYTES // image_bytes)), data.shape[0]))
+
+
+def _noop(_):
+    pass
+
+
+def _pool_start_seconds(backend: str, cores: int) -> float:
+    """
+    :return: The time taken to start and stop a pool of workers, which execute_slabs does for every call
+    """
+    if cores < 2:
+        return 0.0
+    pool_class = ThreadPool if backend == pu.BACKEND_THREADS else Pool
+    start = time.perf_counter()
+    with pool_class(cores) as pool:
+        pool.map(_noop, range(cores))
+    return time.perf_counter() - start
+
+
+def benchmark(filter_class: Type['BaseFilter'], data: np.ndarray, shared_kwargs: Optional[Dict[str, np.ndarray]],
+              kwargs: Dict[str, Any]) -> TunedSettings:
+    """
+    Times the filter on a sample from the start of the stack with every candidate.
+
+    The time taken to start the pool of workers is not counted, as it is negligible for the whole
+    stack but not for the sample, and would favour running on a single core.
+
+    :return: The fastest settings
+    """
+    num_images = _sample_images(data)
+    timings = []
+    sample: np.ndarray
+    with pu.temp_shared_array((num_images, ) + data.shape[1:], data.dtype) as sample:
+        for settings in candidates(pu.get_cores(), filter_class.traits.thread_safe, num_images):
+            # the filter modifies the sample in place
+            np.copyto(sample, data[:num_images])
+            pool_start = _pool_start_seconds(settings.backend, settings.cores)
+            start = time.perf_counter()
+            filter_class.execute_slabs(sample,
+                                       slab_size=settings.slab_size,
+                                       cores=settings.cores,
+                                       backend=settings.backend,
+                                       shared_kwargs=shared_kwargs,
+                                       **kwargs)
+            timings.append((max(0.0, time.perf_counter() - start - pool_start), settings))
+
+    elapsed, fastest = min(timings, key=lambda timing: timing[0])
+    LOG.info(f"Autotuned {filter_class.filter_name} on {num_images} images of {data.shape[1:]}: {fastest}, "
+             f"{elapsed / num_images * 1000:.2f} ms per image")
+    return fastest
+
+
+def tuned_settings(filter_class: Type['BaseFilter'], data: np.ndarray, shared_kwargs: Optional[Dict[str, np.ndarray]],
+                   kwargs: Dict[str, Any]) -> Optional[TunedSettings]:
+    """
+    The fastest settings on this host for the filter, the shape and type of the images and the
+    options of the filter, benchmarked on a sample of the stack the first time they are needed.
+
+    :param filter_class: The filter, which implements filter_slab
+    :param data: The shared array of the stack
+    :param shared_kwargs: The shared_kwargs forwarded to filter_slab
+    :param kwargs: The kwargs forwarded to filter_slab
+    :return: The settings, None if the autotuning is disabled or the stack is too small for it
+    """
+    if not enabled() or data.nbytes < MINIMUM_STACK_BYTES or data.shape[0] < MINIMUM_IMAGES:
+        return None
+
+    key = settings_key(filter_class.__name__, data.shape[1:], data.dtype, work_options(shared_kwargs, kwargs))
+    settings = lookup(key)
+    if settings is None:
+        settings = benchmark(filter_class, data, shared_kwargs, kwargs)
+        store(key, settings)
+    # the host can have fewer cores available than when it was tuned
+    return TunedSettings(settings.backend, min(settings.cores, pu.get_cores()), settings.slab_size)
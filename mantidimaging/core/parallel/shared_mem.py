@@ -8,6 +8,10 @@ from mantidimaging.core.parallel import utility as pu
 
 shared_data = None
 
+# arrays that execute_slabs forwards to every slab, e.g. a flat image, which the child
+# processes inherit instead of receiving a pickled copy with every task
+shared_slab_kwargs = None
+
 
 def inplace(func, i, **kwargs):
     """
@@ -69,6 +73,28 @@ def fwd_index_only(func, i, **kwargs):
     shared_data[i] = func(i, **kwargs)
 
 
+def inplace_slab(func, i, slab_size, axis=0, **kwargs):
+    """
+    Use if the parameter function will do the following:
+        - Perform an operation on a slab of several images of the input data
+        - DOES NOT have a return statement
+        - The data is NOT RESIZED
+        - The data will be changed INPLACE inside the function being forwarded
+
+    The slab i holds the images [i * slab_size, (i + 1) * slab_size) along the axis,
+    for axis 1 these are the sinograms of a block of rows. The slab is a view into the data.
+
+    :param func: Function that will be executed
+    :param i: index of the slab on which to operate
+    :param slab_size: Number of images in each slab
+    :param axis: The axis along which the data is split into slabs
+    :param kwargs: kwargs to forward to the function func that will be executed
+    """
+    index = [slice(None)] * shared_data.ndim
+    index[axis] = slice(i * slab_size, (i + 1) * slab_size)
+    func(shared_data[tuple(index)], **shared_slab_kwargs, **kwargs)
+
+
 def create_partial(func, fwd_func=return_fwd_func, **kwargs):
     """
     Create a partial using functools.partial, to forward the kwargs to the
@@ -152,3 +178,60 @@ def execute(data=None, partial_func=None, cores=None, chunksize=None, progress=N
     del shared_data
 
     return temp_data_ref
+
+
+def execute_slabs(data=None,
+                  func=None,
+                  slab_size: int = 1,
+                  axis: int = 0,
+                  cores=None,
+                  progress=None,
+                  msg: str = '',
+                  shared_kwargs=None,
+                  backend: str = pu.BACKEND_PROCESSES,
+                  **kwargs):
+    """
+    Executes a function in parallel over slabs of images, with shared memory between the processes.
+    The function receives a view of each slab and must modify it in place, see inplace_slab.
+
+    The same restrictions as for execute apply, the array must be a shared array.
+
+    :param data: the data array that will be processed in parallel
+    :param func: the function that will be executed on every slab
+    :param slab_size: number of images in each slab
+    :param axis: the axis along which the data is split into slabs
+    :param cores: number of cores that the processing will use
+    :param progress: Progress instance to use for progress reporting, updated once per slab
+    :param msg: Message to be shown on the progress bar
+    :param shared_kwargs: kwargs to forward to the function func that are inherited by the processes
+                          instead of being copied for every slab, for large arrays
+    :param backend: run the slabs in a pool of processes or of threads, see parallel.utility
+    :param kwargs: kwargs to forward to the function func
+    :return: reference to the input shared array
+    """
+    if not cores:
+        cores = pu.get_cores()
+
+    global shared_data
+    shared_data = data
+
+    global shared_slab_kwargs
+    shared_slab_kwargs = shared_kwargs if shared_kwargs is not None else {}
+
+    num_slabs = -(-data.shape[axis] // slab_size)
+    partial_func = partial(inplace_slab, func, slab_size=slab_size, axis=axis, **kwargs)
+    # whether running in parallel is worth it depends on the number of images, not of slabs
+    pu.execute_impl(num_slabs,
+                    partial_func,
+                    cores,
+                    pu.calculate_chunksize(cores),
+                    progress,
+                    msg,
+                    backend,
+                    num_images=data.shape[axis])
+
+    temp_data_ref = shared_data
+    del shared_data
+    shared_slab_kwargs = None
+
+    return temp_data_ref
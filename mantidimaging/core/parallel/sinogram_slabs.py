@@ -0,0 +1,78 @@
+"""
+Parallel execution of sinogram filters, e.g. the stripe removals, over slabs of sinograms.
+
+The stack can be in projection order, where a sinogram is a row of every projection, or in
+sinogram order. Either way each worker gathers a slab of sinograms into a contiguous scratch
+buffer, which is kept by the worker and reused for every slab of the same shape, runs the
+filter on it and writes the result back into the shared stack in place.
+"""
+from typing import Callable, Optional
+
+import numpy as np
+
+from mantidimaging.core.data import Images
+from mantidimaging.core.parallel import shared_mem as psm
+from mantidimaging.core.parallel import utility as pu
+from mantidimaging.core.utility.progress_reporting import Progress
+
+# Number of sinograms in each slab
+SLAB_SIZE = 8
+
+
+def _filter_slab(slab: np.ndarray, sinogram_func: Callable, sinogram_axis: int, per_sinogram: bool, **kwargs):
+    """
+    :param slab: The slab of the shared stack, the sinograms are along sinogram_axis
+    :param sinogram_func: The filter, applied to every 2D sinogram, or to the whole slab as a 3D array
+                          in projection order (projections, sinograms, columns) as expected by tomopy
+    """
+    if per_sinogram:
+        # (sinograms, projections, columns), each sinogram contiguous
+        sinograms = slab if sinogram_axis == 0 else np.swapaxes(slab, 0, 1)
+    else:
+        # (projections, sinograms, columns)
+        sinograms = slab if sinogram_axis == 1 else np.swapaxes(slab, 0, 1)
+
+    buffer = pu.scratch_buffer('sinogram_slabs', sinograms.shape, sinograms.dtype)
+    np.copyto(buffer, sinograms)
+
+    if per_sinogram:
+        for idx in range(buffer.shape[0]):
+            sinograms[idx] = sinogram_func(buffer[idx], **kwargs)
+    else:
+        sinograms[:] = sinogram_func(buffer, **kwargs)
+
+
+def execute_sinograms(images: Images,
+                      func: Callable,
+                      per_sinogram: bool = True,
+                      cores: Optional[int] = None,
+                      progress: Optional[Progress] = None,
+                      msg: str = '',
+                      **kwargs) -> Images:
+    """
+    Runs the filter over every sinogram of the stack, in parallel over slabs of sinograms, in place.
+
+    :param images: The stack, in projection or sinogram order
+    :param func: The filter, which returns the filtered sinogram(s). It must be picklable,
+                 e.g. a module level function
+    :param per_sinogram: Apply the filter to each 2D sinogram, or to each slab as a 3D array of
+                         shape (projections, sinograms, columns)
+    :param cores: The number of cores that will be used to process the data
+    :param progress: Progress instance, updated once per slab
+    :param msg: Message to be shown on the progress bar
+    :param kwargs: kwargs forwarded to the filter
+    :return: The filtered stack
+    """
+    sinogram_axis = 0 if images.is_sinograms else 1
+    psm.execute_slabs(images.data,
+                      _filter_slab,
+                      SLAB_SIZE,
+                      axis=sinogram_axis,
+                      cores=cores,
+                      progress=progress,
+                      msg=msg,
+                      sinogram_func=func,
+                      sinogram_axis=sinogram_axis,
+                      per_sinogram=per_sinogram,
+                      **kwargs)
+    return images
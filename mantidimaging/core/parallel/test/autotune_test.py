@@ -0,0 +1,128 @@
+import json
+import os
+import socket
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import mantidimaging.test_helpers.unit_test_helper as th
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterTraits
+from mantidimaging.core.parallel import autotune
+from mantidimaging.core.parallel import utility as pu
+
+
+class AddOneFilter(BaseFilter):
+    filter_name = "Add One"
+    traits = FilterTraits(in_place=True, per_image=True, thread_safe=True, memory_multiplier=1.)
+
+    @staticmethod
+    def filter_slab(data, value=1):
+        data += value
+
+
+class AutotuneTest(unittest.TestCase):
+    def setUp(self):
+        self.config_dir = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self.config_dir.name, 'autotune.json')
+        self.environment = mock.patch.dict(os.environ, {autotune.CONFIG_PATH_ENV: self.config_path})
+        self.environment.start()
+        autotune.clear()
+
+    def tearDown(self):
+        self.environment.stop()
+        self.config_dir.cleanup()
+        autotune.clear()
+
+    def test_candidates(self):
+        single_core = autotune.candidates(1, thread_safe=True, sample_images=64)
+        self.assertEqual(single_core, [autotune.TunedSettings(pu.BACKEND_PROCESSES, 1, size) for size in (1, 4, 16)])
+
+        candidates = autotune.candidates(8, thread_safe=True, sample_images=64)
+        self.assertIn(autotune.TunedSettings(pu.BACKEND_THREADS, 8, 4), candidates)
+        self.assertIn(autotune.TunedSettings(pu.BACKEND_PROCESSES, 4, 1), candidates)
+        # 4 slabs of 16 images would leave half of the cores idle
+        self.assertNotIn(autotune.TunedSettings(pu.BACKEND_PROCESSES, 8, 16), candidates)
+        self.assertIn(autotune.TunedSettings(pu.BACKEND_PROCESSES, 4, 16), candidates)
+
+        not_thread_safe = autotune.candidates(8, thread_safe=False, sample_images=64)
+        self.assertTrue(all(settings.backend == pu.BACKEND_PROCESSES for settings in not_thread_safe))
+
+    def test_candidates_of_large_images(self):
+        # only the size of the images matters, the stack does not need to be allocated
+        data = np.broadcast_to(np.zeros(1, dtype=np.float32), (1000, 2048, 2048))
+        sample_images = autotune._sample_images(data)
+        self.assertEqual(sample_images, autotune.MINIMUM_SAMPLE_IMAGES)
+
+        candidates = autotune.candidates(8, thread_safe=True, sample_images=sample_images)
+        self.assertIn(autotune.TunedSettings(pu.BACKEND_PROCESSES, 8, 1), candidates)
+        self.assertIn(autotune.TunedSettings(pu.BACKEND_THREADS, 4, 4), candidates)
+
+    def test_pool_start_is_not_timed(self):
+        candidates = [
+            autotune.TunedSettings(pu.BACKEND_PROCESSES, 1, 1),
+            autotune.TunedSettings(pu.BACKEND_THREADS, 2, 1)
+        ]
+        data = th.generate_shared_array((16, 8, 10))
+        # starting the pool is slower than the filter, but not counted
+        with mock.patch.object(autotune, 'candidates', return_value=candidates), \
+                mock.patch.object(autotune, '_pool_start_seconds', side_effect=lambda _, cores: 10.0 * (cores - 1)):
+            self.assertEqual(autotune.benchmark(AddOneFilter, data, None, {}).cores, 2)
+
+    def test_store_keeps_other_hosts(self):
+        with open(self.config_path, 'w') as config_file:
+            json.dump({"other-host": {"key": {"backend": "threads", "cores": 64, "slab_size": 4}}}, config_file)
+
+        settings = autotune.TunedSettings(pu.BACKEND_PROCESSES, 2, 16)
+        autotune.store("key", settings)
+        autotune.clear()
+
+        self.assertEqual(autotune.lookup("key"), settings)
+        with open(self.config_path) as config_file:
+            config = json.load(config_file)
+        self.assertEqual(config["other-host"]["key"]["cores"], 64)
+        self.assertEqual(config[socket.gethostname()]["key"]["slab_size"], 16)
+
+    def test_small_stacks_are_not_tuned(self):
+        data = th.generate_shared_array((10, 8, 10))
+        self.assertIsNone(autotune.tuned_settings(AddOneFilter, data, None, {}))
+        self.assertFalse(os.path.exists(self.config_path))
+
+    @mock.patch.object(autotune, 'MINIMUM_STACK_BYTES', 0)
+    @mock.patch.object(autotune, 'MINIMUM_IMAGES', 1)
+    def test_tuned_once_and_used_by_execute_slabs(self):
+        data = th.generate_shared_array((64, 8, 10))
+        expected = data + 1
+
+        with mock.patch.object(autotune, 'benchmark', wraps=autotune.benchmark) as benchmark:
+            AddOneFilter.execute_slabs(data)
+            AddOneFilter.execute_slabs(data, value=-1)
+        benchmark.assert_called_once()
+        # the stack is only modified by the calls, not by the benchmark
+        np.testing.assert_array_almost_equal(data, expected - 1)
+
+        key = autotune.settings_key(AddOneFilter.__name__, (8, 10), np.float32)
+        self.assertIsNotNone(autotune.lookup(key))
+        self.assertTrue(os.path.exists(self.config_path))
+
+    def test_work_options_in_key(self):
+        options = autotune.work_options({'dark': None, 'norm_divide': np.ones(3)}, {'minus_log': True, 'value': 2})
+        self.assertEqual(options, {'dark': None, 'minus_log': True})
+
+        with_log = autotune.settings_key("FlatFieldFilter", (8, 10), np.float32, {'minus_log': True})
+        without_log = autotune.settings_key("FlatFieldFilter", (8, 10), np.float32, {'minus_log': False})
+        self.assertNotEqual(with_log, without_log)
+        self.assertEqual(autotune.settings_key("FlatFieldFilter", (8, 10), np.float32, {}),
+                         autotune.settings_key("FlatFieldFilter", (8, 10), np.float32))
+
+    @mock.patch.object(autotune, 'MINIMUM_STACK_BYTES', 0)
+    @mock.patch.object(autotune, 'MINIMUM_IMAGES', 1)
+    def test_disabled(self):
+        data = th.generate_shared_array((64, 8, 10))
+        with mock.patch.dict(os.environ, {autotune.AUTOTUNE_ENV: '0'}):
+            self.assertIsNone(autotune.tuned_settings(AddOneFilter, data, None, {}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,6 +16,14 @@ def return_from_func(first_shared, add_arg):
     return first_shared[:] + add_arg
 
 
+def add_slab_size(slab):
+    slab[:] += slab.shape[0] * 10 + slab.shape[1]
+
+
+def add_image(slab, image, scale=1):
+    slab[:] += scale * image
+
+
 class SharedMemTest(unittest.TestCase):
     def __init__(self, *args, **kwargs):
         super(SharedMemTest, self).__init__(*args, **kwargs)
@@ -60,6 +68,37 @@ class SharedMemTest(unittest.TestCase):
         # compare results
         npt.assert_equal(img, expected)
 
+    def test_execute_slabs(self):
+        img = th.generate_shared_array((25, 4, 3))
+        expected = np.copy(img)
+        # the last slab along the images is partially filled
+        expected[:20] += 10 * 10 + 4
+        expected[20:] += 5 * 10 + 4
+
+        psm.execute_slabs(img, add_slab_size, slab_size=10, cores=2)
+
+        npt.assert_equal(img, expected)
+
+    def test_execute_slabs_sinograms(self):
+        img = th.generate_shared_array((5, 25, 3))
+        expected = np.copy(img)
+        expected[:, :24] += 5 * 10 + 3
+        expected[:, 24:] += 5 * 10 + 1
+
+        psm.execute_slabs(img, add_slab_size, slab_size=3, axis=1, cores=2)
+
+        npt.assert_equal(img, expected)
+
+    def test_execute_slabs_shared_kwargs(self):
+        img = th.generate_shared_array((25, 4, 3))
+        image = np.arange(12, dtype=img.dtype).reshape((4, 3))
+        expected = img + 2 * image
+
+        psm.execute_slabs(img, add_image, slab_size=2, cores=2, shared_kwargs={'image': image}, scale=2)
+
+        npt.assert_equal(img, expected)
+        self.assertIsNone(psm.shared_slab_kwargs)
+
     def test_fail_with_normal_array_fwd_func_inplace(self):
         # create data as normal nd array
         img = th.gen_img_numpy_rand((11, 10, 10))
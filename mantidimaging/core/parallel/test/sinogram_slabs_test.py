@@ -0,0 +1,57 @@
+import unittest
+
+import numpy as np
+import numpy.testing as npt
+
+import mantidimaging.test_helpers.unit_test_helper as th
+from mantidimaging.core.data import Images
+from mantidimaging.core.parallel.sinogram_slabs import execute_sinograms
+
+
+def cumulative_sinogram(sinogram, offset):
+    # depends on the order of the projections in the sinogram
+    return np.cumsum(sinogram, axis=0) + offset
+
+
+def cumulative_projections(slab, offset):
+    # a 3D slab in projection order, as the tomopy filters expect it
+    return np.cumsum(slab, axis=0) + offset
+
+
+class SinogramSlabsTest(unittest.TestCase):
+    def test_projection_order_per_sinogram(self):
+        # more slabs than are processed synchronously
+        images = Images(th.generate_shared_array((6, 90, 5)))
+        expected = np.cumsum(images.data, axis=0) + 1
+
+        execute_sinograms(images, cumulative_sinogram, cores=2, offset=1)
+
+        npt.assert_allclose(images.data, expected, rtol=1e-6)
+
+    def test_sinogram_order_per_sinogram(self):
+        images = Images(th.generate_shared_array((90, 6, 5)), sinograms=True)
+        expected = np.cumsum(images.data, axis=1) + 1
+
+        execute_sinograms(images, cumulative_sinogram, cores=2, offset=1)
+
+        npt.assert_allclose(images.data, expected, rtol=1e-6)
+
+    def test_projection_order_slabs(self):
+        images = Images(th.generate_shared_array((6, 90, 5)))
+        expected = np.cumsum(images.data, axis=0) + 1
+
+        execute_sinograms(images, cumulative_projections, per_sinogram=False, cores=2, offset=1)
+
+        npt.assert_allclose(images.data, expected, rtol=1e-6)
+
+    def test_sinogram_order_slabs(self):
+        images = Images(th.generate_shared_array((90, 6, 5)), sinograms=True)
+        expected = np.cumsum(images.data, axis=1) + 1
+
+        execute_sinograms(images, cumulative_projections, per_sinogram=False, cores=2, offset=1)
+
+        npt.assert_allclose(images.data, expected, rtol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -19,6 +19,10 @@ def return_from_func(first_shared, second_shared, add_arg):
     return first_shared[:] + second_shared[:] + add_arg
 
 
+def sum_pairs(first_slab, second_slab):
+    second_slab[:] = first_slab[:2 * second_slab.shape[0]:2] + first_slab[1:2 * second_slab.shape[0]:2]
+
+
 class TwoSharedMemTest(unittest.TestCase):
     def __init__(self, *args, **kwargs):
         super(TwoSharedMemTest, self).__init__(*args, **kwargs)
@@ -319,6 +323,16 @@ class TwoSharedMemTest(unittest.TestCase):
         npt.assert_equal(res2, expected)
         npt.assert_equal(res1, orig_img)
 
+    def test_execute_slabs(self):
+        img = th.generate_shared_array((25, 4, 3))
+        # the last image has no pair and is left over
+        img2nd = th.generate_shared_array((12, 4, 3))
+        expected = img[0:24:2] + img[1:24:2]
+
+        ptsm.execute_slabs(img, img2nd, sum_pairs, slab_size=10, second_slab_size=5, cores=2)
+
+        npt.assert_equal(img2nd, expected)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,41 +1,117 @@
-import mock
-
-from mantidimaging.core.parallel.utility import multiprocessing_necessary, execute_impl
-
-
-def test_correctly_chooses_parallel():
-    # forcing 1 core should always return False
-    assert multiprocessing_necessary((100, 10, 10), cores=1) is False
-    # shapes less than 10 should return false
-    assert multiprocessing_necessary((10, 10, 10), cores=12) is False
-    assert multiprocessing_necessary(10, cores=12) is False
-    # shapes over 10 should return True
-    assert multiprocessing_necessary((11, 10, 10), cores=12) is True
-    assert multiprocessing_necessary(11, cores=12) is True
-
-
-@mock.patch('mantidimaging.core.parallel.utility.Pool')
-def test_execute_impl_one_core(mock_pool):
-    mock_partial = mock.Mock()
-    mock_progress = mock.Mock()
-    execute_impl(1, mock_partial, 1, 1, mock_progress, "Test")
-    mock_partial.assert_called_once_with(0)
-    mock_progress.update.assert_called_once_with(1, "Test")
-
-
-@mock.patch('mantidimaging.core.parallel.utility.Pool')
-def test_execute_impl_par(mock_pool):
-    mock_partial = mock.Mock()
-    mock_progress = mock.Mock()
-    mock_pool_instance = mock.Mock()
-    mock_pool_instance.imap.return_value = range(15)
-    mock_pool.return_value.__enter__.return_value = mock_pool_instance
-    execute_impl(15, mock_partial, 10, 1, mock_progress, "Test")
-    mock_pool_instance.imap.assert_called_once()
-    assert mock_progress.update.call_count == 15
-
-
-if __name__ == "__main__":
-    import pytest
-
-    pytest.main([__file__])
+from concurrent.futures import ThreadPoolExecutor
+
+import mock
+import numpy as np
+
+from mantidimaging.core.parallel.utility import (BACKEND_THREADS, SLAB_BYTES, SLABS_PER_CORE, calculate_slab_size,
+                                                 create_array, delete_shared_array, execute_impl,
+                                                 multiprocessing_necessary, row_blocks, scratch_buffer,
+                                                 temp_shared_array, track_shared_arrays)
+
+
+def test_correctly_chooses_parallel():
+    # forcing 1 core should always return False
+    assert multiprocessing_necessary((100, 10, 10), cores=1) is False
+    # shapes less than 10 should return false
+    assert multiprocessing_necessary((10, 10, 10), cores=12) is False
+    assert multiprocessing_necessary(10, cores=12) is False
+    # shapes over 10 should return True
+    assert multiprocessing_necessary((11, 10, 10), cores=12) is True
+    assert multiprocessing_necessary(11, cores=12) is True
+
+
+@mock.patch('mantidimaging.core.parallel.utility.Pool')
+def test_execute_impl_one_core(mock_pool):
+    mock_partial = mock.Mock()
+    mock_progress = mock.Mock()
+    execute_impl(1, mock_partial, 1, 1, mock_progress, "Test")
+    mock_partial.assert_called_once_with(0)
+    mock_progress.update.assert_called_once_with(1, "Test")
+
+
+@mock.patch('mantidimaging.core.parallel.utility.Pool')
+def test_execute_impl_par(mock_pool):
+    mock_partial = mock.Mock()
+    mock_progress = mock.Mock()
+    mock_pool_instance = mock.Mock()
+    mock_pool_instance.imap.return_value = range(15)
+    mock_pool.return_value.__enter__.return_value = mock_pool_instance
+    execute_impl(15, mock_partial, 10, 1, mock_progress, "Test")
+    mock_pool_instance.imap.assert_called_once()
+    assert mock_progress.update.call_count == 15
+
+
+@mock.patch('mantidimaging.core.parallel.utility.Pool')
+def test_execute_impl_slabs_parallel_by_number_of_images(mock_pool):
+    mock_partial = mock.Mock()
+    mock_progress = mock.Mock()
+    mock_pool_instance = mock.Mock()
+    mock_pool_instance.imap.return_value = range(4)
+    mock_pool.return_value.__enter__.return_value = mock_pool_instance
+    # 4 slabs of 8 images
+    execute_impl(4, mock_partial, 10, 1, mock_progress, "Test", num_images=32)
+    mock_pool_instance.imap.assert_called_once()
+    assert mock_progress.update.call_count == 4
+
+
+@mock.patch('mantidimaging.core.parallel.utility.Pool')
+def test_execute_impl_threads(mock_pool):
+    results = []
+    mock_progress = mock.Mock()
+    execute_impl(15, results.append, 4, 1, mock_progress, "Test", backend=BACKEND_THREADS)
+    mock_pool.assert_not_called()
+    assert sorted(results) == list(range(15))
+    assert mock_progress.update.call_count == 15
+
+
+def test_calculate_slab_size():
+    image_bytes = 2048 * 2048 * 4
+    # limited by the size of the slab
+    assert calculate_slab_size((1000, 2048, 2048), 4, cores=8) == SLAB_BYTES // image_bytes
+    # every core gets several slabs
+    assert calculate_slab_size((40, 128, 128), 4, cores=2) == 40 // (2 * SLABS_PER_CORE)
+    # at least one image in each slab
+    assert calculate_slab_size((5, 128, 128), 4, cores=8) == 1
+    assert calculate_slab_size((5, 1 << 14, 1 << 14), 4, cores=1) == 1
+
+
+def test_scratch_buffer():
+    buffer = scratch_buffer('test', (2, 3), np.float32)
+    assert buffer.shape == (2, 3) and buffer.dtype == np.float32
+    assert scratch_buffer('test', (2, 3), np.float32) is buffer
+    assert scratch_buffer('other', (2, 3), np.float32) is not buffer
+    assert scratch_buffer('test', (1, 3), np.float32).shape == (1, 3)
+    assert scratch_buffer('test', (1, 3), bool).dtype == bool
+
+    # every thread has its own buffers
+    buffer = scratch_buffer('test', (2, 3), np.float32)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        assert pool.submit(scratch_buffer, 'test', (2, 3), np.float32).result() is not buffer
+
+
+def test_row_blocks():
+    data = np.zeros((3, 10, 8), dtype=np.float32)
+    blocks = list(row_blocks(data, 4 * 8 * 4))
+    assert [rows for rows, _ in blocks] == [slice(0, 4), slice(4, 8), slice(8, 12)] * 3
+    assert [block.shape for _, block in blocks] == [(4, 8), (4, 8), (2, 8)] * 3
+    for _, block in blocks:
+        block += 1
+    assert (data == 1).all()
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main([__file__])
+
+
+def test_track_shared_arrays():
+    with track_shared_arrays([]) as created:
+        create_array((1, 2, 3), name="test_track_shared_arrays")
+        with temp_shared_array((1, 2, 3)):
+            pass
+    create_array((1, 2, 3))
+
+    assert len(created) == 2
+    assert created[0] == "test_track_shared_arrays"
+    delete_shared_array(created[0])
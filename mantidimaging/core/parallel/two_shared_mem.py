@@ -159,6 +159,28 @@ def return_to_second_index_only(func, i, **kwargs):
     second_shared_data[i] = func(i, shared_data[i], **kwargs)
 
 
+def slab_to_second(func, i, slab_size, second_slab_size, **kwargs):
+    """
+    Use if the parameter function will do the following:
+        - Perform an operation on a slab of several images of the input data
+        - DOES NOT have a return statement
+        - The output is RESIZED, e.g. fewer or smaller images
+        - The output will be written INPLACE into the slab of the SECOND INPUT CONTAINER
+
+    The slab i holds the images [i * slab_size, (i + 1) * slab_size) of the first container and
+    [i * second_slab_size, (i + 1) * second_slab_size) of the second one. The slabs are views.
+
+    :param func: Function that will be executed
+    :param i: index of the slab on which to operate
+    :param slab_size: Number of images in each slab of the first container
+    :param second_slab_size: Number of images in each slab of the second container
+    :param kwargs: kwargs to forward to the function func that will be executed
+    """
+    slab = shared_data[i * slab_size:(i + 1) * slab_size]
+    second_slab = second_shared_data[i * second_slab_size:(i + 1) * second_slab_size]
+    func(slab, second_slab, **kwargs)
+
+
 def fwd_gpu_recon(func, i, num_gpus, cors, **kwargs):
     import astra
     astra.set_gpu_index(i % num_gpus)
@@ -259,3 +281,57 @@ def execute(data=None, second_data=None, partial_func=None, cores=None, chunksiz
     del second_shared_data
 
     return temp_data_ref, temp_data_2_ref
+
+
+def execute_slabs(data=None,
+                  second_data=None,
+                  func=None,
+                  slab_size: int = 1,
+                  second_slab_size: int = 1,
+                  cores=None,
+                  progress=None,
+                  msg: str = '',
+                  **kwargs):
+    """
+    Executes a function in parallel over slabs of images, writing into slabs of the second array,
+    with shared memory between the processes. See slab_to_second.
+
+    The number of slabs is given by the second array, so the first array may hold images
+    that are left over, e.g. when binning several images into one.
+
+    :param data: the shared data array that is read
+    :param second_data: the shared data array into which the output is written
+    :param func: the function that will be executed on every pair of slabs
+    :param slab_size: number of images in each slab of the first array
+    :param second_slab_size: number of images in each slab of the second array
+    :param cores: number of cores that the processing will use
+    :param progress: Progress instance to use for progress reporting, updated once per slab
+    :param msg: Message to be shown on the progress bar
+    :param kwargs: kwargs to forward to the function func
+    :return: references to the two shared arrays
+    """
+    if not cores:
+        cores = pu.get_cores()
+
+    global shared_data
+    shared_data = data
+
+    global second_shared_data
+    second_shared_data = second_data
+
+    num_slabs = -(-second_data.shape[0] // second_slab_size)
+    partial_func = partial(slab_to_second, func, slab_size=slab_size, second_slab_size=second_slab_size, **kwargs)
+    pu.execute_impl(num_slabs,
+                    partial_func,
+                    cores,
+                    pu.calculate_chunksize(cores),
+                    progress,
+                    msg,
+                    num_images=data.shape[0])
+
+    temp_data_ref = shared_data
+    del shared_data
+    temp_data_2_ref = second_shared_data
+    del second_shared_data
+
+    return temp_data_ref, temp_data_2_ref
@@ -1,11 +1,12 @@
 import ctypes
 import os
+import threading
 import uuid
 from contextlib import contextmanager
 from functools import partial
 from logging import getLogger
-from multiprocessing.pool import Pool
-from typing import Union, Type, Optional, Tuple
+from multiprocessing.pool import Pool, ThreadPool
+from typing import Dict, List, Union, Type, Optional, Tuple
 
 import SharedArray as sa
 import numpy as np
@@ -19,6 +20,28 @@ SimpleCType = Union[Type[ctypes.c_uint8], Type[ctypes.c_uint16], Type[ctypes.c_i
 
 NP_DTYPE = Type[np.single]
 
+# The largest slab of images handed to a worker at once, large enough that the per slab
+# overhead is negligible and small enough to split a stack between all the cores
+SLAB_BYTES = 64 * 1024**2
+SLABS_PER_CORE = 4
+
+# The scratch buffers of each worker, see scratch_buffer. They are kept per thread, so that
+# the workers of the threads backend do not share them
+_scratch = threading.local()
+
+# Images are processed in blocks of rows of about this size by row_blocks, so that all the
+# passes over a block are done while it is still in the CPU cache
+ROW_BLOCK_BYTES = 256 * 1024
+
+# The tasks are run by a pool of processes, which inherit the shared data, or by a pool of threads
+# of this process, which avoids starting the processes. The threads only run concurrently while
+# the work releases the GIL, as most numpy and scipy functions do
+BACKEND_PROCESSES = 'processes'
+BACKEND_THREADS = 'threads'
+
+# The lists that the names of the shared arrays are appended to when they are created, see track_shared_arrays
+_trackers: List[List[str]] = []
+
 
 def create_shared_name(file_name=None) -> str:
     return f"{uuid.uuid4()}{f'-{os.path.basename(file_name)}' if file_name is not None else ''}"
@@ -32,6 +55,14 @@ def delete_shared_array(name, silent_failure=False):
             raise e
 
 
+def attach_shared_array(name: str) -> np.ndarray:
+    """
+    :param name: The name of a shared memory array, which may have been created by another process
+    :return: The array, the memory is shared with the process that created it
+    """
+    return sa.attach(f"shm://{name}")
+
+
 def create_array(shape: Tuple[int, int, int], dtype: NP_DTYPE = np.float32, name: Optional[str] = None) -> np.ndarray:
     """
     Create an array, either in a memory file (if name provided), or purely in memory (if name is None)
@@ -60,9 +91,27 @@ def _create_shared_array(shape: Tuple[int, int, int], dtype: NP_DTYPE, name: str
     LOG.info(f"Requested shared array with name='{name}', shape={shape}, dtype={dtype}")
     memory_file_name = f"shm://{name}"
     arr = sa.create(memory_file_name, shape, dtype)
+    for names in _trackers:
+        names.append(name)
     return arr
 
 
+@contextmanager
+def track_shared_arrays(names: List[str]):
+    """
+    Appends the names of the shared arrays created in the context to names, so that they can be
+    deleted if what creates them fails part way through. Arrays that are deleted in the context,
+    e.g. temporary arrays, are still appended.
+
+    :param names: The list the names are appended to
+    """
+    _trackers.append(names)
+    try:
+        yield names
+    finally:
+        _trackers.remove(names)
+
+
 @contextmanager
 def temp_shared_array(shape, dtype: NP_DTYPE = np.float32, force_name=None) -> np.ndarray:
     temp_name = create_shared_name() if not force_name else force_name
@@ -100,6 +149,55 @@ def generate_indices(num_images):
     return range(num_images)
 
 
+def calculate_slab_size(shape: Tuple[int, ...], itemsize: int, cores: int) -> int:
+    """
+    :return: The number of images in each slab, so that a slab holds up to SLAB_BYTES and every
+             core gets at least SLABS_PER_CORE slabs to balance the load
+    """
+    image_bytes = max(1, int(np.prod(shape[1:])) * itemsize)
+    return max(1, min(SLAB_BYTES // image_bytes, shape[0] // (SLABS_PER_CORE * max(1, cores))))
+
+
+def scratch_buffer(name: str, shape: Tuple[int, ...], dtype) -> np.ndarray:
+    """
+    A buffer kept by the worker, process or thread, and reused by all the tasks it runs, instead of
+    allocating it for every task.
+
+    Only the last shape and dtype requested under each name is kept, as all the slabs of a stack but the last
+    have the same shape. The content of the buffer is undefined.
+
+    :param name: The name of the buffer, different buffers used by the same task need different names
+    """
+    if not hasattr(_scratch, 'buffers'):
+        _scratch.buffers = {}
+    buffers: Dict[str, np.ndarray] = _scratch.buffers
+    buffer = buffers.get(name)
+    if buffer is None or buffer.shape != tuple(shape) or buffer.dtype != dtype:
+        buffer = np.empty(shape, dtype)
+        buffers[name] = buffer
+    return buffer
+
+
+def row_blocks(data: np.ndarray, block_bytes: int):
+    """
+    Splits an image, or every image of a slab in turn, into blocks of rows of about block_bytes,
+    so that several passes over a block are done while it is still in the CPU cache.
+
+    The blocks do not span several images, each block is contiguous in memory if the image is.
+
+    :return: Generator of (rows, block) pairs, the slice of the rows of the image and the view of the block
+    """
+    if data.ndim > 2:
+        for image in data:
+            yield from row_blocks(image, block_bytes)
+        return
+
+    rows = max(1, block_bytes // max(1, data[0].nbytes))
+    for start in range(0, data.shape[0], rows):
+        block_rows = slice(start, start + rows)
+        yield block_rows, data[block_rows]
+
+
 def calculate_chunksize(cores):
     # TODO possible proper calculation of chunksize, although best performance
     # has been with 1
@@ -130,12 +228,24 @@ def multiprocessing_necessary(shape: Union[int, Tuple[int, int, int]], cores) ->
     return True
 
 
-def execute_impl(img_num: int, partial_func: partial, cores: int, chunksize: int, progress: Progress, msg: str):
+def execute_impl(img_num: int,
+                 partial_func: partial,
+                 cores: int,
+                 chunksize: int,
+                 progress: Progress,
+                 msg: str,
+                 backend: str = BACKEND_PROCESSES,
+                 num_images: Optional[int] = None):
+    """
+    :param num_images: The number of images covered by the img_num tasks, which decides if they are worth
+                       running in parallel. By default there is one image per task, but a slab task covers several.
+    """
     task_name = f"{msg} {cores}c {chunksize}chs"
     progress = Progress.ensure_instance(progress, num_steps=img_num, task_name=task_name)
     indices_list = generate_indices(img_num)
-    if multiprocessing_necessary(img_num, cores):
-        with Pool(cores) as pool:
+    if img_num > 1 and multiprocessing_necessary(num_images if num_images is not None else img_num, cores):
+        pool_class = ThreadPool if backend == BACKEND_THREADS else Pool
+        with pool_class(cores) as pool:
             for _ in pool.imap(partial_func, indices_list, chunksize=chunksize):
                 progress.update(1, msg)
     else:
@@ -0,0 +1,73 @@
+"""
+Circular field of view masks, shared by the Circular Mask filter and the reconstructions.
+
+The mask is computed once per image shape and ratio, and applied in place to slabs of images
+in parallel with np.copyto, which broadcasts the 2D mask over every image of the slab.
+"""
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+
+from mantidimaging.core.parallel import shared_mem as psm
+from mantidimaging.core.utility.progress_reporting import Progress
+
+# Number of images in each slab masked by a worker
+SLAB_SIZE = 8
+
+
+@lru_cache(maxsize=8)
+def circular_mask(shape: Tuple[int, int], ratio: float = 1.0) -> np.ndarray:
+    """
+    The pixels inside a circle centred on the image, matching tomopy.circ_mask.
+
+    :param shape: The shape of the image
+    :param ratio: Diameter of the circle, as a ratio of the smallest side of the image
+    :return: A read only boolean mask, True inside the circle
+    """
+    rows, cols = shape
+    row_radius = rows / 2.
+    col_radius = cols / 2.
+    radius_squared = min(row_radius, col_radius)**2
+    y, x = np.ogrid[0.5 - row_radius:0.5 + row_radius, 0.5 - col_radius:0.5 + col_radius]
+    mask = x * x + y * y < ratio * ratio * radius_squared
+    mask.setflags(write=False)
+    return mask
+
+
+@lru_cache(maxsize=8)
+def _outside_mask(shape: Tuple[int, int], ratio: float) -> np.ndarray:
+    mask = ~circular_mask(shape, ratio)
+    mask.setflags(write=False)
+    return mask
+
+
+def _mask_slab(slab: np.ndarray, ratio: float, value: float):
+    np.copyto(slab, slab.dtype.type(value), where=_outside_mask(slab.shape[1:], ratio))
+
+
+def apply_circular_mask(data: np.ndarray,
+                        ratio: float,
+                        value: float = 0.,
+                        cores: Optional[int] = None,
+                        progress: Optional[Progress] = None) -> np.ndarray:
+    """
+    Sets the pixels outside of the circular mask of every image to the value, in place.
+
+    :param data: The 3D stack, a shared array when processed in parallel
+    :param ratio: Diameter of the circle, as a ratio of the smallest side of the image
+    :param value: The value that the pixels outside of the circle are set to
+    :param cores: The number of cores that will be used to process the data
+    :param progress: Progress instance, updated once per slab
+    :return: The masked stack
+    """
+    # built before the workers are started, so they inherit it
+    _outside_mask(data.shape[1:], ratio)
+    return psm.execute_slabs(data,
+                             _mask_slab,
+                             SLAB_SIZE,
+                             cores=cores,
+                             progress=progress,
+                             msg="Applying circular mask",
+                             ratio=ratio,
+                             value=value)
@@ -0,0 +1,304 @@
+"""
+Predicts the peak memory used by a sequence of filters, and optionally a reconstruction, before they
+are run, from the shape of the stack and the traits declared by the filters.
+
+Two budgets are checked: the system memory, which holds the stacks and every copy the filters make of
+them, and /dev/shm, which only holds the stacks as they are shared arrays. When the prediction is over
+either budget the plan picks how the sequence can be run instead:
+
+- slabs: the stacks fit but the copies made by some filters do not. Those filters are applied to
+  slabs of images one after the other, so that only one slab is copied at a time.
+- out of core: the stacks do not fit. The plan gives the number of images, and of sinograms for
+  the reconstruction, that a caller able to stream the stack, e.g. from a chunked store on disk,
+  would process at a time. Neither the operations window nor the batch runner streams the stack,
+  they report that there is not enough memory instead.
+"""
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+import numpy as np
+
+from mantidimaging.core.operation_history import const
+from mantidimaging.core.operation_history.operations import ImageOperation, MODULE_NOT_FOUND
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterTraits
+from mantidimaging.core.operations.loader import load_filter_packages
+from mantidimaging.core.utility import shape_splitter
+from mantidimaging.core.utility.data_containers import ReconstructionParameters
+from mantidimaging.core.utility.memory_usage import get_shared_memory_linux, get_system_memory_linux
+
+# A filter and the arguments of its filter_func
+FilterStep = Tuple[Type[BaseFilter], Dict[str, Any]]
+
+RECONSTRUCTION_NAME = "Reconstruction"
+
+
+class ExecutionMode(Enum):
+    IN_MEMORY = 'in memory'
+    SLABS = 'slabs'
+    OUT_OF_CORE = 'out of core'
+
+
+@dataclass
+class StepEstimate:
+    name: str
+    input_shape: Tuple[int, ...]
+    output_shape: Tuple[int, ...]
+    # bytes of system memory and of /dev/shm used at the peak of the step, including the other stacks
+    peak_bytes: int
+    shm_bytes: int
+    # None for the reconstruction
+    traits: Optional[FilterTraits] = None
+
+    @property
+    def per_image(self) -> bool:
+        """
+        The step gives the same result when it is applied to separate ranges of images of the stack
+        """
+        return self.traits is not None and self.traits.per_image and not self.traits.stack_statistics
+
+    @property
+    def can_use_slabs(self) -> bool:
+        """
+        The step can be applied to slabs of the stack in place, one slab after the other
+        """
+        return self.per_image and not self.traits.resizes  # type: ignore
+
+
+@dataclass
+class MemoryPlan:
+    steps: List[StepEstimate] = field(default_factory=list)
+    # the memory and the space of /dev/shm that the steps can use, None if they are not known
+    budget_bytes: Optional[int] = None
+    shm_budget_bytes: Optional[int] = None
+    mode: ExecutionMode = ExecutionMode.IN_MEMORY
+    # number of images processed at a time, by the filters that make copies in the slabs mode,
+    # by the whole sequence out of core, which is left to the caller
+    slab_size: Optional[int] = None
+    # number of sinograms reconstructed at a time out of core
+    recon_slab_size: Optional[int] = None
+
+    @property
+    def peak_bytes(self) -> int:
+        return max((step.peak_bytes for step in self.steps), default=0)
+
+    @property
+    def shm_bytes(self) -> int:
+        return max((step.shm_bytes for step in self.steps), default=0)
+
+    @property
+    def fits(self) -> bool:
+        """
+        The whole sequence can be run at once
+        """
+        return _within(self.peak_bytes, self.budget_bytes) and _within(self.shm_bytes, self.shm_budget_bytes)
+
+    @property
+    def runnable(self) -> bool:
+        """
+        The sequence can be run in memory, at once or in slabs
+        """
+        return self.fits or self.mode == ExecutionMode.SLABS
+
+    def summary(self) -> str:
+        text = f"Peak memory {_format_size(self.peak_bytes, self.budget_bytes)}, " \
+               f"shared memory {_format_size(self.shm_bytes, self.shm_budget_bytes)}"
+        if self.fits:
+            return text
+        if self.mode == ExecutionMode.SLABS:
+            return f"{text}. The filters that copy the images will be applied to {self.slab_size} images at a time"
+        return f"{text}. There is not enough memory"
+
+
+def _within(nbytes: int, budget: Optional[int]) -> bool:
+    return budget is None or nbytes <= budget
+
+
+def _format_size(nbytes: int, budget: Optional[int]) -> str:
+    if budget is None:
+        return f"{nbytes / 1024**3:.2f} GB"
+    return f"{nbytes / 1024**3:.2f} GB of {budget / 1024**3:.2f} GB"
+
+
+def _nbytes(shape: Tuple[int, ...], dtype) -> int:
+    return int(np.prod(shape)) * np.dtype(dtype).itemsize
+
+
+def _filter_estimate(filter_class: Type[BaseFilter], kwargs: Dict[str, Any], shape: Tuple[int, ...], dtype,
+                     other_bytes: int) -> StepEstimate:
+    output_shape = filter_class.output_shape(shape, **kwargs)
+    peak = filter_class.estimate_peak_memory(shape, dtype, **kwargs)
+    # a resizing filter creates a new shared stack, which is all it allocates. The copies made by
+    # the other filters are private to the process
+    shm = peak if filter_class.traits.resizes else _nbytes(shape, dtype)
+    return StepEstimate(filter_class.filter_name, tuple(shape), tuple(output_shape), other_bytes + peak,
+                        other_bytes + shm, filter_class.traits)
+
+
+def _recon_estimate(recon_params: ReconstructionParameters, shape: Tuple[int, ...], dtype,
+                    other_bytes: int) -> StepEstimate:
+    # imported here as the reconstruction packages are only needed when there is a reconstruction
+    from mantidimaging.core.reconstruct import TomopyRecon, get_reconstructor_for
+
+    _, height, width = shape
+    output_shape = (height, width, width)
+    stack = _nbytes(shape, dtype)
+    volume = _nbytes(output_shape, dtype)
+    if isinstance(get_reconstructor_for(recon_params.algorithm), TomopyRecon):
+        # TomoPy reconstructs from its own float32 copy of the sinograms, into a new volume that is not shared
+        peak = stack + _nbytes(shape, np.float32) + volume
+        shm = stack
+    else:
+        # ASTRA reconstructs one sinogram at a time into a new shared volume
+        peak = shm = stack + volume
+    return StepEstimate(RECONSTRUCTION_NAME, tuple(shape), output_shape, other_bytes + peak, other_bytes + shm)
+
+
+def _budgets(loaded_bytes: int, available_bytes: Optional[int],
+             shm_available_bytes: Optional[int]) -> Tuple[Optional[int], Optional[int]]:
+    if available_bytes is None:
+        system_memory = get_system_memory_linux()
+        available_bytes = system_memory[1] if system_memory is not None else None
+    if shm_available_bytes is None:
+        shared_memory = get_shared_memory_linux()
+        shm_available_bytes = shared_memory[1] if shared_memory is not None else None
+    # the stacks that are already loaded are part of the prediction, but are no longer available
+    return (available_bytes + loaded_bytes if available_bytes is not None else None,
+            shm_available_bytes + loaded_bytes if shm_available_bytes is not None else None)
+
+
+def _choose_slabs(plan: MemoryPlan, num_images: int) -> Optional[int]:
+    """
+    :return: The number of images in each slab, if applying the filters that do not fit to slabs
+             of the stack makes the sequence fit
+    """
+    if plan.budget_bytes is None:
+        return None
+    slab_size = num_images
+    for step in plan.steps:
+        # the slabs do not change the stacks held in /dev/shm
+        if not _within(step.shm_bytes, plan.shm_budget_bytes):
+            return None
+        if _within(step.peak_bytes, plan.budget_bytes):
+            continue
+        if not step.can_use_slabs:
+            return None
+        # only the copies of the images are split into slabs, the stacks are all held
+        copies_per_image = (step.peak_bytes - step.shm_bytes) / num_images
+        fitting = int((plan.budget_bytes - step.shm_bytes) // copies_per_image)
+        if fitting < 1:
+            return None
+        slab_size = min(slab_size, fitting)
+    return slab_size
+
+
+def _choose_out_of_core(plan: MemoryPlan, shape: Tuple[int, ...], dtype, other_bytes: int,
+                        recon: Optional[StepEstimate]) -> Optional[Tuple[int, Optional[int]]]:
+    """
+    :return: The number of images processed at a time, and of sinograms reconstructed at a time,
+             that fit in the budgets, if the filters can be applied to separate ranges of images
+    """
+    filters = [step for step in plan.steps if step is not recon]
+    if not all(step.per_image for step in filters):
+        return None
+    budgets = [budget - other_bytes for budget in (plan.budget_bytes, plan.shm_budget_bytes) if budget is not None]
+    if not budgets:
+        return None
+    available = min(budgets)
+
+    def fitting_slab(steps: List[StepEstimate], slab_shape: Tuple[int, ...], axis: int) -> Optional[int]:
+        stack = _nbytes(slab_shape, dtype)
+        # the most that a step holds at once, as a multiple of the stack it is applied to
+        ratio = max(max(step.peak_bytes, step.shm_bytes) - other_bytes for step in steps) / stack
+        single = stack / slab_shape[axis]
+        if available < single * ratio:
+            return None
+        max_memory_mb = available / ratio / 1024**2
+        _, step = shape_splitter.execute(slab_shape, axis, np.dtype(dtype).name, max_memory_mb, reconstruction=False)
+        return max(int(step), 1)
+
+    slab_size = fitting_slab(filters, shape, 0) if filters else shape[0]
+    if slab_size is None:
+        return None
+    recon_slab_size = None
+    if recon is not None:
+        recon_slab_size = fitting_slab([recon], recon.input_shape, 1)
+        if recon_slab_size is None:
+            return None
+    return slab_size, recon_slab_size
+
+
+def plan_memory(shape: Tuple[int, ...],
+                dtype,
+                steps: Iterable[FilterStep],
+                recon_params: Optional[ReconstructionParameters] = None,
+                other_bytes: int = 0,
+                loaded_bytes: int = 0,
+                available_bytes: Optional[int] = None,
+                shm_available_bytes: Optional[int] = None) -> MemoryPlan:
+    """
+    Predicts the peak memory of applying the filters to the stack, and optionally reconstructing it,
+    and picks how to run them if they do not fit at once.
+
+    :param shape: The shape of the stack, in projection order
+    :param dtype: The type of the stack
+    :param steps: The filters, with the arguments of their filter_func, in the order they are applied
+    :param recon_params: The reconstruction of the stack after the filters, if any
+    :param other_bytes: The size of the other stacks that are held while the filters run, e.g. the flat
+                        and dark images
+    :param loaded_bytes: The size of the stacks that are already loaded, which are part of the prediction
+                         but are no longer part of the memory available
+    :param available_bytes: The available system memory, read from the system if not provided
+    :param shm_available_bytes: The free space of /dev/shm, read from the system if not provided
+    :return: The plan, with an estimate for every step
+    """
+    budget, shm_budget = _budgets(loaded_bytes, available_bytes, shm_available_bytes)
+    plan = MemoryPlan(budget_bytes=budget, shm_budget_bytes=shm_budget)
+
+    current_shape = tuple(shape)
+    for filter_class, kwargs in steps:
+        estimate = _filter_estimate(filter_class, kwargs, current_shape, dtype, other_bytes)
+        plan.steps.append(estimate)
+        current_shape = estimate.output_shape
+
+    recon = None
+    if recon_params is not None:
+        recon = _recon_estimate(recon_params, current_shape, dtype, other_bytes)
+        plan.steps.append(recon)
+
+    if plan.fits:
+        return plan
+
+    slab_size = _choose_slabs(plan, shape[0])
+    if slab_size is not None:
+        plan.mode = ExecutionMode.SLABS
+        plan.slab_size = slab_size
+        return plan
+
+    out_of_core = _choose_out_of_core(plan, tuple(shape), dtype, other_bytes, recon)
+    if out_of_core is not None:
+        plan.mode = ExecutionMode.OUT_OF_CORE
+        plan.slab_size, plan.recon_slab_size = out_of_core
+    return plan
+
+
+def steps_from_operations(operations: Iterable[ImageOperation],
+                          filters: Optional[Iterable[Type[BaseFilter]]] = None) -> List[FilterStep]:
+    """
+    The filters of an operation history, e.g. to plan replaying it on another stack.
+
+    :param operations: The operations, deserialized from the history
+    :param filters: The filters the operations are looked up in, all the filters by default
+    :raises KeyError: If an operation is not a known filter
+    """
+    filter_classes = {f.__name__: f for f in (filters if filters is not None else load_filter_packages())}
+    steps = []
+    for operation in operations:
+        if operation.filter_name == const.OPERATION_NAME_AXES_SWAP:
+            # swapping the axes only creates a view of the stack
+            continue
+        try:
+            steps.append((filter_classes[operation.filter_name], operation.filter_kwargs))
+        except KeyError:
+            raise KeyError(MODULE_NOT_FOUND.format(operation.filter_name))
+    return steps
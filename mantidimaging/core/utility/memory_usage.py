@@ -1,4 +1,6 @@
+import os
 from logging import getLogger
+from typing import Optional, Tuple
 
 
 def get_memory_usage_linux(kb=False, mb=False):
@@ -25,6 +27,40 @@ def get_memory_usage_linux(kb=False, mb=False):
     return tuple_to_return
 
 
+def get_system_memory_linux() -> Optional[Tuple[int, int]]:
+    """
+    :return: The total and the available system memory in bytes, read from /proc/meminfo.
+             None if they are not available, e.g. on Windows.
+    """
+    values = {}
+    try:
+        with open('/proc/meminfo') as meminfo:
+            for line in meminfo:
+                key, value = line.split(':', 1)
+                values[key] = int(value.split()[0]) * 1024
+    except (OSError, ValueError):
+        getLogger(__name__).debug('System memory information is not available.')
+        return None
+
+    if 'MemTotal' not in values or 'MemAvailable' not in values:
+        return None
+    return values['MemTotal'], values['MemAvailable']
+
+
+def get_shared_memory_linux(path: str = '/dev/shm') -> Optional[Tuple[int, int]]:
+    """
+    :param path: The mount point of the shared memory, where the shared arrays of the stacks are created
+    :return: The total and the free space of the shared memory in bytes.
+             None if they are not available, e.g. on Windows.
+    """
+    try:
+        stats = os.statvfs(path)
+    except (AttributeError, OSError):
+        getLogger(__name__).debug('Shared memory information is not available.')
+        return None
+    return stats.f_blocks * stats.f_frsize, stats.f_bavail * stats.f_frsize
+
+
 def get_memory_usage_linux_str():
     memory_in_kbs, memory_in_mbs = get_memory_usage_linux(kb=True, mb=True)
     # handle caching
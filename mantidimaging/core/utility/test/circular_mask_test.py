@@ -0,0 +1,37 @@
+import unittest
+
+import numpy as np
+import numpy.testing as npt
+
+import mantidimaging.test_helpers.unit_test_helper as th
+from mantidimaging.core.utility.circular_mask import apply_circular_mask, circular_mask
+
+
+class CircularMaskTest(unittest.TestCase):
+    def test_mask_matches_tomopy(self):
+        # the mask of tomopy.misc.corr._get_mask
+        rows, cols, ratio = 10, 14, 0.8
+        y, x = np.ogrid[0.5 - rows / 2:0.5 + rows / 2, 0.5 - cols / 2:0.5 + cols / 2]
+        expected = x * x + y * y < ratio * ratio * (rows / 2)**2
+
+        npt.assert_equal(circular_mask((rows, cols), ratio), expected)
+
+    def test_mask_is_cached_and_read_only(self):
+        mask = circular_mask((8, 8), 0.9)
+
+        self.assertIs(circular_mask((8, 8), 0.9), mask)
+        self.assertFalse(mask.flags.writeable)
+
+    def test_apply(self):
+        images = th.generate_images((20, 10, 12))
+        original = np.copy(images.data)
+        mask = circular_mask((10, 12), 0.9)
+
+        apply_circular_mask(images.data, 0.9, value=-1, cores=2)
+
+        npt.assert_equal(images.data[:, mask], original[:, mask])
+        npt.assert_equal(images.data[:, ~mask], -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
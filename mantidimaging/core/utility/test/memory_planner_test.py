@@ -0,0 +1,146 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from mantidimaging.core.operation_history import const
+from mantidimaging.core.operation_history.operations import ImageOperation
+from mantidimaging.core.operations.base_filter import BaseFilter, FilterTraits
+from mantidimaging.core.operations.crop_coords import CropCoordinatesFilter
+from mantidimaging.core.operations.minus_log import MinusLogFilter
+from mantidimaging.core.operations.rescale import RescaleFilter
+from mantidimaging.core.utility.data_containers import ReconstructionParameters
+from mantidimaging.core.utility.memory_planner import ExecutionMode, plan_memory, steps_from_operations
+
+GB = 1024**3
+MB = 1024**2
+
+# 1024 images of 1024x1024 float32, 4 GB
+SHAPE = (1024, 1024, 1024)
+STACK = 4 * GB
+
+
+class CopyingFilter(BaseFilter):
+    filter_name = "Copying"
+    traits = FilterTraits(in_place=True, per_image=True, memory_multiplier=2.0)
+
+
+class MemoryPlannerTest(unittest.TestCase):
+    def plan(self, steps, available, shm_available=64 * GB, **kwargs):
+        return plan_memory(SHAPE,
+                           np.float32,
+                           steps,
+                           loaded_bytes=STACK,
+                           available_bytes=available,
+                           shm_available_bytes=shm_available,
+                           **kwargs)
+
+    def test_in_place_filters_fit(self):
+        plan = self.plan([(MinusLogFilter, {}), (MinusLogFilter, {})], available=GB)
+
+        self.assertEqual(plan.peak_bytes, STACK)
+        self.assertEqual(plan.shm_bytes, STACK)
+        self.assertEqual(plan.budget_bytes, STACK + GB)
+        self.assertTrue(plan.fits)
+        self.assertEqual(plan.mode, ExecutionMode.IN_MEMORY)
+
+    def test_shape_is_carried_through_the_steps(self):
+        roi = [0, 0, 512, 512]
+        plan = self.plan([(CropCoordinatesFilter, {'region_of_interest': roi}), (CopyingFilter, {})], available=8 * GB)
+
+        crop, copy = plan.steps
+        self.assertEqual(crop.output_shape, (1024, 512, 512))
+        # the cropped stack is created in /dev/shm next to the original
+        self.assertEqual(crop.shm_bytes, STACK + GB)
+        self.assertEqual(copy.input_shape, (1024, 512, 512))
+        self.assertEqual(copy.peak_bytes, 2 * GB)
+
+    def test_other_stacks_are_included(self):
+        plan = self.plan([(MinusLogFilter, {})], available=GB, other_bytes=GB)
+
+        self.assertEqual(plan.peak_bytes, STACK + GB)
+        self.assertEqual(plan.shm_bytes, STACK + GB)
+
+    def test_copies_that_do_not_fit_use_slabs(self):
+        plan = self.plan([(CopyingFilter, {})], available=GB)
+
+        self.assertFalse(plan.fits)
+        self.assertTrue(plan.runnable)
+        self.assertEqual(plan.mode, ExecutionMode.SLABS)
+        # each image is copied, 4 MB each
+        self.assertEqual(plan.slab_size, GB // (4 * MB))
+
+    def test_filters_using_stack_statistics_are_not_split(self):
+        plan = self.plan([(RescaleFilter, {})], available=GB // 2)
+
+        self.assertFalse(plan.fits)
+        self.assertFalse(plan.runnable)
+        self.assertEqual(plan.mode, ExecutionMode.IN_MEMORY)
+        self.assertIn("not enough memory", plan.summary())
+
+    def test_stacks_that_do_not_fit_are_processed_out_of_core(self):
+        plan = plan_memory(SHAPE, np.float32, [(CopyingFilter, {})], available_bytes=2 * GB, shm_available_bytes=2 * GB)
+
+        self.assertEqual(plan.mode, ExecutionMode.OUT_OF_CORE)
+        self.assertFalse(plan.runnable)
+        # the operations window and the batch runner do not stream the stack
+        self.assertIn("not enough memory", plan.summary())
+        # the range and its copy fit in the 2 GB available
+        self.assertLessEqual(plan.slab_size * 1024 * 1024 * 4 * 2, 2 * GB)
+        self.assertGreater(plan.slab_size, 0)
+        self.assertIsNone(plan.recon_slab_size)
+
+    def test_reconstruction(self):
+        recon = ReconstructionParameters("FBP_CUDA", "ram-lak")
+        plan = self.plan([], available=8 * GB, recon_params=recon)
+
+        step, = plan.steps
+        self.assertEqual(step.output_shape, (1024, 1024, 1024))
+        self.assertEqual(step.peak_bytes, 2 * STACK)
+        self.assertEqual(step.shm_bytes, 2 * STACK)
+
+        gridrec = ReconstructionParameters("gridrec", "ramlak")
+        plan = self.plan([], available=8 * GB, recon_params=gridrec)
+
+        step, = plan.steps
+        # the volume and the copy of the sinograms are not shared
+        self.assertEqual(step.peak_bytes, 3 * STACK)
+        self.assertEqual(step.shm_bytes, STACK)
+
+    def test_reconstruction_out_of_core(self):
+        recon = ReconstructionParameters("FBP_CUDA", "ram-lak")
+        plan = plan_memory(SHAPE,
+                           np.float32, [(MinusLogFilter, {})],
+                           recon_params=recon,
+                           available_bytes=2 * GB,
+                           shm_available_bytes=2 * GB)
+
+        self.assertEqual(plan.mode, ExecutionMode.OUT_OF_CORE)
+        self.assertLessEqual(plan.slab_size * 4 * MB, 2 * GB)
+        # each sinogram and its reconstructed slice take 8 MB
+        self.assertLessEqual(plan.recon_slab_size * 8 * MB, 2 * GB)
+        self.assertGreater(plan.recon_slab_size, 0)
+
+    @mock.patch('mantidimaging.core.utility.memory_planner.get_shared_memory_linux', return_value=None)
+    @mock.patch('mantidimaging.core.utility.memory_planner.get_system_memory_linux', return_value=None)
+    def test_unknown_budget_fits(self, *_):
+        plan = plan_memory(SHAPE, np.float32, [(CopyingFilter, {})])
+
+        self.assertIsNone(plan.budget_bytes)
+        self.assertTrue(plan.fits)
+        self.assertEqual(plan.summary(), "Peak memory 8.00 GB, shared memory 4.00 GB")
+
+    def test_steps_from_operations(self):
+        operations = [
+            ImageOperation(MinusLogFilter.__name__, [], {'minus_log': True}, "Minus Log"),
+            ImageOperation(const.OPERATION_NAME_AXES_SWAP, [], {}, "Swap axes"),
+            ImageOperation(CopyingFilter.__name__, [], {}, "Copying"),
+        ]
+        steps = steps_from_operations(operations, filters=[MinusLogFilter, CopyingFilter])
+
+        self.assertEqual(steps, [(MinusLogFilter, {'minus_log': True}), (CopyingFilter, {})])
+        self.assertRaises(KeyError, steps_from_operations, [ImageOperation("Unknown", [], {}, "")], [MinusLogFilter])
+
+
+if __name__ == '__main__':
+    unittest.main()
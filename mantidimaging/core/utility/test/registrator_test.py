@@ -15,18 +15,22 @@ class RegistratorTest(unittest.TestCase):
         super(RegistratorTest, self).__init__(*args, **kwargs)
 
     def test_get_package_children_modules_only(self):
-        modules = get_package_children('mantidimaging.core.operations.wip', packages=False, modules=True)
+        modules = get_package_children('mantidimaging.core.operations.mcp_corrections', packages=False, modules=True)
 
         modules = list([m[1] for m in modules])
 
-        self.assertEqual(modules, ['mantidimaging.core.operations.wip.mcp_corrections.mcp_corrections'])
+        self.assertEqual(modules, [
+            'mantidimaging.core.operations.mcp_corrections.mcp_corrections',
+            'mantidimaging.core.operations.mcp_corrections.test.mcp_corrections_test'
+        ])
 
     def test_get_package_children_packages_and_modules(self):
-        modules = get_package_children('mantidimaging.core.operations.wip', packages=True, modules=True)
+        modules = get_package_children('mantidimaging.core.operations.mcp_corrections', packages=True, modules=True)
 
         modules = list([m[1] for m in modules])
 
         self.assertEqual(modules, [
-            'mantidimaging.core.operations.wip.mcp_corrections',
-            'mantidimaging.core.operations.wip.mcp_corrections.mcp_corrections'
+            'mantidimaging.core.operations.mcp_corrections.mcp_corrections',
+            'mantidimaging.core.operations.mcp_corrections.test',
+            'mantidimaging.core.operations.mcp_corrections.test.mcp_corrections_test'
         ])
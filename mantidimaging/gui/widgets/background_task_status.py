@@ -0,0 +1,95 @@
+from logging import getLogger
+from typing import Callable, List
+
+from PyQt5 import Qt
+
+from mantidimaging.core.utility.progress_reporting import Progress, ProgressHandler
+from mantidimaging.gui.dialogs.async_task.task import TaskWorkerThread
+
+
+class _StatusProgressHandler(ProgressHandler):
+    """
+    Forwards the progress updates of a single background task to the status widget.
+
+    The updates arrive on the worker thread, the signal delivers them to the GUI thread.
+    """
+    def __init__(self, status: 'BackgroundTaskStatus'):
+        super(_StatusProgressHandler, self).__init__()
+        self.status = status
+
+    def progress_update(self):
+        msg = self.progress.last_status_message()
+        self.status.progress_updated.emit(self.progress.completion(), msg if msg is not None else '')
+
+
+class BackgroundTaskStatus(Qt.QWidget):
+    """
+    Non-modal status area, intended for the status bar, that runs tasks in the background
+    and shows their progress while the rest of the application stays usable.
+    """
+    progress_updated = Qt.pyqtSignal(float, str)
+
+    def __init__(self, parent):
+        super(BackgroundTaskStatus, self).__init__(parent)
+
+        layout = Qt.QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.label = Qt.QLabel("", self)
+        layout.addWidget(self.label)
+
+        self.progress_bar = Qt.QProgressBar(self)
+        self.progress_bar.setMinimum(0)
+        self.progress_bar.setMaximum(1000)
+        self.progress_bar.setMaximumWidth(200)
+        layout.addWidget(self.progress_bar)
+
+        self.progress_updated.connect(self.set_progress)
+
+        # keep references to the running threads, otherwise they are destroyed while still running
+        self.tasks: List[TaskWorkerThread] = []
+        self.setVisible(False)
+
+    def start(self, task_name: str, task: Callable, on_complete: Callable, kwargs=None):
+        """
+        Starts the task on a worker thread. The task receives a `progress` keyword argument.
+
+        :param task_name: Name of the task shown next to the progress bar
+        :param task: The function that will be executed in the background
+        :param on_complete: Called on the GUI thread with the finished TaskWorkerThread
+        :param kwargs: Keyword arguments forwarded to the task
+        """
+        progress = Progress(task_name=task_name)
+        progress.add_progress_handler(_StatusProgressHandler(self))
+
+        thread = TaskWorkerThread(self)
+        thread.task_function = task
+        thread.kwargs = dict(kwargs) if kwargs else {}
+        thread.kwargs['progress'] = progress
+        thread.finished.connect(lambda: self._on_task_finished(thread, on_complete))
+
+        self.tasks.append(thread)
+        self.label.setText(task_name)
+        self.progress_bar.setValue(0)
+        self.setVisible(True)
+        thread.start()
+
+    @property
+    def num_running(self) -> int:
+        return len(self.tasks)
+
+    def set_progress(self, progress: float, message: str):
+        if message:
+            self.label.setText(message)
+        self.progress_bar.setValue(int(progress * 1000))
+
+    def _on_task_finished(self, thread: TaskWorkerThread, on_complete: Callable):
+        self.tasks.remove(thread)
+        if not self.tasks:
+            self.setVisible(False)
+
+        try:
+            on_complete(thread)
+        except Exception:
+            getLogger(__name__).exception("Failed to run background task completion callback")
+            raise
@@ -52,6 +52,32 @@ class MainWindowModel(object):
         svp.images.filenames = filenames
         return True
 
+    def create_save_snapshot(self, stack_uuid) -> saver.StackSnapshot:
+        """
+        The snapshot copies the stack slab by slab while it is saved, see saver.StackSnapshot.
+        """
+        return saver.StackSnapshot(self.get_stack_visualiser(stack_uuid).presenter.images)
+
+    @staticmethod
+    def do_background_saving(snapshot: saver.StackSnapshot, output_dir, name_prefix, image_format, overwrite, progress):
+        return saver.save_snapshot(snapshot,
+                                   output_dir=output_dir,
+                                   name_prefix=name_prefix,
+                                   out_format=image_format,
+                                   overwrite_all=overwrite,
+                                   progress=progress)
+
+    def set_saved_filenames(self, stack_uuid, filenames: List[str]):
+        """
+        Records the filenames of a finished background save, unless the stack
+        was removed or changed its number of images in the meantime.
+        """
+        if stack_uuid not in self.active_stacks:
+            return
+        images = self.get_stack_visualiser(stack_uuid).presenter.images
+        if images.data is not None and images.data.shape[0] == len(filenames):
+            images.filenames = filenames
+
     def create_name(self, filename):
         """
         Creates a suitable name for a newly loaded stack.
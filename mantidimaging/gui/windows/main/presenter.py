@@ -122,7 +122,19 @@ class MainWindowPresenter(BasePresenter):
             'image_format': self.view.save_dialogue.image_format(),
             'overwrite': self.view.save_dialogue.overwrite()
         }
-        start_async_task_view(self.view, self.model.do_saving, self._on_save_done, kwargs)
+        if self.view.save_dialogue.background():
+            self.save_in_background(**kwargs)
+        else:
+            start_async_task_view(self.view, self.model.do_saving, self._on_save_done, kwargs)
+
+    def save_in_background(self, stack_uuid, **kwargs):
+        """
+        Saves the stack without blocking the GUI. The stack is copied slab by slab while it is saved,
+        see saver.StackSnapshot.
+        """
+        kwargs['snapshot'] = self.model.create_save_snapshot(stack_uuid)
+        self.view.background_tasks.start("Saving", self.model.do_background_saving,
+                                         lambda task: self._on_background_save_done(stack_uuid, task), kwargs)
 
     def _on_save_done(self, task):
         log = getLogger(__name__)
@@ -130,6 +142,13 @@ class MainWindowPresenter(BasePresenter):
         if not task.was_successful():
             self._handle_task_error(self.SAVE_ERROR_STRING, log, task)
 
+    def _on_background_save_done(self, stack_uuid: UUID, task):
+        if task.was_successful():
+            self.model.set_saved_filenames(stack_uuid, task.result)
+            task.result = None
+        else:
+            self._handle_task_error(self.SAVE_ERROR_STRING, getLogger(__name__), task)
+
     @property
     def stack_list(self):
         return self.model.stack_list
@@ -49,5 +49,8 @@ class MWSaveDialog(Qt.QDialog):
     def overwrite(self):
         return self.overwriteAll.isChecked()
 
+    def background(self):
+        return self.backgroundSave.isChecked()
+
     def image_format(self):
         return str(self.formats.currentText())
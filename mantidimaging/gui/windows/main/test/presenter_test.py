@@ -42,6 +42,30 @@ class MainWindowPresenterTest(unittest.TestCase):
         # Expect error message
         self.view.show_error_dialog.assert_called_once_with(self.presenter.SAVE_ERROR_STRING.format(task.error))
 
+    @mock.patch("mantidimaging.gui.windows.main.presenter.start_async_task_view")
+    def test_save_in_background_does_not_block(self, start_async_mock: mock.Mock):
+        self.view.save_dialogue = mock.Mock()
+        self.view.save_dialogue.background.return_value = True
+        self.view.background_tasks = mock.Mock()
+        self.presenter.model = mock.Mock()
+
+        self.presenter.save()
+
+        start_async_mock.assert_not_called()
+        self.presenter.model.create_save_snapshot.assert_called_once_with(self.view.save_dialogue.selected_stack)
+        self.view.background_tasks.start.assert_called_once()
+        kwargs = self.view.background_tasks.start.call_args[0][3]
+        self.assertIs(kwargs['snapshot'], self.presenter.model.create_save_snapshot.return_value)
+
+    def test_background_save_done_sets_filenames(self):
+        self.presenter.model = mock.Mock()
+        task = TaskWorkerThread()
+        task.result = ["a.tif"]
+
+        self.presenter._on_background_save_done("uuid", task)
+
+        self.presenter.model.set_saved_filenames.assert_called_once_with("uuid", ["a.tif"])
+
     @mock.patch("mantidimaging.gui.windows.main.presenter.start_async_task_view")
     def test_load_stack(self, start_async_mock: mock.Mock):
         parameters_mock = mock.Mock()
@@ -7,6 +7,7 @@ from PyQt5.QtWidgets import QAction, QLabel, QInputDialog
 from mantidimaging.core.data import Images
 from mantidimaging.core.utility.version_check import find_if_latest_version
 from mantidimaging.gui.mvp_base import BaseMainWindowView
+from mantidimaging.gui.widgets.background_task_status import BackgroundTaskStatus
 from mantidimaging.gui.windows.operations import FiltersWindowView
 from mantidimaging.gui.windows.load_dialog import MWLoadDialog
 from mantidimaging.gui.windows.main.presenter import MainWindowPresenter
@@ -36,6 +37,8 @@ class MainWindowView(BaseMainWindowView):
 
     actionDebug_Me: QAction
 
+    background_tasks: BackgroundTaskStatus
+
     def __init__(self):
         super(MainWindowView, self).__init__(None, "gui/ui/main_window.ui")
 
@@ -47,6 +50,8 @@ class MainWindowView(BaseMainWindowView):
         status_bar = self.statusBar()
         self.status_bar_label = QLabel("", self)
         status_bar.addPermanentWidget(self.status_bar_label)
+        self.background_tasks = BackgroundTaskStatus(self)
+        status_bar.addWidget(self.background_tasks)
 
         self.setup_shortcuts()
         self.update_shortcuts()
@@ -1,10 +1,13 @@
 from functools import partial
 from logging import getLogger
-from typing import Callable, TYPE_CHECKING, List, Any, Dict
+from typing import Callable, TYPE_CHECKING, List, Any, Dict, Type
 
 from mantidimaging.core.data import Images
+from mantidimaging.core.data.utility import apply_in_slabs
 from mantidimaging.core.operations.base_filter import BaseFilter
+from mantidimaging.core.operations.crop_coords import CropCoordinatesFilter
 from mantidimaging.core.operations.loader import load_filter_packages
+from mantidimaging.core.utility.memory_planner import MemoryPlan, plan_memory
 from mantidimaging.gui.dialogs.async_task import start_async_task_view
 from mantidimaging.gui.mvp_base import BaseMainWindowView
 from mantidimaging.gui.utility import get_parameters_from_stack
@@ -19,8 +22,8 @@ def ensure_tuple(val):
 
 
 class FiltersWindowModel(object):
-    filters: List[BaseFilter]
-    selected_filter: BaseFilter
+    filters: List[Type[BaseFilter]]
+    selected_filter: Type[BaseFilter]
     filter_widget_kwargs: Dict[str, Any]
 
     def __init__(self, presenter: 'FiltersWindowPresenter'):
@@ -28,7 +31,7 @@ class FiltersWindowModel(object):
 
         self.presenter = presenter
         # Update the local filter registry
-        self.filters = load_filter_packages(ignored_packages=['mantidimaging.core.operations.wip'])
+        self.filters = load_filter_packages()
 
         self.preview_image_idx = 0
 
@@ -74,23 +77,46 @@ class FiltersWindowModel(object):
         # Run filter
         exec_func: partial = self.selected_filter.execute_wrapper(**input_kwarg_widgets)
         exec_func.keywords["progress"] = progress
-        self._apply_to(exec_func, images, stack_params)
+        # refuse to start a filter that would run out of memory part way through
+        filter_kwargs = {**exec_func.keywords, **stack_params}
+        slab_size = self.selected_filter.check_memory(images.data.shape, images.data.dtype, **filter_kwargs)
+        self._apply_to(exec_func, images, stack_params, slab_size)
         images_180deg = images.proj180deg
         # if the 180 projection has a memory mapped file then it is a loaded image
         # if it doesn't then it uses the middle of the stack as a 'guess' of the 180 degree proj
         if images_180deg.memory_filename is not None:
-            log.info("Applying filter to 180 deg projection")
-            self._apply_to(exec_func, images_180deg, stack_params)
-
-    def _apply_to(self, exec_func, images, stack_params):
-        exec_func(images, **stack_params)
+            if filter_kwargs.get('include_180deg'):
+                # the filter has already applied itself to the 180 deg projection
+                self._record_operation(exec_func, images_180deg, stack_params)
+            else:
+                log.info("Applying filter to 180 deg projection")
+                self._apply_to(exec_func, images_180deg, stack_params)
+
+    def _apply_to(self, exec_func, images, stack_params, slab_size=None):
+        # the filters expect contiguous stacks, only cropping again keeps a deferred crop
+        if self.selected_filter is not CropCoordinatesFilter:
+            images.compact()
+        if slab_size is None:
+            exec_func(images, **stack_params)
+        else:
+            apply_in_slabs(exec_func, images, slab_size, **stack_params)
+        self._record_operation(exec_func, images, stack_params)
+
+    def _record_operation(self, exec_func, images, stack_params):
         exec_func.keywords.update(stack_params)
         # store the executed filter in history if it executed successfully
-        images.record_operation(
-            self.selected_filter.__name__,  # type: ignore
-            self.selected_filter.filter_name,
-            *exec_func.args,
-            **exec_func.keywords)
+        images.record_operation(self.selected_filter.__name__, self.selected_filter.filter_name, *exec_func.args,
+                                **exec_func.keywords)
+
+    def memory_plan(self, images: Images, stack_params: Dict[str, Any]) -> MemoryPlan:
+        """
+        Predicts the memory used by applying the selected filter to the whole stack.
+        """
+        exec_func: partial = self.selected_filter.execute_wrapper(**self.filter_widget_kwargs)
+        filter_kwargs = {**exec_func.keywords, **stack_params}
+        return plan_memory(images.data.shape,
+                           images.dtype, [(self.selected_filter, filter_kwargs)],
+                           loaded_bytes=images.data.nbytes)
 
     def do_apply_filter(self, stack_view, stack_presenter, post_filter: Callable[[Any], None]):
         """
@@ -26,6 +26,7 @@ class Notification(Enum):
     UPDATE_PREVIEWS = auto()
     SCROLL_PREVIEW_UP = auto()
     SCROLL_PREVIEW_DOWN = auto()
+    UPDATE_MEMORY_ESTIMATE = auto()
 
 
 class FiltersWindowPresenter(BasePresenter):
@@ -50,6 +51,8 @@ class FiltersWindowPresenter(BasePresenter):
                 self.do_scroll_preview(1)
             elif signal == Notification.SCROLL_PREVIEW_DOWN:
                 self.do_scroll_preview(-1)
+            elif signal == Notification.UPDATE_MEMORY_ESTIMATE:
+                self.do_update_memory_estimate()
 
         except Exception as e:
             self.show_error(e, traceback.format_exc())
@@ -126,6 +129,7 @@ class FiltersWindowPresenter(BasePresenter):
             if self.stack.presenter.images.has_proj180deg():
                 self.view.main_window.update_stack_with_images(self.stack.presenter.images.proj180deg)
             self.do_update_previews()
+            self.do_update_memory_estimate()
 
         self.model.do_apply_filter(self.stack, self.stack.presenter, post_filter)
 
@@ -164,6 +168,25 @@ class FiltersWindowPresenter(BasePresenter):
                 else:
                     self.view.previews.hide_difference_overlay()
 
+    def do_update_memory_estimate(self):
+        """
+        Shows the memory predicted for applying the filter to the whole stack, before it is applied.
+        """
+        if self.stack is None:
+            self.view.show_memory_estimate("")
+            return
+
+        stack_presenter = self.stack.presenter
+        stack_params = get_parameters_from_stack(stack_presenter, self.model.params_needed_from_stack)
+        try:
+            plan = self.model.memory_plan(stack_presenter.images, stack_params)
+        except Exception:
+            # the parameters are not valid, which the preview reports
+            getLogger(__name__).debug("Could not predict the memory used by the filter", exc_info=True)
+            self.view.show_memory_estimate("")
+            return
+        self.view.show_memory_estimate(plan.summary(), plan.runnable)
+
     @staticmethod
     def _update_preview_image(image_data: Optional[np.ndarray], image: ImageItem,
                               redraw_histogram: Optional[Callable[[Any], None]]):
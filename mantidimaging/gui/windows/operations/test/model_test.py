@@ -143,6 +143,7 @@ class FiltersWindowModelTest(unittest.TestCase):
         callback_mock = mock.Mock()
 
         selected_filter_mock.execute_wrapper.return_value = partial(callback_mock)
+        selected_filter_mock.check_memory.return_value = None
         self.model.selected_filter = selected_filter_mock
         self.model.apply_filter(images, stack_params, progress=progress_mock)
 
@@ -166,6 +167,7 @@ class FiltersWindowModelTest(unittest.TestCase):
         callback_mock = mock.Mock()
 
         selected_filter_mock.execute_wrapper.return_value = partial(callback_mock)
+        selected_filter_mock.check_memory.return_value = None
         self.model.selected_filter = selected_filter_mock
         self.model.apply_filter(images, stack_params, progress=progress_mock)
 
@@ -177,6 +179,56 @@ class FiltersWindowModelTest(unittest.TestCase):
 
         images.proj180deg.free_memory()
 
+    def test_apply_filter_that_includes_180deg_proj(self):
+        """
+        When the filter applies itself to the loaded 180deg projection it is not
+        applied to it a second time, but it is still recorded in its history
+        """
+        images = th.generate_images()
+        images.proj180deg = th.generate_images(automatic_free=False)
+        stack_params = {'test': 123}
+        selected_filter_mock = mock.Mock()
+        selected_filter_mock.__name__ = mock.Mock()
+        selected_filter_mock.__name__.return_value = "Test filter"
+        selected_filter_mock.filter_name.return_value = "Test filter"
+        progress_mock = mock.Mock()
+
+        callback_mock = mock.Mock()
+
+        selected_filter_mock.execute_wrapper.return_value = partial(callback_mock, include_180deg=True)
+        selected_filter_mock.check_memory.return_value = None
+        self.model.selected_filter = selected_filter_mock
+        self.model.apply_filter(images, stack_params, progress=progress_mock)
+
+        callback_mock.assert_called_once_with(images, include_180deg=True, progress=progress_mock, **stack_params)
+        self.assertEqual(len(images.proj180deg.metadata[const.OPERATION_HISTORY]), 1)
+
+        images.proj180deg.free_memory()
+
+    def test_apply_filter_in_slabs(self):
+        """
+        When the filter does not fit in memory at once it is applied to slabs of the
+        stack, one after the other
+        """
+        images = th.generate_images((10, 8, 9))
+        expected = images.data * 2
+        selected_filter_mock = mock.Mock()
+        selected_filter_mock.__name__ = "TestFilter"
+        selected_filter_mock.check_memory.return_value = 4
+        slab_sizes = []
+
+        def double(slab, **_):
+            slab_sizes.append(slab.num_images)
+            # filters that are not in place replace the data of the images
+            slab.data = slab.data * 2
+
+        selected_filter_mock.execute_wrapper.return_value = partial(double)
+        self.model.selected_filter = selected_filter_mock
+        self.model.apply_filter(images, {})
+
+        self.assertEqual(slab_sizes, [4, 4, 2])
+        np.testing.assert_array_equal(images.data, expected)
+
 
 if __name__ == '__main__':
     unittest.main()
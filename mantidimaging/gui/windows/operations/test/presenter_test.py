@@ -72,3 +72,19 @@ class FiltersWindowPresenterTest(unittest.TestCase):
         self.view.clear_previews.assert_called_once()
         self.assertEqual(3, update_preview_image_mock.call_count)
         apply_filter_mock.assert_called_once()
+
+    def test_update_memory_estimate_no_stack(self):
+        self.presenter.do_update_memory_estimate()
+        self.view.show_memory_estimate.assert_called_once_with("")
+
+    @mock.patch('mantidimaging.gui.windows.operations.presenter.FiltersWindowModel.memory_plan')
+    def test_update_memory_estimate(self, memory_plan_mock: mock.Mock):
+        stack = mock.Mock()
+        images = generate_images()
+        stack.presenter.images = images
+        self.presenter.stack = stack
+        self.presenter.do_update_memory_estimate()
+
+        memory_plan_mock.assert_called_once()
+        plan = memory_plan_mock.return_value
+        self.view.show_memory_estimate.assert_called_once_with(plan.summary.return_value, plan.runnable)
@@ -32,6 +32,7 @@ class FiltersWindowView(BaseMainWindowView):
 
     error_icon: QLabel
     error_text: QLabel
+    memoryEstimate: QLabel
 
     presenter: FiltersWindowPresenter
 
@@ -115,6 +116,7 @@ class FiltersWindowView(BaseMainWindowView):
         has changed such that the previews are now out of date.
         """
         self.clear_error_dialog()
+        self.presenter.notify(PresNotification.UPDATE_MEMORY_ESTIMATE)
         if self.previewAutoUpdate.isChecked() and self.isVisible():
             self.presenter.notify(PresNotification.UPDATE_PREVIEWS)
 
@@ -152,6 +154,10 @@ class FiltersWindowView(BaseMainWindowView):
     def preview_image_difference(self) -> ImageItem:
         return self.previews.image_difference
 
+    def show_memory_estimate(self, text: str, runnable: bool = True):
+        self.memoryEstimate.setText(text)
+        self.memoryEstimate.setStyleSheet("" if runnable else "color: red")
+
     def show_error_dialog(self, msg=""):
         self.error_text.show()
         self.error_icon.setPixmap(QApplication.style().standardPixmap(QApplication.style().SP_MessageBoxCritical))
@@ -111,7 +111,10 @@ setup(
     packages=find_packages(),
     package_data={"mantidimaging.gui": ["ui/*.ui"]},
     entry_points={
-        "console_scripts": ["mantidimaging-ipython = mantidimaging.ipython:main"],
+        "console_scripts": [
+            "mantidimaging-ipython = mantidimaging.ipython:main",
+            "mantidimaging-batch = mantidimaging.batch:main",
+        ],
         "gui_scripts": ["mantidimaging = mantidimaging.main:main"],
     },
     url="https://github.com/mantidproject/mantidimaging",
@@ -132,5 +135,5 @@ setup(
         "docs_publish": PublishDocsToGitHubPages,
         "compile_ui": CompilePyQtUiFiles,
     },
-    install_requires=["h5py", "numpy", "python-socketio", "pyqt5==5.15", "pyqtgraph==0.11"],
+    install_requires=["h5py", "numpy", "python-socketio", "pyqt5==5.15", "pyqtgraph==0.11", "tifffile"],
 )